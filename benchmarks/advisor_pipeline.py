@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Benchmark an hourly ``ai_advisor.main()`` run against a local fake data plane.
+
+For each Recent-sheet size, a ``FakeDataPlane`` serves every upstream over
+HTTP on 127.0.0.1 and each run happens in a fresh child process, so peak RSS
+belongs to that run alone.  Gemini is replaced by a fake client with a
+configurable delay.  Every repeat is a pair of runs:
+
+* ``cold`` — no analysis state and no Daily-sheet cache (first run after a cache miss)
+* ``warm`` — the next hour: Recent window moved 60 minutes, state and cache reused
+
+Reported per run: ``main()`` wall time, time per stage, the per-source latencies
+``main()`` itself records, and peak RSS::
+
+    python benchmarks/advisor_pipeline.py --rows 1000 10000 100000 --repeat 3 \\
+        --latency recent=0.4 --latency gemini=8 --fail yahoo=503 --output advisor.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_data_plane import ROUTES, FakeDataPlane, parse_faults, point_advisor_at  # noqa: E402
+
+
+DEFAULT_ROWS = (1000, 10000, 50000, 100000)
+JOB_BUDGET_SECONDS = 300  # ai_update.yml の timeout-minutes: 5
+
+# main() の中で時間を測る関数（ai_advisor のモジュール属性を差し替えて計測する）
+STAGES = {
+    "collect_sources": "collect_sources",
+    "spreadsheet": "fetch_spreadsheet_data",
+    "analysis": "analyze_data_comprehensive",
+    "weather": "fetch_weather_forecast",
+    "jma_forecast": "fetch_jma_forecast",
+    "alerts": "fetch_jma_alerts",
+    "precipitation": "fetch_yahoo_precipitation",
+    "gemini": "analyze_with_gemini",
+    "write_output": "_write_json_atomic",
+}
+
+
+class FakeGemini:
+    """Stand-in for ``google.genai``: ``Client(...).models.generate_content`` after a delay."""
+
+    def __init__(self, latency: float = 0.0, status: Any = None):
+        self.latency = latency
+        self.status = status
+        self.prompt_chars = 0
+
+    def Client(self, api_key: str = "") -> Any:  # noqa: N802  genai.Client と同じ呼び方
+        fake = self
+
+        def generate_content(model: str, contents: str) -> Any:
+            fake.prompt_chars = len(contents)
+            time.sleep(fake.latency)
+            if fake.status:
+                raise RuntimeError(f"{fake.status} fake Gemini failure")
+            return types.SimpleNamespace(text="今日は曇りがちで、夕方から雨の可能性があります。\n\n"
+                                              "室内は湿度が高めです。\n\n次回更新は1時間後です。")
+
+        return types.SimpleNamespace(models=types.SimpleNamespace(generate_content=generate_content))
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KiB、macOS はバイト
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_child(config: Dict[str, Any]) -> Dict[str, Any]:
+    """One ``ai_advisor.main()`` in this process, configured by the parent."""
+    started = time.perf_counter()
+    import ai_advisor
+    import_seconds = time.perf_counter() - started
+
+    workdir = Path(config["workdir"])
+    gemini = config["gemini"]
+    fake_gemini = FakeGemini(gemini.get("latency", 0.0), gemini.get("status"))
+    ai_advisor.gemini_client.get_client = fake_gemini.Client
+    ai_advisor.GEMINI_API_KEY = "benchmark"
+    ai_advisor.ANALYSIS_STATE_PATH = workdir / "analysis_state.json"
+    ai_advisor.AI_COMMENT_PATH = workdir / "ai_comment.json"
+    point_advisor_at(ai_advisor, config["base_url"])
+
+    stages: Dict[str, float] = {}
+    state_mode: List[Any] = []
+
+    def timed(stage: str, func: Any) -> Any:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            begun = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stages[stage] = round(stages.get(stage, 0.0) + time.perf_counter() - begun, 4)
+                if stage == "analysis" and kwargs.get("state") is not None:
+                    state_mode.extend(kwargs["state"].last_update)
+        return wrapper
+
+    for stage, name in STAGES.items():
+        setattr(ai_advisor, name, timed(stage, getattr(ai_advisor, name)))
+
+    log = io.StringIO()
+    begun = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        ai_advisor.main()
+    wall = time.perf_counter() - begun
+
+    output = json.loads(ai_advisor.AI_COMMENT_PATH.read_text(encoding="utf-8"))
+    status = output["source_status"]
+    return {
+        "wall_seconds": round(wall, 4),
+        "import_seconds": round(import_seconds, 4),
+        "stages": stages,
+        "latency_ms": status["latency_ms"],
+        "source_errors": {name: error for name, error in status.items() if name.endswith("_error") and error},
+        "analysis_status": output["analysis_status"],
+        "analysis_state": state_mode[0] if state_mode else None,
+        "gviz": ai_advisor.get_client(ai_advisor.SPREADSHEET_ID).timing_summary(),
+        "prompt_chars": fake_gemini.prompt_chars,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def spawn(config: Dict[str, Any], cache_dir: Path) -> Dict[str, Any]:
+    started = time.perf_counter()
+    env = {**os.environ, "WX_CACHE_DIR": str(cache_dir)}
+    proc = subprocess.run([sys.executable, __file__, "--child", json.dumps(config)],
+                          env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark child failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # 締め切り超過の取得スレッドはタイムアウトまで残るため、プロセス寿命は main() より長くなりうる
+    result["process_seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def summarize(runs: List[Dict[str, Any]], budget: float) -> Dict[str, Any]:
+    walls = [run["wall_seconds"] for run in runs]
+    stage_names = sorted({name for run in runs for name in run["stages"]})
+    return {
+        "runs": len(runs),
+        "wall_median": round(statistics.median(walls), 4),
+        "wall_max": max(walls),
+        "budget_share_max": round(max(walls) / budget, 4),
+        "stage_median": {
+            name: round(statistics.median(run["stages"].get(name, 0.0) for run in runs), 4)
+            for name in stage_names
+        },
+        "peak_rss_mb_max": max(run["peak_rss_mb"] for run in runs),
+    }
+
+
+def bench_rows(rows: int, args: argparse.Namespace, faults: Dict[str, Any], gemini: Dict[str, Any],
+               workdir: Path) -> Dict[str, Any]:
+    runs: Dict[str, List[Dict[str, Any]]] = {"cold": [], "warm": []}
+    with FakeDataPlane(rows, seed=args.seed, daily_years=args.daily_years,
+                       jma_fixture=args.jma_fixture, faults=faults) as plane:
+        config = {"base_url": plane.base_url, "workdir": str(workdir), "gemini": gemini}
+        for _ in range(args.repeat):
+            shutil.rmtree(workdir, ignore_errors=True)
+            workdir.mkdir(parents=True)
+            runs["cold"].append(spawn(config, workdir / "cache"))
+            plane.advance(60)
+            runs["warm"].append(spawn(config, workdir / "cache"))
+        requests = len(plane.requests)
+    return {
+        "recent_rows": rows,
+        "daily_rows": plane.history.days,
+        "http_requests": requests,
+        "summary": {phase: summarize(phase_runs, args.budget) for phase, phase_runs in runs.items()},
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ai_advisor のベンチマーク（ローカルの疑似データプレーン）")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="Recent シートの行数（既定: 1000 10000 50000 100000）")
+    parser.add_argument("--repeat", type=int, default=3, help="cold/warm の組を繰り返す回数（既定: 3）")
+    parser.add_argument("--seed", type=int, default=0, help="合成データのシード")
+    parser.add_argument("--daily-years", type=int, default=3, help="Daily シートの年数（既定: 3）")
+    parser.add_argument("--jma-fixture", default=FakeDataPlane.jma_fixture,
+                        help="tests/fixtures/jma/raw の警報レスポンス")
+    parser.add_argument("--latency", action="append", default=[], metavar="ROUTE=SECONDS",
+                        help=f"応答遅延（経路: {', '.join(ROUTES)}, gemini）")
+    parser.add_argument("--fail", action="append", default=[], metavar="ROUTE=STATUS[:RATE]",
+                        help="HTTPエラーを返す（RATE は発生確率、gemini は例外）")
+    parser.add_argument("--budget", type=float, default=JOB_BUDGET_SECONDS,
+                        help="ジョブの時間予算（秒、既定: 300）")
+    parser.add_argument("--output", help="結果 JSON の書き出し先（省略時は標準出力のみ）")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child)), ensure_ascii=False))
+        return
+
+    faults = parse_faults(args.latency, args.fail)
+    unknown = set(faults) - set(ROUTES) - {"gemini"}
+    if unknown:
+        parser.error(f"unknown route: {', '.join(sorted(unknown))}")
+    gemini_fault = faults.pop("gemini", None)
+    gemini = {"latency": gemini_fault.latency, "status": gemini_fault.status} if gemini_fault else {}
+
+    results = []
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory(prefix="wx-advisor-bench-") as tmp:
+            results.append(bench_rows(rows, args, faults, gemini, Path(tmp) / "run"))
+        print(f"{rows} rows done", file=sys.stderr)
+
+    payload = {
+        "benchmark": "advisor_pipeline",
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "budget_seconds": args.budget,
+        "latency": args.latency,
+        "fail": args.fail,
+        "results": results,
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Local HTTP fake of every upstream ``ai_advisor`` talks to.
+
+``FakeDataPlane`` serves, from one ``ThreadingHTTPServer`` on 127.0.0.1:
+
+* ``/gviz/tq`` — the Summary, Recent and Daily sheets as gviz CSV (Daily honours
+  ``select * offset N`` like the real endpoint, via ``SyntheticHistory``)
+* ``/open-meteo/v1/forecast`` — an Open-Meteo forecast with every field requested
+* ``/jma/forecast.json`` — a Tokyo prefectural forecast
+* ``/jma/warning.json`` — one of the recorded responses in ``tests/fixtures/jma/raw``
+* ``/yahoo`` — a Yahoo rain nowcast payload (5-minute observations + forecast)
+
+Each route can be given a latency and a failure (HTTP status, optionally with a
+probability), so deadline handling and partial outages can be measured as well
+as the happy path.  ``point_advisor_at`` rewires an imported ``ai_advisor``
+module to the fake.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from synthetic import RECENT_HEADER, SyntheticHistory, synthetic_history, synthetic_recent
+
+
+JST = timezone(timedelta(hours=9))
+JMA_FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "jma" / "raw"
+DEFAULT_JMA_FIXTURE = "archive-r8-130000-2026060303-level3-level4-continuing.json"
+
+# 遅延・障害を指定できる経路名
+ROUTES = ("summary", "recent", "daily", "open_meteo", "jma_forecast", "jma_warning", "yahoo")
+
+OPEN_METEO_HOURLY = (
+    "weather_code", "temperature_2m", "relative_humidity_2m", "dew_point_2m", "apparent_temperature",
+    "precipitation_probability", "precipitation", "rain", "showers", "snowfall", "cloud_cover",
+    "visibility", "wind_speed_10m", "wind_direction_10m", "wind_gusts_10m", "uv_index",
+    "temperature_850hPa", "temperature_925hPa", "wet_bulb_temperature_2m", "freezing_level_height",
+    "cape", "soil_temperature_0cm", "direct_radiation", "diffuse_radiation", "et0_fao_evapotranspiration",
+)
+
+
+@dataclass
+class RouteFault:
+    """Latency added before answering, and an optional HTTP failure."""
+
+    latency: float = 0.0
+    status: Optional[int] = None
+    rate: float = 1.0
+
+
+def parse_faults(latency: List[str], fail: List[str]) -> Dict[str, RouteFault]:
+    """Parse ``route=SECONDS`` latencies and ``route=STATUS[:RATE]`` failures."""
+    faults: Dict[str, RouteFault] = {}
+
+    def route_of(spec: str) -> Tuple[str, str]:
+        name, _, value = spec.partition("=")
+        if not value:
+            raise ValueError(f"expected route=value: {spec!r}")
+        return name, value
+
+    for spec in latency:
+        name, value = route_of(spec)
+        faults.setdefault(name, RouteFault()).latency = float(value)
+    for spec in fail:
+        name, value = route_of(spec)
+        status, _, rate = value.partition(":")
+        fault = faults.setdefault(name, RouteFault())
+        fault.status = int(status)
+        fault.rate = float(rate) if rate else 1.0
+    return faults
+
+
+def _summary_csv(history: SyntheticHistory, recent: List[str]) -> str:
+    """Summary sheet rows (label, value) consistent with the Recent/Daily data."""
+    today = list(csv.reader(recent[-1440:]))
+    last = today[-1]
+    temps = [float(row[1]) for row in today]
+    daily = list(csv.reader(history.daily_lines))
+    highs = [float(row[1]) for row in daily if row[1] not in ("", "0.0")]
+    lows = [float(row[2]) for row in daily if row[2] not in ("", "0.0")]
+    rows = [
+        ("現在の気温", last[1]),
+        ("現在の湿度", last[2]),
+        ("今日の最高", max(temps)),
+        ("今日の最低", min(temps)),
+        ("昨日の最高", daily[-1][1]),
+        ("昨日の最低", daily[-1][2]),
+        ("過去最高", max(highs)),
+        ("過去最低", min(lows)),
+    ]
+    return "\n".join(f'"{label}","{value}"' for label, value in rows) + "\n"
+
+
+def _open_meteo(now: datetime, rnd: random.Random) -> Dict[str, Any]:
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    hours = [start + timedelta(hours=i) for i in range(48)]
+    hourly: Dict[str, Any] = {"time": [h.strftime("%Y-%m-%dT%H:%M") for h in hours]}
+    for name in OPEN_METEO_HOURLY:
+        hourly[name] = [round(rnd.uniform(0, 30), 1) for _ in hours]
+    hourly["weather_code"] = [rnd.choice((0, 1, 2, 3, 61)) for _ in hours]
+    hourly["precipitation_probability"] = [rnd.randrange(0, 101, 10) for _ in hours]
+    days = [start.date(), start.date() + timedelta(days=1)]
+    return {
+        "latitude": 35.77, "longitude": 139.87, "timezone": "Asia/Tokyo",
+        "current": {
+            "time": now.strftime("%Y-%m-%dT%H:%M"), "weather_code": 3, "temperature_2m": 21.4,
+            "relative_humidity_2m": 68, "dew_point_2m": 15.2, "apparent_temperature": 21.0,
+            "precipitation": 0.0, "rain": 0.0, "showers": 0.0, "snowfall": 0.0, "cloud_cover": 82,
+            "pressure_msl": 1012.3, "surface_pressure": 1010.9, "wind_speed_10m": 3.1,
+            "wind_direction_10m": 40, "wind_gusts_10m": 6.4, "visibility": 24140, "uv_index": 2.1,
+            "is_day": 1,
+        },
+        "hourly": hourly,
+        "daily": {
+            "time": [d.isoformat() for d in days],
+            "sunrise": [f"{d}T05:41" for d in days], "sunset": [f"{d}T17:12" for d in days],
+            "sunshine_duration": [21000.0, 30500.0], "uv_index_max": [4.2, 5.0],
+            "temperature_2m_max": [24.1, 25.3], "temperature_2m_min": [17.0, 16.2],
+            "precipitation_sum": [1.2, 0.0], "rain_sum": [1.2, 0.0], "showers_sum": [0.0, 0.0],
+            "snowfall_sum": [0.0, 0.0], "precipitation_probability_max": [60, 10],
+            "wind_speed_10m_max": [5.2, 4.1], "wind_gusts_10m_max": [11.0, 8.3],
+            "wind_direction_10m_dominant": [35, 200], "shortwave_radiation_sum": [10.2, 15.8],
+        },
+    }
+
+
+def _jma_forecast(now: datetime) -> List[Dict[str, Any]]:
+    base = now.replace(minute=0, second=0, microsecond=0)
+    periods = [(base + timedelta(hours=6 * i)).isoformat() for i in range(4)]
+    return [{
+        "publishingOffice": "気象庁", "reportDatetime": base.isoformat(),
+        "timeSeries": [
+            {"timeDefines": periods[:3], "areas": [{
+                "area": {"name": "東京地方", "code": "130010"},
+                "weatherCodes": ["203", "101", "100"],
+                "weathers": ["くもり　夕方　から　雨", "晴れ　時々　くもり", "晴れ"],
+            }]},
+            {"timeDefines": periods, "areas": [{
+                "area": {"name": "東京地方", "code": "130010"}, "pops": ["20", "60", "30", "10"],
+            }]},
+        ],
+    }]
+
+
+def _yahoo(now: datetime, rnd: random.Random) -> Dict[str, Any]:
+    start = now.replace(second=0, microsecond=0) - timedelta(minutes=now.minute % 5 + 55)
+    data = []
+    for i in range(24):
+        at = start + timedelta(minutes=5 * i)
+        data.append({
+            "time": at.strftime("%H:%M"), "datetime": at.replace(tzinfo=None).isoformat(),
+            "rainfall": round(max(0.0, rnd.gauss(0.3, 0.8)), 2),
+            "type": "observation" if i < 12 else "forecast",
+        })
+    return {"updated_at": now.replace(tzinfo=None).isoformat(), "data": data}
+
+
+@dataclass
+class FakeDataPlane:
+    """Serve synthetic sheets and recorded API payloads on a local port.
+
+    ``recent_rows`` Recent rows end at ``end`` (now by default); ``advance`` slides
+    the Recent window forward to emulate the next hourly run.
+    """
+
+    recent_rows: int
+    seed: int = 0
+    daily_years: int = 3
+    jma_fixture: str = DEFAULT_JMA_FIXTURE
+    faults: Dict[str, RouteFault] = field(default_factory=dict)
+    end: Optional[datetime] = None
+    requests: List[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.end = (self.end or datetime.now(JST)).astimezone(JST)
+        self._rnd = random.Random(self.seed)
+        self.history = synthetic_history(self.daily_years, seed=self.seed,
+                                         end=self.end.date() - timedelta(days=1))
+        self._jma_warning = (JMA_FIXTURES / self.jma_fixture).read_bytes()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+        self.advance(0)
+
+    def advance(self, minutes: int) -> None:
+        """Move "now" forward and regenerate the time-dependent payloads."""
+        self.end += timedelta(minutes=minutes)
+        recent = synthetic_recent(self.recent_rows, self.end, seed=self.seed)
+        bodies = {
+            "recent": "\n".join([RECENT_HEADER] + recent) + "\n",
+            "summary": _summary_csv(self.history, recent),
+            "open_meteo": json.dumps(_open_meteo(self.end, self._rnd)),
+            "jma_forecast": json.dumps(_jma_forecast(self.end), ensure_ascii=False),
+            "yahoo": json.dumps(_yahoo(self.end, self._rnd)),
+        }
+        with self._lock:
+            self._bodies = {name: body.encode("utf-8") for name, body in bodies.items()}
+            self._bodies["jma_warning"] = self._jma_warning
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _answer(self, path: str, query: Dict[str, List[str]]) -> Tuple[str, bytes, str]:
+        """(route, body, content type) for a request."""
+        if path == "/gviz/tq":
+            sheet = query.get("sheet", [""])[0]
+            if sheet == "Daily":
+                body = self.history.gviz_csv(sheet, query.get("tq", [""])[0]).encode("utf-8")
+                return "daily", body, "text/csv"
+            route = sheet.lower()
+            with self._lock:
+                return route, self._bodies[route], "text/csv"
+        route = {
+            "/open-meteo/v1/forecast": "open_meteo",
+            "/jma/forecast.json": "jma_forecast",
+            "/jma/warning.json": "jma_warning",
+            "/yahoo": "yahoo",
+        }[path]
+        with self._lock:
+            return route, self._bodies[route], "application/json"
+
+    def start(self) -> "FakeDataPlane":
+        plane = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive（実環境のセッション再利用と同じ条件）
+
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                try:
+                    route, body, content_type = plane._answer(url.path, parse_qs(url.query))
+                except KeyError:
+                    self.send_error(404)
+                    return
+                plane.requests.append(route)
+                fault = plane.faults.get(route)
+                if fault and fault.latency:
+                    time.sleep(fault.latency)
+                if fault and fault.status and plane._rnd.random() < fault.rate:
+                    self.send_error(fault.status)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # クライアントがタイムアウトで切断済み（遅延注入時）
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeDataPlane":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+
+def point_advisor_at(advisor: Any, base_url: str) -> None:
+    """Rewire an imported ``ai_advisor`` module to a running ``FakeDataPlane``."""
+    from gviz_client import get_client
+
+    advisor.OPEN_METEO_URL = f"{base_url}/open-meteo/v1/forecast"
+    advisor.JMA_FORECAST_URL = f"{base_url}/jma/forecast.json"
+    advisor.JMA_WARNING_URL = f"{base_url}/jma/warning.json"
+    advisor.YAHOO_PRECIP_URL = f"{base_url}/yahoo"
+    get_client(advisor.SPREADSHEET_ID).url = f"{base_url}/gviz/tq"
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Benchmark the weekly/monthly report pipeline on synthetic multi-year histories.
+
+Every stage runs against a temporary ``REPORTS_DIR`` and Daily-sheet cache, with
+the gviz endpoint replaced by ``synthetic.StubSession`` and Gemini never called
+(``skip_ai=True``).  Results are printed (and optionally written) as JSON so runs
+can be compared across commits::
+
+    python benchmarks/report_pipeline.py --years 2 10 30 --repeat 3 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# ネットワークには一切触れない（テストと同じく未導入でも動くようにする。Gemini SDK は呼ぶまで読み込まれない）
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+import report_generator  # noqa: E402
+from daily_series import DailySeries  # noqa: E402
+from gviz_client import get_client  # noqa: E402
+from report_analysis import (  # noqa: E402
+    REFERENCE_INDEX_NAME,
+    ReferenceLookup,
+    analysis_fingerprint,
+    build_analysis_context,
+    load_reference_reports,
+)
+from synthetic import StubSession, synthetic_history  # noqa: E402
+
+
+DEFAULT_YEARS = (2, 10, 30)
+
+
+def measure(run: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Time ``run`` ``repeat`` times (``setup`` is untimed) with report output silenced."""
+    seconds: List[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - started)
+    return {
+        "best": round(min(seconds), 4),
+        "median": round(statistics.median(seconds), 4),
+        "runs": len(seconds),
+    }
+
+
+def use_reports_dir(path: Path) -> None:
+    report_generator.REPORTS_DIR = path
+    report_generator.WEEKLY_DIR = path / "weekly"
+    report_generator.MONTHLY_DIR = path / "monthly"
+
+
+def reset_dir(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+
+def stored_reports(reports_dir: Path) -> List[Dict[str, Any]]:
+    paths = sorted(reports_dir.glob("weekly/*.json")) + sorted(reports_dir.glob("monthly/*.json"))
+    return [json.loads(path.read_text(encoding="utf-8")) for path in paths]
+
+
+def bench_history(years: int, repeat: int, seed: int, end: date, workdir: Path) -> Dict[str, Any]:
+    history = synthetic_history(years, seed=seed, end=end)
+    session = StubSession(history)
+    client = get_client(report_generator.SPREADSHEET_ID)
+    client._session = session
+    cache_dir = workdir / "cache"
+    reports_dir = workdir / "reports"
+    os.environ["WX_CACHE_DIR"] = str(cache_dir)
+    use_reports_dir(reports_dir)
+
+    timings: Dict[str, Dict[str, Any]] = {}
+    timings["fetch_daily_data_cold"] = measure(report_generator.fetch_daily_data, repeat,
+                                               setup=lambda: reset_dir(cache_dir))
+    timings["fetch_daily_data_warm"] = measure(report_generator.fetch_daily_data, repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = report_generator.fetch_daily_data()
+    timings["daily_series"] = measure(lambda: DailySeries(rows), repeat)
+    records = DailySeries(rows)
+
+    timings["backfill"] = measure(lambda: report_generator.backfill(records, skip_ai=True), repeat,
+                                  setup=lambda: reset_dir(reports_dir))
+    timings["backfill_incremental"] = measure(
+        lambda: report_generator.backfill(records, skip_ai=True, incremental=True), repeat)
+
+    # 最後の完了週・完了月（データ末尾基準）。参照レポートはバックフィル済みの reports/ から読む
+    last_week = end - timedelta(days=end.weekday() + 1)
+    last_month = date(end.year, end.month, 1) - timedelta(days=1)
+    timings["generate_weekly_report"] = measure(
+        lambda: report_generator.generate_weekly_report(records, last_week, skip_ai=True), repeat)
+    timings["generate_monthly_report"] = measure(
+        lambda: report_generator.generate_monthly_report(records, last_month, skip_ai=True), repeat)
+
+    index_path = reports_dir / REFERENCE_INDEX_NAME
+    timings["load_reference_reports_cold"] = measure(
+        lambda: load_reference_reports(reports_dir), repeat,
+        setup=lambda: index_path.unlink(missing_ok=True))
+    timings["load_reference_reports_warm"] = measure(lambda: load_reference_reports(reports_dir), repeat)
+
+    reports = stored_reports(reports_dir)
+    lookup = ReferenceLookup(load_reference_reports(reports_dir))
+    timings["build_analysis_context_all"] = measure(
+        lambda: [build_analysis_context(report, lookup) for report in reports], repeat)
+    timings["analysis_fingerprint_all"] = measure(
+        lambda: [analysis_fingerprint(report) for report in reports], repeat)
+
+    return {
+        "years": years,
+        "daily_rows": history.days,
+        "glitch_days": history.glitch_days,
+        "reports": len(reports),
+        "gviz_requests": len(session.requests),
+        "timings": timings,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="report_generator のベンチマーク（合成データ）")
+    parser.add_argument("--years", type=int, nargs="+", default=list(DEFAULT_YEARS),
+                        help="合成する履歴の年数（既定: 2 10 30）")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数（既定: 3）")
+    parser.add_argument("--seed", type=int, default=0, help="合成データのシード")
+    parser.add_argument("--end", help="合成データの最終日 YYYY-MM-DD（既定: 昨日）")
+    parser.add_argument("--output", help="結果 JSON の書き出し先（省略時は標準出力のみ）")
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end) if args.end else date.today() - timedelta(days=1)
+    results = []
+    for years in args.years:
+        with tempfile.TemporaryDirectory(prefix="wx-bench-") as tmp:
+            results.append(bench_history(years, max(1, args.repeat), args.seed, end, Path(tmp)))
+        print(f"{years} years done", file=sys.stderr)
+
+    payload = {
+        "benchmark": "report_pipeline",
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "end": end.isoformat(),
+        "results": results,
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
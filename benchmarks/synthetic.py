@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic Daily/Raw/Recent sheets for the benchmarks.
+
+``synthetic_history`` builds a multi-year Daily sheet with a seasonal cycle,
+multi-day outages (missing rows), blank averages and 0.0℃ sensor glitches, plus
+the minute-level Raw rows the glitch days are recomputed from.  ``StubSession``
+answers gviz requests for both sheets the way the real endpoint does (including
+``select * offset N`` for the Daily cache and the ``toDate(A)`` range queries of
+``fetch_raw_for_dates``), so ``report_generator`` runs without any network;
+``SyntheticHistory.gviz_csv`` gives the same answers to the HTTP fake in
+``fake_data_plane``.  ``synthetic_recent`` builds the minute-level Recent
+sheet ``ai_advisor`` analyses.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+DAILY_HEADER = '"Date","High","Low","Avg"'
+RAW_HEADER = '"toDate(A)","B","C"'
+RAW_ROWS_PER_DAY = 1440
+RECENT_HEADER = '"日時","気温","湿度"'
+
+OUTAGE_RATE = 0.004      # 1日あたりの欠測開始確率（数日続く）
+BLANK_AVG_RATE = 0.02    # Avg 列が空の日
+GLITCH_RATE = 0.006      # 最高/最低が 0.0℃ になる日（Raw で再計算される）
+RECENT_GAP_RATE = 0.002  # Recent の1分欠測
+RECENT_NOISE_PERIOD = 10007  # Recent のノイズ表の長さ（分）
+
+_OFFSET = re.compile(r"offset (\d+)")
+_SINGLE_DAY = re.compile(r"toDate\(A\) = date '([\d-]+)'")
+_DAY_RANGE = re.compile(r"toDate\(A\) >= date '([\d-]+)' and toDate\(A\) <= date '([\d-]+)'")
+
+
+@dataclass
+class SyntheticHistory:
+    """A generated Daily sheet (CSV lines) and the Raw rows of its glitch days."""
+
+    years: int
+    seed: int
+    daily_lines: List[str]
+    raw: Dict[date, List[Tuple[float, float]]] = field(default_factory=dict)
+
+    @property
+    def days(self) -> int:
+        return len(self.daily_lines)
+
+    @property
+    def glitch_days(self) -> int:
+        return len(self.raw)
+
+    def daily_csv(self, offset: int = 0) -> str:
+        return "\n".join([DAILY_HEADER] + self.daily_lines[offset:]) + "\n"
+
+    def raw_csv(self, query: str) -> str:
+        days = {date.fromisoformat(day) for day in _SINGLE_DAY.findall(query)}
+        for start, end in _DAY_RANGE.findall(query):
+            day, last = date.fromisoformat(start), date.fromisoformat(end)
+            while day <= last:
+                days.add(day)
+                day += timedelta(days=1)
+        lines = [RAW_HEADER]
+        for day in sorted(days & self.raw.keys()):
+            lines.extend(f'"{day.isoformat()}","{temp}","{humid}"' for temp, humid in self.raw[day])
+        return "\n".join(lines) + "\n"
+
+    def gviz_csv(self, sheet: str, query: str = "") -> str:
+        """Answer a gviz query against the Daily or Raw sheet like the real endpoint."""
+        if sheet == "Raw":
+            return self.raw_csv(query)
+        offset = _OFFSET.search(query)
+        return self.daily_csv(int(offset.group(1)) if offset else 0)
+
+
+def _seasonal_mean(day: date) -> float:
+    return 16.0 - 10.0 * math.cos((day.timetuple().tm_yday - 20) / 365.25 * 2 * math.pi)
+
+
+def _raw_day(rnd: random.Random, mean: float) -> List[Tuple[float, float]]:
+    rows = []
+    for minute in range(RAW_ROWS_PER_DAY):
+        temp = mean - 4.5 * math.cos((minute - 300) / RAW_ROWS_PER_DAY * 2 * math.pi) + rnd.gauss(0, 0.4)
+        rows.append((round(temp, 1), float(round(rnd.uniform(30, 90)))))
+    # センサー異常（気温0.0 かつ 湿度0）の行が混ざる
+    for index in rnd.sample(range(RAW_ROWS_PER_DAY), 12):
+        rows[index] = (0.0, 0.0)
+    return rows
+
+
+def synthetic_history(years: int, seed: int = 0, end: Optional[date] = None) -> SyntheticHistory:
+    """Generate ``years`` years of Daily rows ending at ``end`` (default: 2026-09-30).
+
+    The same ``(years, seed, end)`` always produces the same sheets.
+    """
+    end = end or date(2026, 9, 30)
+    rnd = random.Random(f"{years}:{seed}:{end.isoformat()}")
+    day = end - timedelta(days=round(years * 365.25) - 1)
+    lines: List[str] = []
+    raw: Dict[date, List[Tuple[float, float]]] = {}
+    while day <= end:
+        if rnd.random() < OUTAGE_RATE:
+            day += timedelta(days=rnd.randint(1, 10))
+            continue
+        mean = _seasonal_mean(day) + rnd.gauss(0, 2.0)
+        high = round(mean + 4 + rnd.uniform(-1.5, 3.0), 1)
+        low = round(mean - 4 + rnd.uniform(-3.0, 1.5), 1)
+        avg = "" if rnd.random() < BLANK_AVG_RATE else f"{round((high + low) / 2 + rnd.uniform(-0.8, 0.8), 2)}"
+        if rnd.random() < GLITCH_RATE:
+            raw[day] = _raw_day(rnd, mean)
+            if rnd.random() < 0.5:
+                low = 0.0
+            else:
+                high = 0.0
+        lines.append(f'"{day:%Y/%m/%d}","{high}","{low}","{avg}"')
+        day += timedelta(days=1)
+    return SyntheticHistory(years=years, seed=seed, daily_lines=lines, raw=raw)
+
+
+def synthetic_recent(rows: int, end: datetime, seed: int = 0) -> List[str]:
+    """``rows`` minute rows of the Recent sheet ("MM/DD HH:MM", temp, humidity) ending at ``end`` (JST).
+
+    Minutes are occasionally skipped, like the logger does on a dropped upload.
+    Noise and gaps depend only on the minute itself, so windows ending at
+    different times agree on every minute they share.
+    """
+    rnd = random.Random(f"recent:{seed}")
+    noise = [(rnd.gauss(0, 0.3), rnd.gauss(0, 2), rnd.random()) for _ in range(RECENT_NOISE_PERIOD)]
+    lines: List[str] = []
+    minute = end.replace(second=0, microsecond=0)
+    while len(lines) < rows:
+        temp_noise, humid_noise, gap = noise[int(minute.timestamp() // 60) % RECENT_NOISE_PERIOD]
+        if gap >= RECENT_GAP_RATE:
+            clock = minute.hour * 60 + minute.minute
+            temp = _seasonal_mean(minute.date()) - 4.5 * math.cos((clock - 300) / 1440 * 2 * math.pi)
+            humid = 60 + 20 * math.cos((clock - 300) / 1440 * 2 * math.pi)
+            lines.append(f'"{minute:%m/%d %H:%M}","{temp + temp_noise:.1f}","{humid + humid_noise:.0f}"')
+        minute -= timedelta(minutes=1)
+    lines.reverse()
+    return lines
+
+
+class StubResponse:
+    encoding = "utf-8"
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def iter_lines(self) -> Iterator[bytes]:
+        yield from self.text.encode("utf-8").splitlines()
+
+    def close(self) -> None:
+        pass
+
+
+class StubSession:
+    """Offline stand-in for the gviz ``requests.Session`` used by ``GvizClient``."""
+
+    def __init__(self, history: SyntheticHistory):
+        self.history = history
+        self.requests: List[Dict[str, str]] = []
+
+    def get(self, url: str, params: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            stream: bool = False) -> StubResponse:
+        params = dict(params or {})
+        self.requests.append(params)
+        return StubResponse(self.history.gviz_csv(params.get("sheet", ""), params.get("tq", "")))
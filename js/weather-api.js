@@ -339,7 +339,8 @@ async function loadAIComment() {
                 advisorSection.classList.remove('is-waiting');
                 if (data.model) advisorSection.dataset.model = data.model;
             }
-            const sourceErrors = Object.values(data.source_status || {}).filter(Boolean);
+            const sourceErrors = Object.entries(data.source_status || {})
+                .filter(([key, value]) => key.endsWith('_error') && value);
             if (sourceErrors.length > 0) statusParts.push('⚠ 一部データ取得失敗');
             document.getElementById('aiAdvisorTime').textContent = statusParts.join(' · ');
 
@@ -4,9 +4,14 @@ AI気象アドバイザー - Gemini 3.7 Flash による総合分析
 データ収集 → Gemini APIで分析 → ai_comment.json 出力
 """
 
+import csv
+import io
 import os
 import json
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from pathlib import Path
@@ -14,13 +19,15 @@ from pathlib import Path
 # JST タイムゾーン（GitHub ActionsはUTCで動くため必要）
 JST = timezone(timedelta(hours=9))
 
-# .env ファイルから環境変数を読み込み
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+import gemini_client
+import instrumentation
+from profiling import run_profiled
+from data_analysis import AnalysisState, analyze_data_comprehensive
+from daily_cache import DailySheetCache
+from gviz_client import get_client, typed_rows
 
-from google import genai
-from data_analysis import analyze_data_comprehensive
+# .env ファイルから環境変数を読み込み（ファイルがあるときだけ。Gemini SDK は初回呼び出しで読み込む）
+gemini_client.load_env()
 
 # =============================================================================
 # 設定
@@ -28,6 +35,9 @@ from data_analysis import analyze_data_comprehensive
 SPREADSHEET_ID = os.environ.get('SPREADSHEET_ID', '1nbmJIIUzw8n2PcHp98NaiKnaAVciBx_Egpokjjx7uW8')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-3.7-flash')
+# 前回実行までの分析集計（ai_comment.json と同じ場所。Actions ではキャッシュで引き継ぐ）
+ANALYSIS_STATE_PATH = Path(__file__).parent.parent / 'analysis_state.json'
+AI_COMMENT_PATH = Path(__file__).parent.parent / 'ai_comment.json'
 
 # 東京都葛飾区東金町5丁目
 LATITUDE = 35.7727
@@ -36,6 +46,17 @@ AREA_CODE = '1312200'  # 葛飾区
 JMA_WARNING_URL = "https://www.jma.go.jp/bosai/warning/data/r8/130000.json"
 JMA_FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/130000.json"
 JMA_FORECAST_AREA_CODE = '130010'  # 東京地方
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+YAHOO_PRECIP_URL = "https://yahoo-weather-proxy.miurayukimail.workers.dev"
+
+# データ収集ステージの情報源ごとの締め切り（秒）。収集開始からの経過時間で判定する。
+SOURCE_DEADLINES = {
+    'spreadsheet': 60,
+    'weather': 15,
+    'jma_forecast': 15,
+    'alerts': 15,
+    'precipitation': 15,
+}
 
 # 2026-05-29以降の気象警報・注意報コード。
 # dataTypeCode と code の組み合わせを正規キーとして扱う。
@@ -273,13 +294,14 @@ def calculate_feels_like(temp: float, humidity: float, wind_speed_10m: float) ->
 # データ取得関数
 # =============================================================================
 
-def fetch_spreadsheet_data() -> Dict[str, Any]:
+def fetch_spreadsheet_data(cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
     """
     Google Spreadsheetから温湿度データを取得（強化版）
     - 全レコードを取得（1分毎×12000件）
     - analyze_data_comprehensive で包括的分析を実行
+    - Summary / Recent / Daily は互いに独立しているため並行取得する（Daily はキャッシュから差分更新）
+    - cancelled がセットされた後は分析状態（analysis_state.json）を保存しない
     """
-    base_url = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/gviz/tq?tqx=out:csv"
     
     result = {
         'current': {},
@@ -289,17 +311,38 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
         'error': None
     }
     
+    # 取得だけを並行に行い、解析とエラー時の扱いは従来どおり Summary → Recent → Daily の順
+    # Summary / Recent はレスポンスを1行ずつ CSV として読み、本文全体を文字列で持たない
+    client = get_client(SPREADSHEET_ID)
+
+    def recent_records() -> List[Dict[str, Any]]:
+        rows = client.iter_csv('Recent', timeout=30)
+        next(rows, None)  # ヘッダースキップ
+        return [
+            {'datetime': dt, 'temperature': temperature, 'humidity': humidity}
+            for dt, temperature, humidity in typed_rows(rows, str, float, float)
+        ]
+
+    sheets = client.run_concurrently({
+        'summary': lambda: list(client.iter_csv('Summary', timeout=10)),
+        'recent': recent_records,
+        # Daily は過去行がほぼ不変なので、ローカルキャッシュから末尾だけ差分取得する
+        'daily': lambda: DailySheetCache(client).fetch_text(timeout=15),
+    })
+
+    def sheet(name: str) -> Any:
+        value = sheets[name]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
     try:
         # ========================================
         # 1. Summary シート（現在値 + 履歴統計）
         # ========================================
-        summary_url = f"{base_url}&sheet=Summary"
-        resp = requests.get(summary_url, timeout=10)
-        resp.raise_for_status()
-        
         result['summary_raw'] = []  # 生データも保存
-        for line in resp.text.strip().split('\n'):
-            parts = line.replace('"', '').split(',')
+        parse_timer = instrumentation.start('parse.summary')
+        for parts in sheet('summary'):
             if len(parts) >= 2:
                 label, value = parts[0].strip(), parts[1].strip()
                 result['summary_raw'].append({'label': label, 'value': value})
@@ -333,27 +376,13 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
                         result['current']['yesterday_low'] = float(value)
                     except (TypeError, ValueError):
                         pass
+        parse_timer.stop()
         
         # ========================================
         # 2. Recent シート（全レコード取得）
         # ========================================
-        recent_url = f"{base_url}&sheet=Recent"
-        resp = requests.get(recent_url, timeout=30)  # タイムアウト延長
-        resp.raise_for_status()
-        
-        lines = resp.text.strip().split('\n')[1:]  # ヘッダースキップ
-        all_records = []
-        for line in lines:
-            parts = line.replace('"', '').split(',')
-            if len(parts) >= 3:
-                try:
-                    all_records.append({
-                        'datetime': parts[0].strip(),
-                        'temperature': float(parts[1].strip()),
-                        'humidity': float(parts[2].strip())
-                    })
-                except ValueError:
-                    continue
+        all_records = sheet('recent')
+        instrumentation.count('recent_rows', len(all_records))
         
         print(f"  → Recentシート: {len(all_records)}件のレコードを取得")
         
@@ -363,7 +392,11 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
         if all_records:
             # 生データも保存（テスト用）
             result['raw_records'] = all_records
-            result['analysis'] = analyze_data_comprehensive(all_records)
+            analysis_state = AnalysisState(ANALYSIS_STATE_PATH, cancelled=cancelled)
+            with instrumentation.span('statistics'):
+                result['analysis'] = analyze_data_comprehensive(all_records, state=analysis_state)
+            mode, folded = analysis_state.last_update
+            print(f"  → 分析状態: {mode}（{folded}件を集計）")
             
             # 互換性のため一部データをトップレベルにも配置
             if 'daily_summary' in result['analysis']:
@@ -379,15 +412,12 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
         # 4. Daily シート（全履歴データを取得）
         # ========================================
         try:
-            daily_url = f"{base_url}&sheet=Daily"
-            resp = requests.get(daily_url, timeout=15)
-            resp.raise_for_status()
-            
-            lines = resp.text.strip().split('\n')[1:]  # ヘッダースキップ
+            parse_timer = instrumentation.start('parse.daily')
+            rows = csv.reader(io.StringIO(sheet('daily')))
+            next(rows, None)  # ヘッダースキップ
             result['daily_all'] = []  # 全履歴データ
             
-            for line in lines:
-                parts = line.replace('"', '').split(',')
+            for parts in rows:
                 if len(parts) >= 3:
                     try:
                         day = {
@@ -401,6 +431,8 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
                         result['daily_all'].append(day)
                     except ValueError:
                         continue
+            parse_timer.stop()
+            instrumentation.count('daily_rows', len(result['daily_all']))
             
             print(f"  → Dailyシート: {len(result['daily_all'])}日分のデータを取得")
             
@@ -438,7 +470,7 @@ def fetch_spreadsheet_data() -> Dict[str, Any]:
 def fetch_weather_forecast() -> Dict[str, Any]:
     """Open-Meteo APIから天気予報を取得（全パラメータ版）"""
     url = (
-        f"https://api.open-meteo.com/v1/forecast"
+        f"{OPEN_METEO_URL}"
         f"?latitude={LATITUDE}&longitude={LONGITUDE}"
         # Current: 全現在データ
         f"&current=weather_code,temperature_2m,relative_humidity_2m,dew_point_2m,apparent_temperature,"
@@ -737,7 +769,7 @@ def fetch_jma_alerts() -> Dict[str, Any]:
 
 def fetch_yahoo_precipitation() -> Dict[str, Any]:
     """Yahoo天気APIから降水量データを取得（Cloudflare Worker経由）"""
-    url = "https://yahoo-weather-proxy.miurayukimail.workers.dev"
+    url = YAHOO_PRECIP_URL
     
     result = {
         'data': [],
@@ -828,7 +860,7 @@ def weather_code_to_text(code: int) -> str:
 
 def _read_previous_advice() -> str:
     """直前の生成文を読み、同じ書き出しや話題の反復を避ける材料にする。"""
-    output_path = Path(__file__).parent.parent / 'ai_comment.json'
+    output_path = AI_COMMENT_PATH
     try:
         with output_path.open(encoding='utf-8') as f:
             advice = str(json.load(f).get('advice') or '').strip()
@@ -1152,6 +1184,7 @@ def analyze_with_gemini(
     if not GEMINI_API_KEY:
         return "⚠️ APIキーが設定されていません"
 
+    context_timer = instrumentation.start('context')
     now = datetime.now(JST)
     current_hour = now.hour
     weekday_names = ['月曜日', '火曜日', '水曜日', '木曜日', '金曜日', '土曜日', '日曜日']
@@ -1420,17 +1453,20 @@ def analyze_with_gemini(
 {json.dumps(context, ensure_ascii=False, separators=(',', ':'), default=str)}
 
 本文だけを出力し、3段落の間を空行で区切ってください。"""
+    context_timer.stop()
 
     if not has_sensor_source and not has_weather_source:
         return '⚠️ 気象データを取得できなかったため、AI分析を実行しませんでした。'
 
     try:
         print(f'  → Geminiモデル: {GEMINI_MODEL}')
-        client = genai.Client(api_key=GEMINI_API_KEY)
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=prompt,
-        )
+        client = gemini_client.get_client(GEMINI_API_KEY)
+        instrumentation.count('gemini_calls')
+        with instrumentation.span('gemini'):
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt,
+            )
         raw_advice = (response.text or '').strip()
         if not raw_advice:
             raise ValueError('空のレスポンス')
@@ -1440,6 +1476,7 @@ def analyze_with_gemini(
         return f'⚠️ 分析エラー ({GEMINI_MODEL}): {str(exc)[:160]}'
 
 
+@instrumentation.timed('write')
 def _write_json_atomic(output_path: Path, data: Dict[str, Any]) -> None:
     """一時ファイルを置換して、途中終了によるJSON破損を防ぐ。"""
     temp_path = output_path.with_suffix(output_path.suffix + '.tmp')
@@ -1450,6 +1487,85 @@ def _write_json_atomic(output_path: Path, data: Dict[str, Any]) -> None:
         os.fsync(f.fileno())
     os.replace(temp_path, output_path)
 
+# =============================================================================
+# データ収集ステージ
+# =============================================================================
+
+def _source_fetchers(cancelled: Dict[str, threading.Event]) -> Dict[str, tuple]:
+    """情報源ごとの (取得関数, 締め切り超過時に返す空の結果)。cancelled は締め切り超過時にセットされる"""
+    return {
+        'spreadsheet': (lambda: fetch_spreadsheet_data(cancelled=cancelled['spreadsheet']), {
+            'current': {}, 'analysis': {}, 'daily_detailed': [], 'weekly_trend': {},
+        }),
+        'weather': (fetch_weather_forecast, {'current': {}, 'hourly_forecast': [], 'daily': {}}),
+        'jma_forecast': (fetch_jma_forecast, {
+            'report_datetime': None, 'weather': None, 'weather_code': None,
+            'precipitation_probability_periods': [],
+        }),
+        'alerts': (fetch_jma_alerts, {
+            'alerts': [], 'special_warnings': [], 'warnings': [], 'advisories': [], 'transitions': [],
+        }),
+        'precipitation': (fetch_yahoo_precipitation, {
+            'data': [], 'current_rainfall': 0, 'is_raining': False, 'consecutive_minutes': 0,
+        }),
+    }
+
+
+def collect_sources(deadlines: Optional[Dict[str, float]] = None) -> tuple:
+    """
+    5つの情報源を並行取得する。
+
+    各取得関数は従来どおり 'error' キー付きの辞書を返す。締め切りまでに応答しない
+    情報源は同じ形の空結果に error を入れて扱い、他の情報源の待ち時間には影響させない。
+
+    実行中のスレッドは止められないため、締め切りを過ぎた取得も各リクエストのタイムアウト
+    まで動き続け、プロセス終了時にはその完了を待つ。その間の副作用は次のとおり:
+    - スプレッドシートは締め切り超過時に cancelled をセットし、分析状態
+      （analysis_state.json）を保存しない。保存を始めていた場合だけはそのまま完了する
+      （置き換えは原子的で、内容は取得したデータどおり）
+    - Daily シートのローカルキャッシュは遅れても書き込まれる（シートの内容そのものなので
+      次回の差分取得にそのまま使える）
+    - 結果は捨てられ、今回の出力には使われない
+
+    Returns:
+        (結果 {情報源: 辞書}, 所要時間 {情報源: ミリ秒})
+    """
+    deadlines = {**SOURCE_DEADLINES, **(deadlines or {})}
+    cancelled = {name: threading.Event() for name in deadlines}
+    fetchers = _source_fetchers(cancelled)
+    latency_ms: Dict[str, int] = {}
+
+    def timed(name: str, fetch) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            return fetch()
+        finally:
+            elapsed = time.monotonic() - started
+            latency_ms[name] = round(elapsed * 1000)
+            instrumentation.metrics.add(f'fetch.{name}', elapsed)
+
+    stage_started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=len(fetchers))
+    futures = {name: executor.submit(timed, name, fetch) for name, (fetch, _) in fetchers.items()}
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, future in futures.items():
+        empty = fetchers[name][1]
+        remaining = deadlines[name] - (time.monotonic() - stage_started)
+        try:
+            results[name] = future.result(timeout=max(0.0, remaining))
+        except FuturesTimeout:
+            cancelled[name].set()
+            results[name] = {**empty, 'error': f"timeout: {deadlines[name]}秒以内に応答なし"}
+        except Exception as e:
+            results[name] = {**empty, 'error': str(e)}
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    latencies = {
+        name: latency_ms.get(name, round(deadlines[name] * 1000)) for name in fetchers
+    }
+    return results, latencies
+
+
 # =============================================================================
 # メイン処理
 # =============================================================================
@@ -1458,30 +1574,25 @@ def main():
     """メイン処理"""
     print(f"[{datetime.now(JST).isoformat()}] AI気象アドバイザー 開始")
     
-    # 1. データ収集
-    print("  → スプレッドシートからデータ取得中...")
-    spreadsheet_data = fetch_spreadsheet_data()
+    # 1. データ収集（5つの情報源を並行取得）
+    print("  → スプレッドシート・天気予報・気象庁予報・警報・Yahoo降水を並行取得中...")
+    sources, latency_ms = collect_sources()
+    spreadsheet_data = sources['spreadsheet']
+    weather_data = sources['weather']
+    jma_forecast = sources['jma_forecast']
+    alerts_data = sources['alerts']
+    precip_data = sources['precipitation']
+    print("  → 取得時間: " + ", ".join(f"{name} {ms}ms" for name, ms in latency_ms.items()))
+
     if spreadsheet_data.get('error'):
         print(f"  [WARN] スプレッドシートエラー: {spreadsheet_data['error']}")
-    
-    print("  → 天気予報を取得中...")
-    weather_data = fetch_weather_forecast()
     if weather_data.get('error'):
         print(f"  [WARN] 天気APIエラー: {weather_data['error']}")
-
-    print("  → 気象庁の東京地方予報を取得中...")
-    jma_forecast = fetch_jma_forecast()
     weather_data['jma_forecast'] = jma_forecast
     if jma_forecast.get('error'):
         print(f"  [WARN] 気象庁予報エラー: {jma_forecast['error']}")
-    
-    print("  → 警報情報を取得中...")
-    alerts_data = fetch_jma_alerts()
     if alerts_data.get('error'):
         print(f"  [WARN] 警報APIエラー: {alerts_data['error']}")
-    
-    print("  → Yahoo降水データを取得中...")
-    precip_data = fetch_yahoo_precipitation()
     if precip_data.get('error'):
         print(f"  [WARN] Yahoo降水APIエラー: {precip_data['error']}")
     
@@ -1505,6 +1616,7 @@ def main():
             'jma_forecast_error': jma_forecast.get('error'),
             'jma_error': alerts_data.get('error'),
             'rain_nowcast_error': precip_data.get('error'),
+            'latency_ms': latency_ms,
         },
         'data_summary': {
             'outdoor_temp': spreadsheet_data.get('current', {}).get('temperature'),
@@ -1513,8 +1625,11 @@ def main():
             'alerts_count': len(alerts_data.get('alerts', []))
         }
     }
+    # WX_METRICS 有効時のみ、ステージ別の所要時間（秒）を添える
+    if instrumentation.enabled():
+        output['timings'] = instrumentation.metrics.timings()
     
-    output_path = Path(__file__).parent.parent / 'ai_comment.json'
+    output_path = AI_COMMENT_PATH
     _write_json_atomic(output_path, output)
     
     print(f"[{datetime.now(JST).isoformat()}] 完了 → ai_comment.json に保存")
@@ -1566,7 +1681,7 @@ def demo_with_fake_alerts():
         }
     }
     
-    output_path = Path(__file__).parent.parent / 'ai_comment.json'
+    output_path = AI_COMMENT_PATH
     _write_json_atomic(output_path, output)
     
     print(f"[{datetime.now(JST).isoformat()}] デモ完了 → ai_comment.json に保存")
@@ -1574,7 +1689,17 @@ def demo_with_fake_alerts():
 
 if __name__ == '__main__':
     import sys
-    if len(sys.argv) > 1 and sys.argv[1] == '--demo':
-        demo_with_fake_alerts()
-    else:
-        main()
+
+    def entry():
+        # --profile は run_profiled が取り除いてから呼ぶ
+        if len(sys.argv) > 1 and sys.argv[1] == '--demo':
+            demo_with_fake_alerts()
+        else:
+            main()
+
+    try:
+        run_profiled(entry, 'ai_advisor')
+    finally:
+        instrumentation.write_run_metrics('ai_advisor', extra={
+            'gviz': get_client(SPREADSHEET_ID).timing_summary(),
+        })
@@ -12,13 +12,17 @@ from report_analysis import (
     ANALYSIS_PROTOCOL_VERSION,
     JST,
     VALID_ANALYSIS_KEYS,
+    ReferenceIndex,
+    ReferenceLookup,
+    Report,
     analysis_fingerprint,
     apply_analysis,
     enrich_analysis_context,
     generate_evidence_analysis,
-    load_reference_reports,
+    invalidate_fingerprint,
     mark_report_as_draft,
 )
+from profiling import run_profiled
 
 
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -29,10 +33,13 @@ def backfill(replace_all: bool = False) -> int:
     generated_at = datetime.now(JST).isoformat()
     updated = 0
     drafts = 0
-    reference_reports = load_reference_reports(REPORTS_ROOT)
+    # 参照索引は1回だけ読み、書き換えたファイルの反映はメモリ上で行って最後に書き出す
+    reference_index = ReferenceIndex(REPORTS_ROOT)
+    reference_reports = ReferenceLookup(reference_index.load())
     for report_type in ("weekly", "monthly"):
         for path in sorted((REPORTS_ROOT / report_type).glob("*.json")):
-            report = json.loads(path.read_text(encoding="utf-8"))
+            # 再検証・分析・暫定化で同じレポートの指紋を繰り返し取るため、セクションの JSON を保持する
+            report = Report(json.loads(path.read_text(encoding="utf-8")))
             existing_meta = report.get("analysis_meta", {})
             if (
                 not replace_all
@@ -56,6 +63,7 @@ def backfill(replace_all: bool = False) -> int:
                         json.dumps(report, ensure_ascii=False, indent=2) + "\n",
                         encoding="utf-8",
                     )
+                    reference_index.record(path, report)
                     drafts += 1
                 continue
 
@@ -66,12 +74,15 @@ def backfill(replace_all: bool = False) -> int:
                 if section_name not in VALID_ANALYSIS_KEYS and isinstance(section, dict):
                     if not str(section.get("ai_comment") or "").strip():
                         section.pop("ai_comment", None)
+                        invalidate_fingerprint(report, section_name)
             path.write_text(
                 json.dumps(report, ensure_ascii=False, indent=2) + "\n",
                 encoding="utf-8",
             )
+            reference_index.record(path, report)
             updated += 1
 
+    reference_index.flush()
     print(f"履歴分析を更新: {updated}件（進行中週の暫定表示: {drafts}件）")
     return updated
 
@@ -88,4 +99,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    run_profiled(main, "backfill_codex_analysis")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Month × year climatology cells of the Daily history, persisted between runs.
+
+Several report sections are "the same month across years": the heatmap (mean
+of ``avg``, highest ``high`` and lowest ``low`` per month of every year), the
+monthly baseline (the same month over the previous nine years), and the month
+normal behind ``same_month_historical_avg``.  ``Climatology`` aggregates every
+month of every year once into a cell holding the row count and, per column,
+the count, exact sum, minimum and maximum of the non-missing values.  Means over
+any set of cells are then a handful of integer additions.
+
+Sums are integers scaled by ``2 ** scale_bits`` (floats are dyadic rationals),
+so a mean over cells equals ``statistics.mean`` of the same values bit for bit,
+and min/max keep the first of equal values like ``min()``/``max()`` do.
+
+``Climatology.cached`` keeps the cube in ``$WX_CACHE_DIR/climatology.json``
+with a digest of every year's rows: a run re-aggregates only the years whose
+rows changed (normally just the current one) and rewrites the file only then.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from daily_series import COLUMNS, DailySeries
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache"
+CLIMATOLOGY_FILE = "climatology.json"
+CLIMATOLOGY_VERSION = 1
+
+# セル内の列ごとの集計: [件数, 和（2**scale_bits 倍の整数）, 最小, 最大]
+N, SUM, MIN, MAX = range(4)
+
+
+def default_climatology_path() -> Path:
+    """``$WX_CACHE_DIR/climatology.json`` (``.cache/`` under the project by default)."""
+    return Path(os.environ.get("WX_CACHE_DIR") or DEFAULT_CACHE_DIR) / CLIMATOLOGY_FILE
+
+
+def _year_digest(series: DailySeries, lo: int, hi: int) -> str:
+    digest = hashlib.blake2b(series.ordinals[lo:hi].tobytes(), digest_size=16)
+    for name in COLUMNS:
+        digest.update(getattr(series, name)[lo:hi].tobytes())
+    return digest.hexdigest()
+
+
+class Climatology:
+    """Per (year, month) cells: ``{"days": rows, column: [n, sum, min, max]}``."""
+
+    def __init__(self, scale_bits: int = 0):
+        self.scale_bits = scale_bits
+        self.digests: Dict[int, str] = {}
+        self.cells: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    @classmethod
+    def from_series(cls, series: DailySeries) -> "Climatology":
+        climatology = cls()
+        climatology.sync(series)
+        return climatology
+
+    @classmethod
+    def cached(cls, series: DailySeries, path: Optional[Path] = None) -> "Climatology":
+        """Load the persisted cube, bring it up to date with ``series`` and save it if it changed."""
+        path = Path(path) if path else default_climatology_path()
+        climatology = cls.load(path)
+        changed = climatology.sync(series)
+        if changed:
+            climatology.save(path)
+        print(f"  → 気候値キャッシュ: {len(changed)}/{len(climatology.digests)} 年を再集計")
+        return climatology
+
+    @classmethod
+    def load(cls, path: Path) -> "Climatology":
+        """Read a saved cube; a missing, unreadable or outdated file gives an empty one."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != CLIMATOLOGY_VERSION:
+            return cls()
+        climatology = cls(int(data["scale_bits"]))
+        for year, entry in data["years"].items():
+            climatology.digests[int(year)] = entry["digest"]
+            for month, cell in entry["months"].items():
+                climatology.cells[(int(year), int(month))] = cell
+        return climatology
+
+    def save(self, path: Path) -> None:
+        years: Dict[str, Dict[str, Any]] = {}
+        for year, digest in sorted(self.digests.items()):
+            years[str(year)] = {"digest": digest, "months": {}}
+        for (year, month), cell in sorted(self.cells.items()):
+            years[str(year)]["months"][str(month)] = cell
+        payload = {"version": CLIMATOLOGY_VERSION, "scale_bits": self.scale_bits, "years": years}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def sync(self, series: DailySeries) -> List[int]:
+        """Re-aggregate the years whose rows differ from the last sync; return them."""
+        changed = []
+        present = set()
+        for year, lo, hi in series.year_ranges():
+            present.add(year)
+            digest = _year_digest(series, lo, hi)
+            if self.digests.get(year) != digest:
+                self._aggregate_year(series, year, lo, hi)
+                self.digests[year] = digest
+                changed.append(year)
+        for year in set(self.digests) - present:
+            del self.digests[year]
+            changed.append(year)
+        if changed:
+            self.cells = {key: cell for key, cell in self.cells.items() if key[0] in self.digests}
+        return changed
+
+    def _aggregate_year(self, series: DailySeries, year: int, lo: int, hi: int) -> None:
+        for key in [key for key in self.cells if key[0] == year]:
+            del self.cells[key]
+        bits = max((value.as_integer_ratio()[1].bit_length() - 1 for name in COLUMNS
+                    for value in getattr(series, name)[lo:hi] if value == value), default=0)
+        if bits > self.scale_bits:
+            self._rescale(bits)
+        for _, month, m_lo, m_hi in series.month_ranges(lo, hi):
+            cell: Dict[str, Any] = {"days": m_hi - m_lo}
+            for name in COLUMNS:
+                values = series.values(name, m_lo, m_hi)
+                total = 0
+                for value in values:
+                    num, den = value.as_integer_ratio()
+                    total += num << (self.scale_bits - den.bit_length() + 1)
+                cell[name] = [len(values), total, min(values), max(values)] if values else [0, 0, None, None]
+            self.cells[(year, month)] = cell
+
+    def _rescale(self, bits: int) -> None:
+        shift = bits - self.scale_bits
+        for cell in self.cells.values():
+            for name in COLUMNS:
+                cell[name][SUM] <<= shift
+        self.scale_bits = bits
+
+    def cell(self, year: int, month: int) -> Optional[Dict[str, Any]]:
+        return self.cells.get((year, month))
+
+    def days(self, year: int, month: int) -> int:
+        """Rows observed in that month (including rows with missing values)."""
+        cell = self.cells.get((year, month))
+        return cell["days"] if cell else 0
+
+    def max(self, name: str, year: int, month: int) -> Optional[float]:
+        cell = self.cells.get((year, month))
+        return cell[name][MAX] if cell else None
+
+    def min(self, name: str, year: int, month: int) -> Optional[float]:
+        cell = self.cells.get((year, month))
+        return cell[name][MIN] if cell else None
+
+    def mean(self, name: str, keys: Iterable[Tuple[int, int]]) -> Optional[float]:
+        """Mean of ``name`` over the values of all the given (year, month) cells."""
+        count = total = 0
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell:
+                count += cell[name][N]
+                total += cell[name][SUM]
+        if not count:
+            return None
+        return total / (count << self.scale_bits)
+
+    def month_normals(self, name: str = "avg") -> Dict[int, float]:
+        """Month → mean of ``name`` over that month in every year."""
+        by_month: Dict[int, List[Tuple[int, int]]] = {}
+        for year, month in sorted(self.cells):
+            by_month.setdefault(month, []).append((year, month))
+        normals = {}
+        for month, keys in by_month.items():
+            mean = self.mean(name, keys)
+            if mean is not None:
+                normals[month] = mean
+        return normals
+
+    def years(self) -> List[int]:
+        return sorted(self.digests)
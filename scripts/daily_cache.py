@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""On-disk SQLite cache of the Daily sheet with delta refresh.
+
+The Daily sheet only ever grows at the bottom; earlier rows change only through
+rare manual corrections.  ``DailySheetCache`` keeps the sheet's CSV lines in
+SQLite and, on refresh, asks gviz for the rows from ``len(cache) - overlap``
+onwards only.  If the overlapping rows no longer match the cache, or the last
+full download is older than ``verify_every``, it downloads the whole sheet again.
+Callers get the same CSV text a full download would return, so their parsing is
+unchanged, and a failed refresh falls back to the cached snapshot.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from gviz_client import GvizClient
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache"
+DAILY_CACHE_FILE = "daily_sheet.sqlite3"
+DAILY_OVERLAP_ROWS = 14
+DAILY_VERIFY_EVERY = timedelta(days=7)
+
+
+def default_cache_path() -> Path:
+    """``$WX_CACHE_DIR/daily_sheet.sqlite3`` (``.cache/`` under the project by default)."""
+    return Path(os.environ.get("WX_CACHE_DIR") or DEFAULT_CACHE_DIR) / DAILY_CACHE_FILE
+
+
+class DailySheetCache:
+    """Serve the Daily sheet CSV from SQLite, downloading only the tail."""
+
+    def __init__(self, client: GvizClient, path: Optional[Path] = None,
+                 overlap_rows: int = DAILY_OVERLAP_ROWS,
+                 verify_every: timedelta = DAILY_VERIFY_EVERY):
+        self.client = client
+        self.path = Path(path) if path else default_cache_path()
+        self.overlap_rows = max(1, overlap_rows)
+        self.verify_every = verify_every
+        # 直近の取得方法（'full' / 'delta' / 'cached'）と取得行数。ログ用。
+        self.last_refresh: Tuple[str, int] = ("", 0)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS rows (idx INTEGER PRIMARY KEY, line TEXT NOT NULL)")
+        return conn
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _full_due(self, conn: sqlite3.Connection, cached: List[str]) -> bool:
+        if not cached or self._meta(conn, "source") != self.client.url:
+            return True
+        verified = self._meta(conn, "verified_at")
+        try:
+            return datetime.now(timezone.utc) - datetime.fromisoformat(verified) >= self.verify_every
+        except (TypeError, ValueError):
+            return True
+
+    def _store(self, conn: sqlite3.Connection, header: str, rows: List[str], start: int,
+               verified: bool) -> None:
+        with conn:
+            conn.execute("DELETE FROM rows WHERE idx >= ?", (start,))
+            conn.executemany("INSERT INTO rows (idx, line) VALUES (?, ?)",
+                             ((start + i, line) for i, line in enumerate(rows[start:])))
+            meta = {"header": header, "source": self.client.url}
+            if verified:
+                meta["verified_at"] = datetime.now(timezone.utc).isoformat()
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+
+    def fetch_text(self, timeout: float = 30) -> str:
+        """Return the Daily sheet as CSV text (header line first), refreshing the cache."""
+        conn = self._connect()
+        try:
+            header = self._meta(conn, "header")
+            cached = [line for (line,) in conn.execute("SELECT line FROM rows ORDER BY idx")]
+            try:
+                if not self._full_due(conn, cached):
+                    start = max(0, len(cached) - self.overlap_rows)
+                    text = self.client.fetch_csv("Daily", f"select * offset {start}", timeout)
+                    lines = text.strip().split("\n")
+                    tail = lines[1:]
+                    # 重なり部分が一致しなければ過去行が修正されている → 全件取り直し
+                    if lines[0] == header and tail[:len(cached) - start] == cached[start:]:
+                        rows = cached[:start] + tail
+                        self._store(conn, header, rows, start, verified=False)
+                        self.last_refresh = ("delta", len(tail))
+                        return "\n".join([header] + rows)
+                lines = self.client.fetch_csv("Daily", timeout=timeout).strip().split("\n")
+                self._store(conn, lines[0], lines[1:], 0, verified=True)
+                self.last_refresh = ("full", len(lines) - 1)
+                return "\n".join(lines)
+            except Exception as e:
+                if not cached or header is None:
+                    raise
+                print(f"  [WARN] Dailyシート取得失敗、ローカルキャッシュ（{len(cached)}行）を使用: {e}")
+                self.last_refresh = ("cached", 0)
+                return "\n".join([header] + cached)
+        finally:
+            conn.close()
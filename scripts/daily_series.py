@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Date-indexed columnar view of the Daily sheet history.
+
+``fetch_daily_data`` returns one ``DailyRecord`` per observed day, and report
+generation asks that history many questions per report: period slices, yearly and
+monthly groups, history-wide extremes.  ``DailySeries`` keeps the rows in date
+order and mirrors the numeric fields in parallel ``array('d')`` columns with NaN
+for missing values, so a date-range lookup is a bisect on day ordinals.
+
+``DailyRecord`` is a slotted row that carries its parsed ``day`` alongside the
+date string, so a row's date is parsed exactly once; slices of the series are
+shared rows, never copies.  It also reads like the dict rows it replaces
+(``r['high']``, ``r.get('avg')``) and converts back with ``to_dict``.
+``range_stats`` answers mean/stdev/max/min over row ranges of those columns
+(see ``range_stats``).
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from range_stats import RangeStats
+
+
+COLUMNS = ("high", "low", "avg", "range")
+MISSING = math.nan
+
+
+def parse_date(date_str: str) -> Optional[date]:
+    """日付文字列をdateオブジェクトに変換（複数フォーマット対応）"""
+    for fmt in ('%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _column_value(value: Any) -> float:
+    return float(value) if value is not None else MISSING
+
+
+class DailyRecord:
+    """One Daily row: the date as written in the sheet, its parsed ``day`` and the temperatures."""
+
+    __slots__ = ("date", "day", "high", "low", "avg", "range")
+
+    FIELDS = ("date", "high", "low", "avg", "range")
+
+    def __init__(self, date_str: str, high: Optional[float] = None, low: Optional[float] = None,
+                 avg: Optional[float] = None, range: Optional[float] = None, day: Optional[date] = None):
+        self.date = date_str
+        self.day = day if day is not None else parse_date(date_str)
+        self.high = high
+        self.low = low
+        self.avg = avg
+        self.range = range
+
+    @classmethod
+    def from_row(cls, row: Any) -> "DailyRecord":
+        """Return ``row`` as a record, converting plain ``{'date': ..., 'high': ...}`` dicts."""
+        if isinstance(row, cls):
+            return row
+        return cls(row['date'], row.get('high'), row.get('low'), row.get('avg'), row.get('range'))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"DailyRecord({self.date!r}, high={self.high!r}, low={self.low!r}, avg={self.avg!r}, range={self.range!r})"
+
+
+class DailySeries:
+    """Daily rows sorted by date with parallel numeric columns.
+
+    ``records`` holds the rows as ``DailyRecord`` (rows whose date cannot be parsed
+    are dropped), ``dates``/``ordinals`` hold the parsed day of each row, and
+    ``high``/``low``/``avg``/``range`` are ``array('d')`` columns aligned with them.
+    """
+
+    __slots__ = ("records", "dates", "ordinals", "high", "low", "avg", "range", "_range_stats")
+
+    def __init__(self, records: Sequence[Any]):
+        rows = [row for row in map(DailyRecord.from_row, records) if row.day]
+        # 同日の重複行はシート上の順序を保つ（安定ソート）
+        rows.sort(key=attrgetter('day'))
+        self.records: List[DailyRecord] = rows
+        self.dates: List[date] = [row.day for row in rows]
+        self.ordinals = array('l', (day.toordinal() for day in self.dates))
+        for name in COLUMNS:
+            setattr(self, name, array('d', (_column_value(getattr(row, name)) for row in rows)))
+        self._range_stats: Optional[RangeStats] = None
+
+    @classmethod
+    def ensure(cls, records: Any) -> "DailySeries":
+        """Return ``records`` as a series, building one only for plain row lists."""
+        return records if isinstance(records, cls) else cls(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[DailyRecord]:
+        return iter(self.records)
+
+    @property
+    def first_date(self) -> Optional[date]:
+        return self.dates[0] if self.dates else None
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.dates[-1] if self.dates else None
+
+    @property
+    def range_stats(self) -> RangeStats:
+        """Prefix-sum / sparse-table statistics over the columns (built on first use)."""
+        if self._range_stats is None:
+            self._range_stats = RangeStats({name: getattr(self, name) for name in COLUMNS})
+        return self._range_stats
+
+    def index_range(self, start: date, end: date) -> Tuple[int, int]:
+        """Half-open row index range covering ``start``..``end`` inclusive."""
+        lo = bisect_left(self.ordinals, start.toordinal())
+        hi = bisect_right(self.ordinals, end.toordinal(), lo)
+        return lo, hi
+
+    def between(self, start: date, end: date) -> List[DailyRecord]:
+        lo, hi = self.index_range(start, end)
+        return self.records[lo:hi]
+
+    def values(self, name: str, lo: int = 0, hi: Optional[int] = None) -> List[float]:
+        """Non-missing values of one column within a row index range."""
+        column = getattr(self, name)
+        return [value for value in column[lo:hi] if value == value]
+
+    def max(self, name: str) -> Optional[float]:
+        values = self.values(name)
+        return max(values) if values else None
+
+    def min(self, name: str) -> Optional[float]:
+        values = self.values(name)
+        return min(values) if values else None
+
+    def year_ranges(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(year, lo, hi)`` for each calendar year present."""
+        lo = 0
+        while lo < len(self.dates):
+            year = self.dates[lo].year
+            hi = bisect_left(self.ordinals, date(year + 1, 1, 1).toordinal(), lo)
+            yield year, lo, hi
+            lo = hi
+
+    def month_ranges(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[int, int, int, int]]:
+        """Yield ``(year, month, lo, hi)`` for each calendar month present (within rows ``lo:hi``)."""
+        end = len(self.dates) if hi is None else hi
+        while lo < end:
+            first = self.dates[lo]
+            following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+            month_end = bisect_left(self.ordinals, following.toordinal(), lo, end)
+            yield first.year, first.month, lo, month_end
+            lo = month_end
@@ -4,99 +4,219 @@ Enhanced Data Analysis Module for AI Weather Advisor
 階層型データ取得 + 包括的事前分析
 """
 
+import json
 import math
+import os
+import re
 import statistics
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, List, Optional
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import requests
 
+from rank_index import RankIndex
+
+try:
+    import numpy as np
+except ImportError:  # NumPy は任意依存。無い環境では純Python実装で同じ結果を出す
+    np = None
+
 # JST タイムゾーン
 JST = timezone(timedelta(hours=9))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+JST_OFFSET_MINUTES = 9 * 60
+
+# Recent シートの時刻列（"12/23 18:30"、ゼロ埋めなしも許容）
+RECENT_TIME_PATTERN = re.compile(r'\s*(\d{1,2})/(\d{1,2})\s+(\d{1,2}):(\d{2})')
 
+# 加算順序の違いで丸めが変わりうる値（平均・標準偏差・回帰予測）は、丸め境界から
+# この相対距離以内に入ったときだけ純Python実装と同じ計算でやり直す
+ROUNDING_GUARD = 1e-9
 
-def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
+
+class RecentTimeParser:
     """
-    生データから包括的な分析を実行
-    
-    Parameters:
-        all_records: 全レコード（1分毎、最大12000件）
-                     各レコード: {'datetime': str, 'temperature': float, 'humidity': float}
-    
-    Returns:
-        統計、トレンド、パターン、異常検知などの分析結果
+    Recent シートの "MM/DD HH:MM"（JST）を UNIX 分（整数）に変換する
+
+    年は基準時刻 now に最も近い年を選ぶので、年末年始をまたぐデータや
+    シート側の時計が少し進んでいる場合（12/31 に "01/01 00:01"）も正しく並ぶ。
+    (月, 日) → 通算日の変換はインスタンス内でメモ化する。
     """
-    if not all_records:
-        return {'error': 'No data available'}
-    
-    now = datetime.now(JST)
-    
-    # ========================================
-    # 1. データの時間軸による分類
-    # ========================================
-    
-    # 時刻文字列をdatetimeに変換
-    def parse_datetime(dt_str: str) -> Optional[datetime]:
-        try:
-            # 形式: "12/23 18:30" など
-            parts = dt_str.strip().split(' ')
-            if len(parts) >= 2:
-                date_part = parts[0]  # 12/23
-                time_part = parts[1]  # 18:30
-                month, day = map(int, date_part.split('/'))
-                hour, minute = map(int, time_part.split(':'))
-                year = now.year if month <= now.month else now.year - 1
-                return datetime(year, month, day, hour, minute, tzinfo=JST)
-        except:
-            return None
-        return None
-    
-    # 全レコードに解析済み時刻を追加
-    for r in all_records:
-        r['parsed_dt'] = parse_datetime(r.get('datetime', ''))
-    
-    # 有効なレコードかつセンサー異常（気温0.0かつ湿度0.0）でないものをフィルタ
-    valid_records = []
-    for r in all_records:
-        if r['parsed_dt'] is not None:
+
+    def __init__(self, now: datetime):
+        self.today = now.astimezone(JST).date()
+        self._days: Dict[Tuple[int, int], Optional[int]] = {}
+        # "MM/DD" → その日 0:00 JST の UNIX 分（定形の時刻文字列用）
+        self._day_starts: Dict[str, Optional[int]] = {}
+
+    def epoch_day(self, month: int, day: int) -> Optional[int]:
+        """(月, 日) の UNIX 通算日。どの候補年にも存在しない日付は None"""
+        key = (month, day)
+        if key in self._days:
+            return self._days[key]
+        candidates = []
+        for year in (self.today.year - 1, self.today.year, self.today.year + 1):
             try:
-                temp = float(r.get('temperature', 0.0))
-                humid = float(r.get('humidity', 0.0))
-                if temp == 0.0 and humid == 0.0:
-                    continue  # 異常データを除外
-                valid_records.append(r)
-            except (ValueError, TypeError):
+                candidates.append(date(year, month, day))
+            except ValueError:
                 continue
+        nearest = min(candidates, key=lambda d: abs(d.toordinal() - self.today.toordinal()), default=None)
+        value = nearest.toordinal() - EPOCH_ORDINAL if nearest else None
+        self._days[key] = value
+        return value
+
+    def __call__(self, text: Any) -> Optional[int]:
+        # 定形 "MM/DD HH:MM" はスライスだけで変換する
+        if isinstance(text, str) and len(text) == 11 and text[5] == ' ' and text[8] == ':':
+            prefix = text[:5]
+            start = self._day_starts.get(prefix, False)
+            if start is False:
+                start = self._day_starts[prefix] = self._day_start(prefix)
+            hour, minute = text[6:8], text[9:11]
+            if start is not None and hour.isdecimal() and minute.isdecimal() and hour < '24' and minute < '60':
+                return start + int(hour) * 60 + int(minute)
+        return self._parse(text)
+
+    def _day_start(self, prefix: str) -> Optional[int]:
+        match = RECENT_TIME_PATTERN.match(prefix + ' 00:00')
+        epoch_day = self.epoch_day(int(match.group(1)), int(match.group(2))) if match else None
+        return None if epoch_day is None else epoch_day * 1440 - JST_OFFSET_MINUTES
+
+    def _parse(self, text: Any) -> Optional[int]:
+        match = RECENT_TIME_PATTERN.match(text) if isinstance(text, str) else None
+        if not match:
+            return None
+        month, day, hour, minute = map(int, match.groups())
+        if hour > 23 or minute > 59:
+            return None
+        epoch_day = self.epoch_day(month, day)
+        if epoch_day is None:
+            return None
+        return epoch_day * 1440 + hour * 60 + minute - JST_OFFSET_MINUTES
+
+
+def _ceil_epoch_minutes(moment: datetime) -> int:
+    """moment 以降で最初の整数分（UNIX分）。整数分の時刻と厳密に比較するため"""
+    micros = (moment - EPOCH) // timedelta(microseconds=1)
+    return -(-micros // 60_000_000)
+
+
+def _local_hour(epoch_minute: int) -> int:
+    return (epoch_minute + JST_OFFSET_MINUTES) // 60 % 24
+
+
+def _local_day(epoch_minute: int) -> int:
+    return (epoch_minute + JST_OFFSET_MINUTES) // 1440
+
+
+@lru_cache(maxsize=64)
+def _day_label(local_day: int) -> str:
+    """JST の UNIX 通算日 → '%m/%d'（出力に出る数日分だけ日付を組み立てる）"""
+    return date.fromordinal(local_day + EPOCH_ORDINAL).strftime('%m/%d')
+
+
+def detect_window_changes(times: Sequence[Any], values: Sequence[float], window: Any,
+                          threshold: float, keep: int = 3,
+                          tolerance: Optional[Any] = None) -> List[Tuple[int, int, float]]:
+    """
+    時刻付き系列から「window 前と比べて threshold 以上変化した点」を1パスで検出する
+
+    times は昇順（datetime でも数値でもよい。window / tolerance は同じ単位）。
+    各点 i の比較相手は時刻 times[i] - window 以前で最も新しい点 j で、2本の
+    ポインタを進めるだけなので O(n)。欠測で j が times[i] - window - tolerance
+    より古くなる場合は比較しない。ヒットは直近 keep 件だけを保持する。
+
+    Returns:
+        [(i, j, values[i] - values[j]), ...] 古い順、最大 keep 件
+    """
+    if tolerance is None:
+        tolerance = window * 0
+    hits: deque = deque(maxlen=keep)
+    j = 0
+    for i in range(len(times)):
+        target = times[i] - window
+        if times[0] > target:
+            continue
+        while j + 1 < i and times[j + 1] <= target:
+            j += 1
+        if times[j] < target - tolerance:
+            continue
+        change = values[i] - values[j]
+        if abs(change) >= threshold:
+            hits.append((i, j, change))
+    return list(hits)
+
+
+def _linear_projection(temps: Sequence[float], ahead: int = 60) -> Optional[float]:
+    """1分毎の系列に最小二乗直線を当て、末尾から ahead 分後の値を返す"""
+    n = len(temps)
+    x_mean = (n - 1) / 2
+    y_mean = sum(temps) / n
+
+    numerator = sum((i - x_mean) * (temps[i] - y_mean) for i in range(n))
+    denominator = sum((i - x_mean) ** 2 for i in range(n))
+
+    if denominator <= 0:
+        return None
+    slope = numerator / denominator  # per minute
+    intercept = y_mean - slope * x_mean
+    return slope * (n + ahead) + intercept
+
+
+def _python_trends(valid_records: List[Dict], now: datetime) -> Dict[str, Any]:
+    """直近1〜3時間のトレンド（純Python実装。時刻順の有効レコードを受け取る）"""
+    trends: Dict[str, Any] = {}
     
-    valid_records.sort(key=lambda x: x['parsed_dt'])
-    
-    if not valid_records:
-        return {'error': 'No valid timestamped data'}
-    
-    # 階層分類
-    six_hours_ago = now - timedelta(hours=6)
-    twenty_four_hours_ago = now - timedelta(hours=24)
-    seven_days_ago = now - timedelta(days=7)
-    
-    # 直近6時間（1分毎）
-    recent_6h = [r for r in valid_records if r['parsed_dt'] >= six_hours_ago]
-    
-    # 6-24時間前（5分毎にサンプリング）
-    range_6_24h = [r for r in valid_records if six_hours_ago > r['parsed_dt'] >= twenty_four_hours_ago]
-    sampled_6_24h = range_6_24h[::5]  # 5件に1件
+    # 直近1時間の変化速度
+    one_hour_ago = _ceil_epoch_minutes(now - timedelta(hours=1))
+    recent_1h = [r for r in valid_records if r['epoch_minute'] >= one_hour_ago]
+    if len(recent_1h) >= 2:
+        temp_change_1h = recent_1h[-1]['temperature'] - recent_1h[0]['temperature']
+        trends['change_rate_1h'] = round(temp_change_1h, 2)  # °C/hour
     
-    # 1-7日前（30分毎にサンプリング）
-    range_1_7d = [r for r in valid_records if twenty_four_hours_ago > r['parsed_dt'] >= seven_days_ago]
-    sampled_1_7d = range_1_7d[::30]  # 30件に1件
+    # 直近3時間の変化
+    three_hours_ago = _ceil_epoch_minutes(now - timedelta(hours=3))
+    recent_3h = [r for r in valid_records if r['epoch_minute'] >= three_hours_ago]
+    if len(recent_3h) >= 2:
+        temp_change_3h = recent_3h[-1]['temperature'] - recent_3h[0]['temperature']
+        trends['change_rate_3h'] = round(temp_change_3h / 3, 2)  # °C/hour averaged
+        trends['total_change_3h'] = round(temp_change_3h, 2)
     
-    result = {
-        'data_summary': {
-            'total_records': len(valid_records),
-            'recent_6h_count': len(recent_6h),
-            'range_6_24h_count': len(sampled_6_24h),
-            'range_1_7d_count': len(sampled_1_7d),
-        }
-    }
+    # 変化の加速度（変化率の変化）
+    if len(recent_1h) >= 30:  # 30分以上のデータ
+        mid_idx = len(recent_1h) // 2
+        first_half_change = recent_1h[mid_idx]['temperature'] - recent_1h[0]['temperature']
+        second_half_change = recent_1h[-1]['temperature'] - recent_1h[mid_idx]['temperature']
+        acceleration = second_half_change - first_half_change
+        trends['acceleration'] = round(acceleration, 2)
+        if acceleration > 0.3:
+            trends['acceleration_status'] = '上昇加速中'
+        elif acceleration < -0.3:
+            trends['acceleration_status'] = '下降加速中'
+        else:
+            trends['acceleration_status'] = '安定'
     
+    # 線形回帰による1時間後予測
+    if len(recent_1h) >= 10:
+        temps = [r['temperature'] for r in recent_1h]
+        predicted_1h = _linear_projection(temps)
+        if predicted_1h is not None:
+            trends['predicted_temp_1h'] = round(predicted_1h, 1)
+            trends['predicted_change_1h'] = round(predicted_1h - temps[-1], 1)
+
+    return trends
+
+
+def _python_sections(valid_records: List[Dict], now: datetime) -> Dict[str, Any]:
+    """基本統計・トレンド・パターン（純Python実装）"""
+    result: Dict[str, Any] = {}
+
     # ========================================
     # 2. 基本統計
     # ========================================
@@ -123,7 +243,7 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
         
         # 現在気温のパーセンタイル位置
         current_temp = all_temps[-1]
-        below_count = sum(1 for t in all_temps if t < current_temp)
+        below_count = RankIndex.from_sorted(sorted_temps).below(current_temp)
         result['statistics']['current_percentile'] = round(100 * below_count / n, 1)
         
         # Zスコア（現在気温の異常度）
@@ -133,58 +253,8 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
         else:
             result['statistics']['current_z_score'] = 0
     
-    # ========================================
-    # 3. トレンド分析
-    # ========================================
-    result['trends'] = {}
-    
-    # 直近1時間の変化速度
-    one_hour_ago = now - timedelta(hours=1)
-    recent_1h = [r for r in valid_records if r['parsed_dt'] >= one_hour_ago]
-    if len(recent_1h) >= 2:
-        temp_change_1h = recent_1h[-1]['temperature'] - recent_1h[0]['temperature']
-        result['trends']['change_rate_1h'] = round(temp_change_1h, 2)  # °C/hour
-    
-    # 直近3時間の変化
-    three_hours_ago = now - timedelta(hours=3)
-    recent_3h = [r for r in valid_records if r['parsed_dt'] >= three_hours_ago]
-    if len(recent_3h) >= 2:
-        temp_change_3h = recent_3h[-1]['temperature'] - recent_3h[0]['temperature']
-        result['trends']['change_rate_3h'] = round(temp_change_3h / 3, 2)  # °C/hour averaged
-        result['trends']['total_change_3h'] = round(temp_change_3h, 2)
-    
-    # 変化の加速度（変化率の変化）
-    if len(recent_1h) >= 30:  # 30分以上のデータ
-        mid_idx = len(recent_1h) // 2
-        first_half_change = recent_1h[mid_idx]['temperature'] - recent_1h[0]['temperature']
-        second_half_change = recent_1h[-1]['temperature'] - recent_1h[mid_idx]['temperature']
-        acceleration = second_half_change - first_half_change
-        result['trends']['acceleration'] = round(acceleration, 2)
-        if acceleration > 0.3:
-            result['trends']['acceleration_status'] = '上昇加速中'
-        elif acceleration < -0.3:
-            result['trends']['acceleration_status'] = '下降加速中'
-        else:
-            result['trends']['acceleration_status'] = '安定'
-    
-    # 線形回帰による1時間後予測
-    if len(recent_1h) >= 10:
-        temps = [r['temperature'] for r in recent_1h]
-        n = len(temps)
-        x_mean = (n - 1) / 2
-        y_mean = sum(temps) / n
-        
-        numerator = sum((i - x_mean) * (temps[i] - y_mean) for i in range(n))
-        denominator = sum((i - x_mean) ** 2 for i in range(n))
-        
-        if denominator > 0:
-            slope = numerator / denominator  # per minute
-            intercept = y_mean - slope * x_mean
-            # 60分後の予測
-            predicted_1h = slope * (n + 60) + intercept
-            result['trends']['predicted_temp_1h'] = round(predicted_1h, 1)
-            result['trends']['predicted_change_1h'] = round(predicted_1h - temps[-1], 1)
-    
+    result['trends'] = _python_trends(valid_records, now)
+
     # ========================================
     # 4. パターン分析
     # ========================================
@@ -193,9 +263,8 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
     # 時間帯別平均（3時間帯×8区分）
     time_slots = {i: [] for i in range(8)}  # 0-3, 3-6, ..., 21-24
     for r in valid_records:
-        if r['parsed_dt']:
-            slot = r['parsed_dt'].hour // 3
-            time_slots[slot].append(r['temperature'])
+        slot = _local_hour(r['epoch_minute']) // 3
+        time_slots[slot].append(r['temperature'])
     
     slot_names = ['深夜(0-3)', '未明(3-6)', '朝(6-9)', '午前(9-12)', 
                   '午後(12-15)', '夕方(15-18)', '夜(18-21)', '深夜(21-24)']
@@ -215,19 +284,578 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
     weekday_temps = {i: [] for i in range(7)}
     weekday_names = ['月', '火', '水', '木', '金', '土', '日']
     for r in valid_records:
-        if r['parsed_dt']:
-            wd = r['parsed_dt'].weekday()
-            weekday_temps[wd].append(r['temperature'])
+        wd = (_local_day(r['epoch_minute']) + 3) % 7  # 1970-01-01 は木曜日
+        weekday_temps[wd].append(r['temperature'])
     
     result['patterns']['weekday_avg'] = {}
     for i, temps in weekday_temps.items():
         if temps:
             result['patterns']['weekday_avg'][weekday_names[i]] = round(sum(temps) / len(temps), 1)
+
+    return result
+
+
+def _python_daily_summary(valid_records: List[Dict]) -> List[Dict[str, Any]]:
+    """直近7日の日別サマリー（純Python実装）"""
+    daily_summary = {}
+    for r in valid_records:
+        day_key = _local_day(r['epoch_minute'])
+        if day_key not in daily_summary:
+            daily_summary[day_key] = {'temps': [], 'humids': []}
+        daily_summary[day_key]['temps'].append(r['temperature'])
+        daily_summary[day_key]['humids'].append(r['humidity'])
+    
+    daily_rows = []
+    for day_key, data in sorted(daily_summary.items())[-7:]:  # 直近7日
+        temps = data['temps']
+        daily_rows.append({
+            'date': _day_label(day_key),
+            'high': round(max(temps), 1),
+            'low': round(min(temps), 1),
+            'avg': round(sum(temps) / len(temps), 1),
+            'range': round(max(temps) - min(temps), 1),
+        })
+
+    return daily_rows
+
+
+def _use_numpy(backend: Optional[str]) -> bool:
+    if backend == 'python':
+        return False
+    if backend == 'numpy' and np is None:
+        raise ImportError("numpy backend requested but NumPy is not installed")
+    return np is not None
+
+
+def _round_guarded(fast: float, digits: int, exact) -> float:
+    """fast を digits 桁に丸める。丸め境界に近すぎる場合だけ exact() の値を丸める"""
+    scaled = abs(fast) * 10 ** digits
+    if abs(scaled - math.floor(scaled) - 0.5) <= ROUNDING_GUARD * max(1.0, scaled):
+        return round(exact(), digits)
+    return round(fast, digits)
+
+
+class _RecordArrays:
+    """時刻順の有効レコードを列指向の配列にしたもの（ベクトル化実装用）"""
+
+    __slots__ = ("records", "minutes", "temps", "humids", "local_minutes")
+
+    def __init__(self, valid_records: List[Dict]):
+        n = len(valid_records)
+        self.records = valid_records
+        self.minutes = np.fromiter((r['epoch_minute'] for r in valid_records), np.int64, n)
+        # 丸め結果を純Python実装と揃えるため float32 ではなく float64 で持つ
+        self.temps = np.fromiter((r['temperature'] for r in valid_records), np.float64, n)
+        self.humids = np.fromiter((r['humidity'] for r in valid_records), np.float64, n)
+        # JST の壁時計での分（時間帯・曜日・日付の集計用）
+        self.local_minutes = self.minutes + JST_OFFSET_MINUTES
+
+    def since(self, moment: datetime) -> int:
+        """moment 以降の最初のレコード位置"""
+        return int(np.searchsorted(self.minutes, _ceil_epoch_minutes(moment), side='left'))
+
+    def temp_list(self, start: int = 0) -> List[float]:
+        return [r['temperature'] for r in self.records[start:]]
+
+
+def _vectorized_sections(arrays: _RecordArrays, now: datetime) -> Dict[str, Any]:
+    """基本統計・トレンド・パターン（NumPy 実装、出力は純Python実装と同一）"""
+    temps, humids = arrays.temps, arrays.humids
+    n = len(temps)
+    sorted_temps = np.sort(temps)
+    temp_min, temp_max = float(sorted_temps[0]), float(sorted_temps[-1])
+    middle = n // 2
+    median = float(sorted_temps[middle]) if n % 2 else (float(sorted_temps[middle - 1]) + float(sorted_temps[middle])) / 2
+
+    stats: Dict[str, Any] = {
+        'temp_mean': _round_guarded(float(temps.mean()), 2, lambda: statistics.mean(arrays.temp_list())),
+        'temp_median': round(median, 2),
+        'temp_stdev': (
+            _round_guarded(float(temps.std(ddof=1)), 2, lambda: statistics.stdev(arrays.temp_list()))
+            if n > 1 else 0
+        ),
+        'temp_min': round(temp_min, 2),
+        'temp_max': round(temp_max, 2),
+        'temp_range': round(temp_max - temp_min, 2),
+        'humidity_mean': _round_guarded(
+            float(humids.mean()), 1, lambda: statistics.mean([r['humidity'] for r in arrays.records])
+        ),
+        'humidity_stdev': (
+            _round_guarded(
+                float(humids.std(ddof=1)), 1, lambda: statistics.stdev([r['humidity'] for r in arrays.records])
+            )
+            if n > 1 else 0
+        ),
+    }
+    stats['temp_25th'] = float(sorted_temps[n // 4])
+    stats['temp_75th'] = float(sorted_temps[3 * n // 4])
+    current_temp = float(temps[-1])
+    stats['current_percentile'] = round(100 * int(np.searchsorted(sorted_temps, current_temp, side='left')) / n, 1)
+    if stats['temp_stdev'] > 0:
+        stats['current_z_score'] = round((current_temp - stats['temp_mean']) / stats['temp_stdev'], 2)
+    else:
+        stats['current_z_score'] = 0
+
+    trends: Dict[str, Any] = {}
+    start_1h = arrays.since(now - timedelta(hours=1))
+    start_3h = arrays.since(now - timedelta(hours=3))
+    recent_1h = temps[start_1h:]
+    if len(recent_1h) >= 2:
+        trends['change_rate_1h'] = round(float(recent_1h[-1]) - float(recent_1h[0]), 2)
+    if n - start_3h >= 2:
+        temp_change_3h = float(temps[-1]) - float(temps[start_3h])
+        trends['change_rate_3h'] = round(temp_change_3h / 3, 2)
+        trends['total_change_3h'] = round(temp_change_3h, 2)
+    if len(recent_1h) >= 30:
+        mid_idx = len(recent_1h) // 2
+        first_half_change = float(recent_1h[mid_idx]) - float(recent_1h[0])
+        second_half_change = float(recent_1h[-1]) - float(recent_1h[mid_idx])
+        acceleration = second_half_change - first_half_change
+        trends['acceleration'] = round(acceleration, 2)
+        if acceleration > 0.3:
+            trends['acceleration_status'] = '上昇加速中'
+        elif acceleration < -0.3:
+            trends['acceleration_status'] = '下降加速中'
+        else:
+            trends['acceleration_status'] = '安定'
+    if len(recent_1h) >= 10:
+        x = np.arange(len(recent_1h), dtype=np.float64)
+        slope, intercept = np.polyfit(x, recent_1h, 1)
+        predicted_1h = float(slope) * (len(recent_1h) + 60) + float(intercept)
+        exact_1h = lambda: _linear_projection(arrays.temp_list(start_1h))
+        trends['predicted_temp_1h'] = _round_guarded(predicted_1h, 1, exact_1h)
+        trends['predicted_change_1h'] = _round_guarded(
+            predicted_1h - float(recent_1h[-1]), 1, lambda: exact_1h() - float(recent_1h[-1])
+        )
+
+    patterns: Dict[str, Any] = {}
+    hours = (arrays.local_minutes // 60) % 24
+    slots = hours // 3
+    slot_sums = np.bincount(slots, weights=temps, minlength=8)
+    slot_counts = np.bincount(slots, minlength=8)
+    slot_names = ['深夜(0-3)', '未明(3-6)', '朝(6-9)', '午前(9-12)',
+                  '午後(12-15)', '夕方(15-18)', '夜(18-21)', '深夜(21-24)']
+    # bincount は出現順に逐次加算するため sum(temps) / len(temps) と同じ値になる
+    patterns['time_slot_avg'] = {
+        slot_names[i]: round(float(slot_sums[i]) / int(slot_counts[i]), 1)
+        for i in range(8) if slot_counts[i]
+    }
+    current_slot = now.hour // 3
+    if slot_counts[current_slot]:
+        slot_avg = float(slot_sums[current_slot]) / int(slot_counts[current_slot])
+        patterns['vs_time_slot_avg'] = round(current_temp - slot_avg, 1)
+
+    # 1970-01-01 は木曜日（weekday() == 3）
+    weekdays = (arrays.local_minutes // 1440 + 3) % 7
+    weekday_sums = np.bincount(weekdays, weights=temps, minlength=7)
+    weekday_counts = np.bincount(weekdays, minlength=7)
+    weekday_names = ['月', '火', '水', '木', '金', '土', '日']
+    patterns['weekday_avg'] = {
+        weekday_names[i]: round(float(weekday_sums[i]) / int(weekday_counts[i]), 1)
+        for i in range(7) if weekday_counts[i]
+    }
+
+    return {'statistics': stats, 'trends': trends, 'patterns': patterns}
+
+
+def _vectorized_daily_summary(arrays: _RecordArrays) -> List[Dict[str, Any]]:
+    """直近7日の日別サマリー（NumPy 実装）"""
+    unique_days, groups = np.unique(arrays.local_minutes // 1440, return_inverse=True)
+    sums = np.bincount(groups, weights=arrays.temps)
+    counts = np.bincount(groups)
+    highs = np.full(len(unique_days), -np.inf)
+    lows = np.full(len(unique_days), np.inf)
+    np.maximum.at(highs, groups, arrays.temps)
+    np.minimum.at(lows, groups, arrays.temps)
+
+    daily_rows = []
+    for g in range(max(0, len(unique_days) - 7), len(unique_days)):  # 直近7日
+        high, low = float(highs[g]), float(lows[g])
+        daily_rows.append({
+            'date': _day_label(int(unique_days[g])),
+            'high': round(high, 1),
+            'low': round(low, 1),
+            'avg': round(float(sums[g]) / int(counts[g]), 1),
+            'range': round(high - low, 1),
+        })
+    return daily_rows
+
+
+# ========================================
+# 増分分析の状態（毎時実行で前回までの行を再集計しない）
+# ========================================
+ANALYSIS_STATE_VERSION = 1
+STATE_RING_MINUTES = 6 * 60
+SLOT_NAMES = ['深夜(0-3)', '未明(3-6)', '朝(6-9)', '午前(9-12)',
+              '午後(12-15)', '夕方(15-18)', '夜(18-21)', '深夜(21-24)']
+WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
+RAPID_WINDOW_MINUTES = 30
+RAPID_TOLERANCE_MINUTES = 5
+
+
+def _new_day_bucket() -> Dict[str, Any]:
+    # sum は sum() と同じく 0 から記録順に足していくので、日平均は全件集計と一致する
+    return {'n': 0, 'sum': 0, 'high': None, 'low': None,
+            'slot_sum': [0] * 8, 'slot_n': [0] * 8, 'temps': {}, 'humids': {}}
+
+
+def _fold_record(bucket: Dict[str, Any], record: Dict) -> None:
+    temp, humid = record['temperature'], record['humidity']
+    bucket['n'] += 1
+    bucket['sum'] += temp
+    bucket['high'] = temp if bucket['high'] is None else max(bucket['high'], temp)
+    bucket['low'] = temp if bucket['low'] is None else min(bucket['low'], temp)
+    slot = _local_hour(record['epoch_minute']) // 3
+    bucket['slot_sum'][slot] += temp
+    bucket['slot_n'][slot] += 1
+    # 中央値・パーセンタイル・平均・標準偏差を厳密に出すための値ごとの件数
+    for histogram, value in ((bucket['temps'], temp), (bucket['humids'], humid)):
+        key = repr(float(value))
+        histogram[key] = histogram.get(key, 0) + 1
+
+
+class AnalysisState:
+    """
+    analyze_data_comprehensive の集計を前回実行から引き継ぐ状態ファイル
+
+    日別バケット（件数・合計・最高/最低・時間帯別合計・値ごとの件数）、直近6時間の
+    リングバッファ、急変ヒット、最後に処理した時刻を JSON で保存し、次回は新しい
+    行だけを畳み込む。最古の日（Recent シートの窓から一部がはみ出す日）は毎回
+    現在の行から作り直す。状態が無い・壊れている・リングバッファや日別件数が
+    現在のデータと合わない場合は全件から作り直す。
+
+    cancelled がセットされていると集計結果は返すが状態ファイルは書かない
+    （締め切りを過ぎた取得が、呼び出し側の諦めた後に状態を更新しないため）。
+    """
+
+    def __init__(self, path: Union[str, Path], cancelled: Optional[threading.Event] = None):
+        self.path = Path(path)
+        self.cancelled = cancelled
+        # 直近の更新方法（'incremental' / 'full'）と畳み込んだ行数。ログ用。
+        self.last_update: Tuple[str, int] = ("", 0)
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != ANALYSIS_STATE_VERSION:
+            return None
+        return data
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _resume(data: Dict[str, Any], valid_records: List[Dict],
+                minutes: List[int]) -> Optional[Tuple[Dict[int, Dict], int, List[List]]]:
+        """前回の状態が現在の行と整合すれば (引き継ぐ日別バケット, 新しい行の位置, ヒット) を返す"""
+        try:
+            last = data['last_minute']
+            ring = data['ring']
+            stored_days = {int(day): bucket for day, bucket in data['days'].items()}
+            hits = [list(hit) for hit in data['hits']]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+        start = bisect_right(minutes, last)
+        if start == 0 or minutes[start - 1] != last:
+            return None
+        # 直近6時間が前回と同じでなければ、過去行が修正されている
+        ring = [row for row in ring if row[0] >= minutes[0]]
+        ring_from = bisect_left(minutes, ring[0][0]) if ring else start
+        current_ring = [[r['epoch_minute'], r['temperature'], r['humidity']]
+                        for r in valid_records[ring_from:start]]
+        if current_ring != ring:
+            return None
+
+        first_day = _local_day(minutes[0])
+        days = {day: bucket for day, bucket in stored_days.items() if day > first_day}
+        covered = bisect_left(minutes, (first_day + 1) * 1440 - JST_OFFSET_MINUTES)
+        for day, bucket in days.items():
+            lo = bisect_left(minutes, day * 1440 - JST_OFFSET_MINUTES, 0, start)
+            hi = bisect_left(minutes, (day + 1) * 1440 - JST_OFFSET_MINUTES, 0, start)
+            if bucket.get('n') != hi - lo:
+                return None
+            covered += hi - lo
+        if covered < start:  # バケットの無い日がある
+            return None
+        return days, start, [hit for hit in hits if hit[1] >= minutes[0]]
+
+    def update(self, valid_records: List[Dict]) -> Dict[str, Any]:
+        """時刻順の有効レコードを畳み込んで保存し、{'days', 'hits'} を返す"""
+        minutes = [r['epoch_minute'] for r in valid_records]
+        data = self._load()
+        resumed = self._resume(data, valid_records, minutes) if data else None
+        if resumed:
+            days, start, hits = resumed
+            first_day = _local_day(minutes[0])
+            # 最古の日は窓の先頭が動くので現在の行から作り直す
+            first_end = bisect_left(minutes, (first_day + 1) * 1440 - JST_OFFSET_MINUTES, 0, start)
+            days[first_day] = _new_day_bucket()
+            for r in valid_records[:first_end]:
+                _fold_record(days[first_day], r)
+            # 急変は新しい行だけを、30分＋許容5分ぶん遡った位置から調べる
+            scan_from = bisect_left(minutes, minutes[start] - RAPID_WINDOW_MINUTES - RAPID_TOLERANCE_MINUTES) \
+                if start < len(minutes) else start
+        else:
+            days, start, hits, scan_from = {}, 0, [], 0
+        self.last_update = ('incremental' if resumed else 'full', len(valid_records) - start)
+
+        for r in valid_records[start:]:
+            day = _local_day(r['epoch_minute'])
+            if day not in days:
+                days[day] = _new_day_bucket()
+            _fold_record(days[day], r)
+
+        if start < len(minutes):
+            scanned = detect_window_changes(
+                minutes[scan_from:], [r['temperature'] for r in valid_records[scan_from:]],
+                window=RAPID_WINDOW_MINUTES, threshold=2.0, keep=3, tolerance=RAPID_TOLERANCE_MINUTES,
+            )
+            hits.extend([minutes[scan_from + i], minutes[scan_from + j], change]
+                        for i, j, change in scanned if scan_from + i >= start)
+            hits = hits[-3:]
+
+        last = minutes[-1]
+        state = {
+            'version': ANALYSIS_STATE_VERSION,
+            'last_minute': last,
+            'days': {str(day): days[day] for day in sorted(days)},
+            'ring': [[r['epoch_minute'], r['temperature'], r['humidity']]
+                     for r in valid_records[bisect_right(minutes, last - STATE_RING_MINUTES):]],
+            'hits': hits,
+        }
+        if self.cancelled is not None and self.cancelled.is_set():
+            return {'days': days, 'hits': hits}
+        try:
+            self._save(state)
+        except OSError as e:
+            # 保存できなくても今回の分析結果は有効。次回は全件から作り直す
+            print(f"  [WARN] 分析状態を保存できません: {e}")
+        return {'days': days, 'hits': hits}
+
+
+def _merged_histogram(days: Dict[int, Dict], key: str) -> List[Tuple[float, int]]:
+    merged: Dict[str, int] = {}
+    for bucket in days.values():
+        for value, count in bucket[key].items():
+            merged[value] = merged.get(value, 0) + count
+    return sorted((float(value), count) for value, count in merged.items())
+
+
+def _histogram_moments(histogram: List[Tuple[float, int]]) -> Tuple[int, Fraction, Optional[Fraction]]:
+    """(件数, 厳密な平均, 厳密な不偏分散)。statistics.mean / stdev と同じ値を分数で求める"""
+    n = sum(count for _, count in histogram)
+    mean = sum(Fraction(value) * count for value, count in histogram) / n
+    if n < 2:
+        return n, mean, None
+    squares = sum((Fraction(value) - mean) ** 2 * count for value, count in histogram)
+    return n, mean, squares / (n - 1)
+
+
+def _histogram_ranks(histogram: List[Tuple[float, int]], ranks: Sequence[int]) -> List[float]:
+    """昇順に並べたときの ranks 番目（0始まり、昇順指定）の値"""
+    values = []
+    seen = 0
+    pending = iter(ranks)
+    target = next(pending, None)
+    for value, count in histogram:
+        seen += count
+        while target is not None and target < seen:
+            values.append(value)
+            target = next(pending, None)
+    return values
+
+
+def _state_sections(days: Dict[int, Dict], valid_records: List[Dict], now: datetime) -> Dict[str, Any]:
+    """基本統計・パターン（状態の日別バケットから。値は純Python実装と同一）"""
+    temp_hist = _merged_histogram(days, 'temps')
+    humid_hist = _merged_histogram(days, 'humids')
+    n, temp_mean, temp_var = _histogram_moments(temp_hist)
+    _, humid_mean, humid_var = _histogram_moments(humid_hist)
+
+    def exact_stdev(key: str) -> float:
+        return statistics.stdev([r[key] for r in valid_records])
+
+    middle = n // 2
+    ranks = sorted({n // 4, 3 * n // 4, middle, max(middle - 1, 0)})
+    by_rank = dict(zip(ranks, _histogram_ranks(temp_hist, ranks)))
+    median = by_rank[middle] if n % 2 else (by_rank[middle - 1] + by_rank[middle]) / 2
+    temp_min, temp_max = temp_hist[0][0], temp_hist[-1][0]
+
+    stats: Dict[str, Any] = {
+        'temp_mean': round(float(temp_mean), 2),
+        'temp_median': round(median, 2),
+        'temp_stdev': (
+            _round_guarded(math.sqrt(temp_var), 2, lambda: exact_stdev('temperature'))
+            if temp_var is not None else 0
+        ),
+        'temp_min': round(temp_min, 2),
+        'temp_max': round(temp_max, 2),
+        'temp_range': round(temp_max - temp_min, 2),
+        'humidity_mean': round(float(humid_mean), 1),
+        'humidity_stdev': (
+            _round_guarded(math.sqrt(humid_var), 1, lambda: exact_stdev('humidity'))
+            if humid_var is not None else 0
+        ),
+    }
+    stats['temp_25th'] = by_rank[n // 4]
+    stats['temp_75th'] = by_rank[3 * n // 4]
+    current_temp = valid_records[-1]['temperature']
+    below_count = sum(count for value, count in temp_hist if value < current_temp)
+    stats['current_percentile'] = round(100 * below_count / n, 1)
+    if stats['temp_stdev'] > 0:
+        stats['current_z_score'] = round((current_temp - stats['temp_mean']) / stats['temp_stdev'], 2)
+    else:
+        stats['current_z_score'] = 0
+
+    # 日をまたいで合計すると加算順序が変わるので、丸め境界に近いときは全件で計算し直す
+    def group_mean(total: float, count: int, member) -> Tuple[float, Any]:
+        def exact() -> float:
+            temps = [r['temperature'] for r in valid_records if member(r['epoch_minute'])]
+            return sum(temps) / len(temps)
+        return total / count, exact
+
+    patterns: Dict[str, Any] = {'time_slot_avg': {}}
+    slot_sums, slot_counts = [0.0] * 8, [0] * 8
+    weekday_sums, weekday_counts = [0.0] * 7, [0] * 7
+    for day in sorted(days):
+        bucket = days[day]
+        for slot in range(8):
+            slot_sums[slot] += bucket['slot_sum'][slot]
+            slot_counts[slot] += bucket['slot_n'][slot]
+        weekday = (day + 3) % 7  # 1970-01-01 は木曜日
+        weekday_sums[weekday] += bucket['sum']
+        weekday_counts[weekday] += bucket['n']
+
+    slot_means = {}
+    for slot in range(8):
+        if slot_counts[slot]:
+            slot_means[slot] = group_mean(slot_sums[slot], slot_counts[slot],
+                                          lambda minute, slot=slot: _local_hour(minute) // 3 == slot)
+            fast, exact = slot_means[slot]
+            patterns['time_slot_avg'][SLOT_NAMES[slot]] = _round_guarded(fast, 1, exact)
+    current_slot = now.hour // 3
+    if current_slot in slot_means:
+        fast, exact = slot_means[current_slot]
+        patterns['vs_time_slot_avg'] = _round_guarded(current_temp - fast, 1, lambda: current_temp - exact())
+
+    patterns['weekday_avg'] = {}
+    for weekday in range(7):
+        if weekday_counts[weekday]:
+            fast, exact = group_mean(weekday_sums[weekday], weekday_counts[weekday],
+                                     lambda minute, weekday=weekday: (_local_day(minute) + 3) % 7 == weekday)
+            patterns['weekday_avg'][WEEKDAY_NAMES[weekday]] = _round_guarded(fast, 1, exact)
+
+    return {'statistics': stats, 'trends': _python_trends(valid_records, now), 'patterns': patterns}
+
+
+def _state_daily_summary(days: Dict[int, Dict]) -> List[Dict[str, Any]]:
+    """直近7日の日別サマリー（状態の日別バケットから）"""
+    daily_rows = []
+    for day in sorted(days)[-7:]:
+        bucket = days[day]
+        daily_rows.append({
+            'date': _day_label(day),
+            'high': round(bucket['high'], 1),
+            'low': round(bucket['low'], 1),
+            'avg': round(bucket['sum'] / bucket['n'], 1),
+            'range': round(bucket['high'] - bucket['low'], 1),
+        })
+    return daily_rows
+
+
+def analyze_data_comprehensive(all_records: List[Dict], backend: Optional[str] = None,
+                               state: Optional[AnalysisState] = None) -> Dict[str, Any]:
+    """
+    生データから包括的な分析を実行
+    
+    Parameters:
+        all_records: 全レコード（1分毎、最大12000件）
+                     各レコード: {'datetime': str, 'temperature': float, 'humidity': float}
+        backend: 'numpy' / 'python'。省略時は NumPy があればベクトル化実装を使う
+        state: 前回実行の集計を引き継ぐ AnalysisState。指定時は新しい行だけを集計する
+               （出力は全件集計と同一。backend より優先）
+    
+    Returns:
+        統計、トレンド、パターン、異常検知などの分析結果
+    """
+    if not all_records:
+        return {'error': 'No data available'}
+    
+    now = datetime.now(JST)
+    
+    # ========================================
+    # 1. データの時間軸による分類
+    # ========================================
+    
+    # 時刻文字列を UNIX 分（整数）に変換。以降の時間窓はすべて整数で比較する
+    parse_time = RecentTimeParser(now)
+    for r in all_records:
+        r['epoch_minute'] = parse_time(r.get('datetime', ''))
+    
+    # 有効なレコードかつセンサー異常（気温0.0かつ湿度0.0）でないものをフィルタ
+    valid_records = []
+    for r in all_records:
+        if r['epoch_minute'] is not None:
+            try:
+                temp = float(r.get('temperature', 0.0))
+                humid = float(r.get('humidity', 0.0))
+                if temp == 0.0 and humid == 0.0:
+                    continue  # 異常データを除外
+                valid_records.append(r)
+            except (ValueError, TypeError):
+                continue
     
+    valid_records.sort(key=lambda x: x['epoch_minute'])
+    
+    if not valid_records:
+        return {'error': 'No valid timestamped data'}
+    
+    # 階層分類
+    six_hours_ago = _ceil_epoch_minutes(now - timedelta(hours=6))
+    twenty_four_hours_ago = _ceil_epoch_minutes(now - timedelta(hours=24))
+    seven_days_ago = _ceil_epoch_minutes(now - timedelta(days=7))
+    
+    # 直近6時間（1分毎）
+    recent_6h = [r for r in valid_records if r['epoch_minute'] >= six_hours_ago]
+    
+    # 6-24時間前（5分毎にサンプリング）
+    range_6_24h = [r for r in valid_records if six_hours_ago > r['epoch_minute'] >= twenty_four_hours_ago]
+    sampled_6_24h = range_6_24h[::5]  # 5件に1件
+    
+    # 1-7日前（30分毎にサンプリング）
+    range_1_7d = [r for r in valid_records if twenty_four_hours_ago > r['epoch_minute'] >= seven_days_ago]
+    sampled_1_7d = range_1_7d[::30]  # 30件に1件
+    
+    result = {
+        'data_summary': {
+            'total_records': len(valid_records),
+            'recent_6h_count': len(recent_6h),
+            'range_6_24h_count': len(sampled_6_24h),
+            'range_1_7d_count': len(sampled_1_7d),
+        }
+    }
+    
+    # ========================================
+    # 2〜4. 基本統計・トレンド・パターン（状態があれば増分、NumPy があればベクトル化版）
+    # ========================================
+    folded = state.update(valid_records) if state else None
+    arrays = _RecordArrays(valid_records) if not folded and _use_numpy(backend) else None
+    if folded:
+        result.update(_state_sections(folded['days'], valid_records, now))
+    else:
+        result.update(_vectorized_sections(arrays, now) if arrays else _python_sections(valid_records, now))
+    all_temps = [r['temperature'] for r in valid_records]
+
     # 昨日同時刻との比較
-    yesterday = now - timedelta(days=1)
-    yesterday_records = [r for r in valid_records 
-                        if r['parsed_dt'] and abs((r['parsed_dt'] - yesterday).total_seconds()) < 1800]  # 30分以内
+    # 前後30分以内（境界を含まない）。now の秒以下も含めてマイクロ秒で比べる
+    yesterday = (now - timedelta(days=1) - EPOCH) // timedelta(microseconds=1)
+    yesterday_records = [r for r in valid_records
+                        if abs(r['epoch_minute'] * 60_000_000 - yesterday) < 1_800_000_000]
     if yesterday_records and all_temps:
         yesterday_temp = yesterday_records[-1]['temperature']
         result['patterns']['vs_yesterday'] = round(all_temps[-1] - yesterday_temp, 1)
@@ -237,21 +865,27 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
     # ========================================
     result['anomalies'] = {'alerts': []}
     
-    # 急変検出（30分で2°C以上の変化）
-    for i in range(30, len(valid_records)):
-        temp_now = valid_records[i]['temperature']
-        temp_30min_ago = valid_records[i - 30]['temperature']
-        change = temp_now - temp_30min_ago
-        if abs(change) >= 2.0:
-            result['anomalies']['alerts'].append({
-                'type': 'rapid_change',
-                'time': valid_records[i]['datetime'],
-                'change': round(change, 1),
-                'direction': '急上昇' if change > 0 else '急降下'
-            })
-    
-    # 最新3件のみ保持
-    result['anomalies']['alerts'] = result['anomalies']['alerts'][-3:]
+    # 急変検出（30分で2°C以上の変化、最新3件のみ保持）
+    # 欠測があっても実時間で30分前と比べる（30分前の点が5分以上ずれていれば比較しない）
+    if folded:
+        minutes = [r['epoch_minute'] for r in valid_records]
+        rapid_changes = [(bisect_left(minutes, minute), None, change) for minute, _, change in folded['hits']]
+    else:
+        rapid_changes = detect_window_changes(
+            [r['epoch_minute'] for r in valid_records],
+            [r['temperature'] for r in valid_records],
+            window=RAPID_WINDOW_MINUTES,
+            threshold=2.0,
+            keep=3,
+            tolerance=RAPID_TOLERANCE_MINUTES,
+        )
+    for i, _, change in rapid_changes:
+        result['anomalies']['alerts'].append({
+            'type': 'rapid_change',
+            'time': valid_records[i]['datetime'],
+            'change': round(change, 1),
+            'direction': '急上昇' if change > 0 else '急降下'
+        })
     
     # 異常値フラグ（Zスコア > 2）
     if result['statistics'].get('current_z_score', 0):
@@ -290,26 +924,13 @@ def analyze_data_comprehensive(all_records: List[Dict]) -> Dict[str, Any]:
     # ========================================
     # 7. 日別サマリー
     # ========================================
-    daily_summary = {}
-    for r in valid_records:
-        if r['parsed_dt']:
-            date_key = r['parsed_dt'].strftime('%m/%d')
-            if date_key not in daily_summary:
-                daily_summary[date_key] = {'temps': [], 'humids': []}
-            daily_summary[date_key]['temps'].append(r['temperature'])
-            daily_summary[date_key]['humids'].append(r['humidity'])
-    
-    result['daily_summary'] = []
-    for date, data in sorted(daily_summary.items())[-7:]:  # 直近7日
-        temps = data['temps']
-        result['daily_summary'].append({
-            'date': date,
-            'high': round(max(temps), 1),
-            'low': round(min(temps), 1),
-            'avg': round(sum(temps) / len(temps), 1),
-            'range': round(max(temps) - min(temps), 1),
-        })
-    
+    if folded:
+        result['daily_summary'] = _state_daily_summary(folded['days'])
+    else:
+        result['daily_summary'] = (
+            _vectorized_daily_summary(arrays) if arrays else _python_daily_summary(valid_records)
+        )
+
     return result
 
 
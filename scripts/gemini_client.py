@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Lazy Gemini SDK access and ``.env`` loading for the report and advisor scripts.
+
+``google.genai`` (and everything it pulls in) is imported the first time a
+client is requested, so ``--no-ai``/``--draft``/``--backfill`` runs and test
+imports never pay for it.  Clients are memoized per API key: a backfill that
+analyses several reports builds one.
+
+``load_env`` reads the project's ``.env`` once (``$WX_ENV_FILE`` overrides the
+path).  python-dotenv is imported only when that file exists — on Actions the
+settings come from secrets and there is no ``.env``, so nothing is imported there.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+ENV_PATH = Path(os.environ.get("WX_ENV_FILE") or Path(__file__).parent.parent / ".env")
+
+_env_loaded = False
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def load_env(path: Optional[Path] = None) -> bool:
+    """Load ``.env`` into ``os.environ`` once per process; ``True`` if a file was read."""
+    global _env_loaded
+    if _env_loaded:
+        return False
+    _env_loaded = True
+    path = Path(path or ENV_PATH)
+    if not path.is_file():
+        return False
+    from dotenv import load_dotenv
+    load_dotenv(path)
+    return True
+
+
+def get_client(api_key: str) -> Any:
+    """Process-wide ``genai.Client`` for ``api_key`` (imports the SDK on first use)."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            from google import genai
+            client = _clients[api_key] = genai.Client(api_key=api_key)
+        return client
+
+
+def clear_clients() -> None:
+    """Drop memoized clients (tests that swap the SDK between calls)."""
+    with _clients_lock:
+        _clients.clear()
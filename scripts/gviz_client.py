@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Shared client for the spreadsheet's gviz CSV endpoint.
+
+Every sheet pull (Summary, Recent, Daily, Raw corrections) goes through one
+keep-alive ``requests.Session`` per process, so consecutive calls reuse the TLS
+connection instead of handshaking again.  Independent sheets can be pulled
+concurrently with a bounded thread pool, and each call is timed so callers can
+report where the network time went.
+
+``iter_csv`` streams a response through ``csv.reader`` line by line, so parsing
+never holds more than one row of the body, and quoted commas are handled
+properly.  ``typed_rows`` converts those rows into typed tuples.
+"""
+
+from __future__ import annotations
+
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+
+GVIZ_URL = "https://docs.google.com/spreadsheets/d/{spreadsheet_id}/gviz/tq"
+DEFAULT_MAX_WORKERS = 4
+
+
+class GvizClient:
+    """Fetch CSV from one spreadsheet's gviz endpoint over a pooled session.
+
+    ``timings`` collects one entry per call (sheet, seconds, bytes, ok) and is
+    safe to append to from the worker threads of ``fetch_many``.
+    """
+
+    def __init__(self, spreadsheet_id: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 session: Optional[Any] = None):
+        self.url = GVIZ_URL.format(spreadsheet_id=spreadsheet_id)
+        self.max_workers = max(1, max_workers)
+        self.timings: List[Dict[str, Any]] = []
+        self._session = session
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> Any:
+        # 接続プールは同時取得数ぶん確保する（既定の10で足りるが明示しておく）
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(10, self.max_workers))
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    @staticmethod
+    def _params(sheet: str, query: Optional[str]) -> Dict[str, str]:
+        params = {"tqx": "out:csv", "sheet": sheet}
+        if query:
+            params["tq"] = query
+        return params
+
+    def _record(self, sheet: str, query: Optional[str], started: float, size: int, ok: bool) -> None:
+        entry = {
+            "sheet": sheet,
+            "query": bool(query),
+            "seconds": round(time.perf_counter() - started, 3),
+            "bytes": size,
+            "ok": ok,
+        }
+        with self._lock:
+            self.timings.append(entry)
+
+    def fetch_csv(self, sheet: str, query: Optional[str] = None, timeout: float = 30) -> str:
+        """Return the CSV body of ``sheet`` (optionally filtered by a gviz query)."""
+        started = time.perf_counter()
+        size = 0
+        ok = False
+        try:
+            resp = self.session.get(self.url, params=self._params(sheet, query), timeout=timeout)
+            resp.raise_for_status()
+            text = resp.text
+            size = len(text)
+            ok = True
+            return text
+        finally:
+            self._record(sheet, query, started, size, ok)
+
+    def iter_csv(self, sheet: str, query: Optional[str] = None, timeout: float = 30) -> Iterator[List[str]]:
+        """Stream the rows of ``sheet`` (header row first) as lists of strings.
+
+        The body is read line by line from the socket, so memory stays bounded
+        by one row.  The call is timed once the rows have been consumed.
+        """
+        started = time.perf_counter()
+        size = 0
+        ok = False
+        try:
+            resp = self.session.get(self.url, params=self._params(sheet, query), timeout=timeout, stream=True)
+            try:
+                resp.raise_for_status()
+                encoding = resp.encoding or "utf-8"
+
+                def lines() -> Iterator[str]:
+                    nonlocal size
+                    for raw in resp.iter_lines():
+                        size += len(raw) + 1
+                        yield raw.decode(encoding)
+
+                yield from csv.reader(lines())
+                ok = True
+            finally:
+                resp.close()
+        finally:
+            self._record(sheet, query, started, size, ok)
+
+    def run_concurrently(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """Run independent fetch callables on the bounded pool.
+
+        Each result is the callable's return value, or the exception it raised so
+        one failing pull does not discard the others.
+        """
+        def run(task: Callable[[], Any]) -> Any:
+            try:
+                return task()
+            except Exception as e:
+                return e
+
+        names = list(tasks)
+        workers = min(self.max_workers, len(names)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, (tasks[name] for name in names)))
+        return dict(zip(names, results))
+
+    def fetch_many(self, requests_by_name: Dict[str, Tuple[str, Optional[str], float]]
+                   ) -> Dict[str, Union[str, Exception]]:
+        """Fetch several independent sheets concurrently.
+
+        ``requests_by_name`` maps a caller-chosen name to ``(sheet, query, timeout)``;
+        results follow ``run_concurrently``.
+        """
+        return self.run_concurrently({
+            name: (lambda spec=spec: self.fetch_csv(*spec))
+            for name, spec in requests_by_name.items()
+        })
+
+    def timing_summary(self) -> Dict[str, Any]:
+        """Aggregate the recorded calls per sheet."""
+        with self._lock:
+            timings = list(self.timings)
+        by_sheet: Dict[str, Dict[str, Any]] = {}
+        for entry in timings:
+            sheet = by_sheet.setdefault(entry["sheet"], {"calls": 0, "seconds": 0.0, "bytes": 0, "errors": 0})
+            sheet["calls"] += 1
+            sheet["seconds"] = round(sheet["seconds"] + entry["seconds"], 3)
+            sheet["bytes"] += entry["bytes"]
+            sheet["errors"] += not entry["ok"]
+        return {
+            "calls": len(timings),
+            "seconds": round(sum(entry["seconds"] for entry in timings), 3),
+            "by_sheet": by_sheet,
+        }
+
+
+def optional_float(field: str) -> Optional[float]:
+    """``float(field)``, or ``None`` for an empty cell."""
+    return float(field) if field else None
+
+
+def typed_rows(rows: Iterable[List[str]], *converters: Callable[[str], Any]) -> Iterator[Tuple[Any, ...]]:
+    """Convert the leading fields of each row with ``converters``.
+
+    Fields are stripped before conversion.  Rows with fewer fields than
+    converters, or whose fields fail to convert, are skipped.
+    """
+    width = len(converters)
+    for row in rows:
+        if len(row) < width:
+            continue
+        try:
+            yield tuple(convert(field.strip()) for convert, field in zip(converters, row))
+        except ValueError:
+            continue
+
+
+_clients: Dict[str, GvizClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(spreadsheet_id: str) -> GvizClient:
+    """Process-wide client for ``spreadsheet_id`` (one pooled session per sheet)."""
+    with _clients_lock:
+        client = _clients.get(spreadsheet_id)
+        if client is None:
+            client = _clients[spreadsheet_id] = GvizClient(spreadsheet_id)
+        return client
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Opt-in stage timings and counters for the batch scripts.
+
+Instrumentation is off unless ``WX_METRICS`` is set to a non-empty value other
+than ``0``.  While it is off, ``span``/``start`` hand back one shared no-op object
+and ``count`` returns immediately, so instrumented code pays one attribute check
+per call.  A ``listener`` (used by ``profiling`` for memory snapshots at stage
+boundaries) keeps spans live without recording them.
+
+Spans are aggregated by name (calls, total and slowest seconds).  They are
+inclusive: a ``fingerprint`` span recorded while a ``report.weekly`` span is open
+counts towards both.  ``write_run_metrics`` dumps everything to
+``run_metrics.json`` (``WX_METRICS_FILE`` overrides the path) for the workflow
+artifacts; ``timings`` gives a compact ``{name: seconds}`` block to embed in an
+output file.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+METRICS_ENV = "WX_METRICS"
+METRICS_FILE_ENV = "WX_METRICS_FILE"
+DEFAULT_METRICS_PATH = Path(__file__).parent.parent / "run_metrics.json"
+JST = timezone(timedelta(hours=9))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.started = time.perf_counter()
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        self.metrics.add(self.name, time.perf_counter() - self.started)
+
+
+class Metrics:
+    """Span and counter aggregates for one process (thread-safe)."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.listener: Optional[Callable[[str], None]] = None
+        # span を計測するか（有効時か、リスナーがいるとき）
+        self.live = enabled
+        self.started = time.perf_counter()
+        self._spans: Dict[str, list] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set_listener(self, listener: Optional[Callable[[str], None]]) -> None:
+        """Call ``listener(name)`` whenever a span ends (``None`` to remove it)."""
+        self.listener = listener
+        self.live = self.enabled or listener is not None
+
+    def span(self, name: str) -> Any:
+        """Context manager timing the enclosed block under ``name``."""
+        return _Span(self, name) if self.live else _NULL_SPAN
+
+    def start(self, name: str) -> Any:
+        """Start timing ``name`` now; call ``.stop()`` on the result to record it."""
+        return _Span(self, name) if self.live else _NULL_SPAN
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Record ``seconds`` measured elsewhere under ``name``."""
+        if self.listener is not None:
+            self.listener(name)
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [calls, seconds, seconds]
+            else:
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "spans": {
+                    name: {"calls": calls, "seconds": round(total, 4), "max_seconds": round(slowest, 4)}
+                    for name, (calls, total, slowest) in sorted(self._spans.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """Snapshot and reset, e.g. to ship a worker process's aggregates to the parent."""
+        if not self.enabled:
+            return None
+        snapshot = self.snapshot()
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+        return snapshot
+
+    def merge(self, snapshot: Optional[Dict[str, Any]]) -> None:
+        """Fold a ``snapshot``/``drain`` result from another process into this one."""
+        if not self.enabled or not snapshot:
+            return
+        with self._lock:
+            for name, span in snapshot.get("spans", {}).items():
+                entry = self._spans.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += span["calls"]
+                entry[1] += span["seconds"]
+                entry[2] = max(entry[2], span["max_seconds"])
+            for name, n in snapshot.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + n
+
+    def timings(self) -> Dict[str, float]:
+        """Compact ``{span: total seconds}`` for embedding in an output JSON."""
+        return {name: span["seconds"] for name, span in self.snapshot()["spans"].items()}
+
+
+def _enabled_from_env() -> bool:
+    return os.environ.get(METRICS_ENV, "").strip() not in ("", "0")
+
+
+metrics = Metrics(enabled=_enabled_from_env())
+
+
+def enabled() -> bool:
+    return metrics.enabled
+
+
+def span(name: str) -> Any:
+    return metrics.span(name)
+
+
+def start(name: str) -> Any:
+    return metrics.start(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    metrics.count(name, n)
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording every call of the function as a ``name`` span."""
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.live:
+                return func(*args, **kwargs)
+            with _Span(metrics, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_run_metrics(script: str, path: Optional[Path] = None,
+                      extra: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+    """Write ``run_metrics.json`` for this run; a no-op (``None``) when disabled."""
+    if not metrics.enabled:
+        return None
+    path = Path(path or os.environ.get(METRICS_FILE_ENV) or DEFAULT_METRICS_PATH)
+    payload = {
+        "script": script,
+        "generated_at": datetime.now(JST).isoformat(),
+        "wall_seconds": round(time.perf_counter() - metrics.started, 4),
+        **metrics.snapshot(),
+        **(extra or {}),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
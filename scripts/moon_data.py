@@ -11,6 +11,8 @@ import urllib.request
 import math
 from datetime import datetime, timezone, timedelta
 
+from profiling import run_profiled
+
 # 東京都葛飾区東金町5丁目の座標
 LAT = 35.7785
 LON = 139.878
@@ -181,4 +183,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_profiled(main, "moon_data")
@@ -9,6 +9,8 @@ import os
 import requests
 from datetime import datetime
 
+from profiling import run_profiled
+
 # Load .env file for local testing
 try:
     from dotenv import load_dotenv
@@ -99,4 +101,4 @@ def main():
         print("Failed to fetch data")
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'precipitation')
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Opt-in cProfile / tracemalloc wrapper for the script entry points.
+
+Every script runs its ``main`` through ``run_profiled``.  Profiling is requested
+with ``--profile`` (CPU), ``--profile=cpu|mem`` / ``--profile cpu|mem`` on the
+command line, or ``WX_PROFILE=cpu|mem`` in the environment.  The flag is removed
+from ``sys.argv`` before ``main`` parses its own arguments, and without it
+``main`` runs untouched.
+
+* ``cpu`` — ``main`` runs under cProfile; ``<script>-<time>.prof`` (for
+  ``pstats``/snakeviz) and a ``.txt`` with the top entries by cumulative time are
+  written.
+* ``mem`` — tracemalloc runs for the whole of ``main``.  A snapshot is taken the
+  first time each ``instrumentation`` span ends (stage boundaries) and at exit;
+  ``<script>-<time>-mem.txt`` lists traced memory at every boundary, the top
+  allocation growth between boundaries and the top allocation sites at exit.
+
+Only the calling process is profiled (``report_generator --backfill --jobs N``
+workers are not).  Reports go to ``WX_PROFILE_DIR`` (``profiles/`` under the
+project by default); ``WX_PROFILE_TOP`` sets how many entries each listing
+keeps (25).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import instrumentation
+
+if TYPE_CHECKING:
+    import tracemalloc
+
+
+PROFILE_ENV = "WX_PROFILE"
+PROFILE_DIR_ENV = "WX_PROFILE_DIR"
+PROFILE_TOP_ENV = "WX_PROFILE_TOP"
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+DEFAULT_TOP = 25
+PROFILE_MODES = ("cpu", "mem")
+JST = timezone(timedelta(hours=9))
+
+
+def take_profile_mode(argv: List[str]) -> Optional[str]:
+    """Remove a ``--profile`` flag from ``argv`` and return the mode (else ``WX_PROFILE``)."""
+    mode = None
+    for i, arg in enumerate(argv[1:], start=1):
+        if arg == "--profile":
+            following = argv[i + 1] if i + 1 < len(argv) else ""
+            mode = following if following in PROFILE_MODES else "cpu"
+            del argv[i:i + 1 + (mode == following)]
+            break
+        if arg.startswith("--profile="):
+            mode = arg.split("=", 1)[1]
+            del argv[i]
+            break
+    if mode is None:
+        mode = os.environ.get(PROFILE_ENV, "").strip().lower() or None
+    if mode in (None, "0", "off", "none"):
+        return None
+    if mode not in PROFILE_MODES:
+        print(f"  [WARN] 不明なプロファイルモード {mode!r}（cpu / mem）。プロファイルなしで実行します")
+        return None
+    return mode
+
+
+def _output_path(script: str, suffix: str) -> Path:
+    directory = Path(os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{script}-{datetime.now(JST):%Y%m%d-%H%M%S}{suffix}"
+
+
+def _top() -> int:
+    try:
+        return max(1, int(os.environ.get(PROFILE_TOP_ENV, DEFAULT_TOP)))
+    except ValueError:
+        return DEFAULT_TOP
+
+
+def _run_cpu(main: Callable[[], Any], script: str) -> Any:
+    # プロファイラは使うときだけ読み込む（通常実行の起動を軽くする）
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(main)
+    finally:
+        prof_path = _output_path(script, ".prof")
+        profiler.dump_stats(str(prof_path))
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_top())
+        prof_path.with_suffix(".txt").write_text(text.getvalue(), encoding="utf-8")
+        print(f"  → CPUプロファイル: {prof_path}", file=sys.stderr)
+
+
+class _MemoryBoundaries:
+    """tracemalloc snapshots at the first end of each instrumentation span."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.snapshots: List[Tuple[str, float, tracemalloc.Snapshot]] = []
+        self.levels: List[Tuple[str, float, int, int]] = []
+        self._seen: set = set()
+
+    def __call__(self, name: str) -> None:
+        if name in self._seen:
+            return
+        self._seen.add(name)
+        self.mark(name)
+
+    def mark(self, name: str) -> None:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        elapsed = time.perf_counter() - self.started
+        self.levels.append((name, elapsed, current, peak))
+        self.snapshots.append((name, elapsed, tracemalloc.take_snapshot()))
+
+    def report(self, script: str, top: int) -> str:
+        lines = [f"# {script} memory profile (tracemalloc, top {top})", "",
+                 "## traced memory at stage boundaries",
+                 f"{'seconds':>9}  {'current MiB':>11}  {'peak MiB':>9}  stage"]
+        for name, elapsed, current, peak in self.levels:
+            lines.append(f"{elapsed:9.3f}  {current / 2**20:11.2f}  {peak / 2**20:9.2f}  {name}")
+        previous: Optional[tracemalloc.Snapshot] = None
+        for name, elapsed, snapshot in self.snapshots:
+            if previous is not None:
+                lines += ["", f"## growth until {name} ({elapsed:.3f}s)"]
+                lines += [str(diff) for diff in snapshot.compare_to(previous, "lineno")[:top]]
+            previous = snapshot
+        if self.snapshots:
+            name, elapsed, snapshot = self.snapshots[-1]
+            lines += ["", f"## top allocation sites at {name} ({elapsed:.3f}s)"]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+        return "\n".join(lines) + "\n"
+
+
+def _run_mem(main: Callable[[], Any], script: str) -> Any:
+    import tracemalloc
+
+    boundaries = _MemoryBoundaries()
+    tracemalloc.start()
+    instrumentation.metrics.set_listener(boundaries)
+    try:
+        return main()
+    finally:
+        instrumentation.metrics.set_listener(None)
+        boundaries.mark("exit")
+        tracemalloc.stop()
+        path = _output_path(script, "-mem.txt")
+        path.write_text(boundaries.report(script, _top()), encoding="utf-8")
+        print(f"  → メモリプロファイル: {path}", file=sys.stderr)
+
+
+_RUNNERS: Dict[str, Callable[[Callable[[], Any], str], Any]] = {"cpu": _run_cpu, "mem": _run_mem}
+
+
+def run_profiled(main: Callable[[], Any], script: str) -> Any:
+    """Run ``main()``, under the profiler selected by ``--profile``/``WX_PROFILE`` if any."""
+    mode = take_profile_mode(sys.argv)
+    if mode is None:
+        return main()
+    return _RUNNERS[mode](main, script)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Constant-time range statistics over ``DailySeries`` columns.
+
+Report generation asks the same history for many overlapping windows: the
+period itself, the previous week/month and year, the last four weeks, the weeks
+of a month and up to nine same-period baselines.  ``RangeStats`` answers count,
+mean and sample stdev of a column over any union of row index ranges from prefix
+sums, and range max/min from sparse tables.
+
+The prefix sums are exact integers: every value of a column is scaled by the
+column's largest power-of-two denominator (floats are dyadic rationals), so sums
+and sums of squares never round.  ``mean`` and ``stdev`` therefore return the
+same float as ``statistics.mean``/``statistics.stdev`` over the same values —
+reports stay byte-identical.  Sparse tables hold row indices and keep the
+earliest row among equal values, like ``next(r for r in rows if r == max(...))``.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+Ranges = Sequence[Tuple[int, int]]
+
+
+def _isqrt_rto(numerator: int, denominator: int) -> int:
+    """``sqrt(numerator / denominator)`` as an integer, rounded to odd."""
+    root = math.isqrt(numerator // denominator)
+    return root | (root * root * denominator != numerator)
+
+
+def _sqrt_of_frac(numerator: int, denominator: int) -> float:
+    """Correctly rounded ``sqrt(numerator / denominator)``, computed as ``statistics`` does."""
+    # 仮数 53bit の2倍 + 3bit を残して round-to-odd で求め、float への変換で1回だけ丸める
+    shift = (numerator.bit_length() - denominator.bit_length() - 109) // 2
+    if shift >= 0:
+        return (_isqrt_rto(numerator, denominator << 2 * shift) << shift) / 1
+    return _isqrt_rto(numerator << -2 * shift, denominator) / (1 << -shift)
+
+
+class _Prefix:
+    __slots__ = ("scale", "counts", "sums", "squares")
+
+    def __init__(self, column: Sequence[float]):
+        ratios = [value.as_integer_ratio() for value in column if value == value]
+        self.scale = max((den for _, den in ratios), default=1)
+        self.counts = array('l', [0])
+        self.sums: List[int] = [0]
+        self.squares: List[int] = [0]
+        count = total = squares = 0
+        for value in column:
+            if value == value:
+                num, den = value.as_integer_ratio()
+                scaled = num * (self.scale // den)
+                count += 1
+                total += scaled
+                squares += scaled * scaled
+            self.counts.append(count)
+            self.sums.append(total)
+            self.squares.append(squares)
+
+    def totals(self, ranges: Ranges) -> Tuple[int, int, int]:
+        count = total = squares = 0
+        for lo, hi in ranges:
+            count += self.counts[hi] - self.counts[lo]
+            total += self.sums[hi] - self.sums[lo]
+            squares += self.squares[hi] - self.squares[lo]
+        return count, total, squares
+
+
+class _SparseTable:
+    """Row index of the first maximum (or minimum) over any ``[lo, hi)``."""
+
+    __slots__ = ("keys", "levels")
+
+    def __init__(self, column: Sequence[float], lowest: bool):
+        # 最小は符号反転して最大として扱い、欠損は選ばれないよう -inf に置き換える
+        self.keys = [(-value if lowest else value) if value == value else -math.inf for value in column]
+        keys = self.keys
+        level = array('l', range(len(keys)))
+        self.levels = [level]
+        width = 1
+        while width * 2 <= len(keys):
+            prev = level
+            level = array('l', (
+                a if keys[a] >= keys[b] else b
+                for a, b in zip(prev, prev[width:])
+            ))
+            self.levels.append(level)
+            width *= 2
+
+    def query(self, lo: int, hi: int) -> int:
+        k = (hi - lo).bit_length() - 1
+        level = self.levels[k]
+        a, b = level[lo], level[hi - (1 << k)]
+        return a if self.keys[a] >= self.keys[b] else b
+
+
+class RangeStats:
+    """Prefix sums and sparse tables over named float columns (NaN = missing).
+
+    ``ranges`` are half-open row index ranges, read in order as one concatenated
+    selection; ties in ``argmax``/``argmin`` go to the earliest row of that order.
+    Each column's structures are built the first time it is queried.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence[float]]):
+        self.columns = columns
+        self._prefix: Dict[str, _Prefix] = {}
+        self._tables: Dict[Tuple[str, bool], _SparseTable] = {}
+
+    def prime(self, maxima: Sequence[str] = (), minima: Sequence[str] = ()) -> "RangeStats":
+        """Build every prefix sum and the named max/min tables up front."""
+        for name in self.columns:
+            self._prefix_of(name)
+        for name in maxima:
+            self._table(name, lowest=False)
+        for name in minima:
+            self._table(name, lowest=True)
+        return self
+
+    def _prefix_of(self, name: str) -> _Prefix:
+        prefix = self._prefix.get(name)
+        if prefix is None:
+            prefix = self._prefix[name] = _Prefix(self.columns[name])
+        return prefix
+
+    def _table(self, name: str, lowest: bool) -> _SparseTable:
+        table = self._tables.get((name, lowest))
+        if table is None:
+            table = self._tables[(name, lowest)] = _SparseTable(self.columns[name], lowest)
+        return table
+
+    def count(self, name: str, ranges: Ranges) -> int:
+        """Number of non-missing values."""
+        return self._prefix_of(name).totals(ranges)[0]
+
+    def mean(self, name: str, ranges: Ranges) -> Optional[float]:
+        prefix = self._prefix_of(name)
+        count, total, _ = prefix.totals(ranges)
+        if not count:
+            return None
+        return total / (count * prefix.scale)
+
+    def stdev(self, name: str, ranges: Ranges) -> Optional[float]:
+        """Sample standard deviation (``None`` below two values)."""
+        prefix = self._prefix_of(name)
+        count, total, squares = prefix.totals(ranges)
+        if count < 2:
+            return None
+        # 分散 = (nΣx² − (Σx)²) / (n(n−1)·scale²) を整数のまま平方根まで求める
+        return _sqrt_of_frac(count * squares - total * total, count * (count - 1) * prefix.scale ** 2)
+
+    def _arg(self, name: str, ranges: Ranges, lowest: bool) -> Optional[int]:
+        table = self._table(name, lowest)
+        best = None
+        for lo, hi in ranges:
+            if hi <= lo:
+                continue
+            index = table.query(lo, hi)
+            if best is None or table.keys[index] > table.keys[best]:
+                best = index
+        if best is None or table.keys[best] == -math.inf:
+            return None
+        return best
+
+    def argmax(self, name: str, ranges: Ranges) -> Optional[int]:
+        """Row of the first maximum value (``None`` if every value is missing)."""
+        return self._arg(name, ranges, lowest=False)
+
+    def argmin(self, name: str, ranges: Ranges) -> Optional[int]:
+        """Row of the first minimum value (``None`` if every value is missing)."""
+        return self._arg(name, ranges, lowest=True)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Sorted-sample rank index for percentile and rank queries.
+
+Percentiles and ranks used to be linear counts (``sum(1 for v in values if v <
+x)``) over the whole sample on every query — once per report over the entire
+Daily history in a backfill.  ``RankIndex`` keeps one sorted copy of the sample
+and answers "how many below / above ``x``", "fraction below ``x``" and the
+warmest/coldest rank of ``x`` by bisection in O(log n).  Counts use the same
+strict comparisons as the linear versions, so results are identical.
+
+``insert`` adds a new observation in place (``bisect.insort``: an O(log n)
+search plus one memmove), so a long-lived index can follow an append-only
+series without being rebuilt.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, List
+
+
+class RankIndex:
+    """Sorted values (NaN-free) with bisection-based rank queries."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[float] = ()):
+        self.values: List[float] = sorted(values)
+
+    @classmethod
+    def from_sorted(cls, values: List[float]) -> "RankIndex":
+        """Wrap an already ascending list without copying or re-sorting it."""
+        index = cls()
+        index.values = values
+        return index
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def insert(self, value: float) -> None:
+        insort(self.values, value)
+
+    def below(self, value: float) -> int:
+        """Number of values strictly below ``value``."""
+        return bisect_left(self.values, value)
+
+    def above(self, value: float) -> int:
+        """Number of values strictly above ``value``."""
+        return len(self.values) - bisect_right(self.values, value)
+
+    def fraction_below(self, value: float) -> float:
+        return self.below(value) / len(self.values)
+
+    def rank_warmest(self, value: float) -> int:
+        """1-based rank of ``value`` counted from the top (ties share the best rank)."""
+        return 1 + self.above(value)
+
+    def rank_coldest(self, value: float) -> int:
+        """1-based rank of ``value`` counted from the bottom (ties share the best rank)."""
+        return 1 + self.below(value)
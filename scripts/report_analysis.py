@@ -12,11 +12,16 @@ from __future__ import annotations
 import hashlib
 import json
 import math
+import os
 import statistics
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
+import instrumentation
+from rank_index import RankIndex
+
 
 JST = timezone(timedelta(hours=9))
 ANALYSIS_PROTOCOL_VERSION = "3.2"
@@ -91,35 +96,219 @@ def report_completeness(report: Dict[str, Any], today: Optional[date] = None) ->
     }
 
 
+FINGERPRINT_SECTIONS = ("statistics", "daily_data", "comparison", "baseline", "events")
+
+
+class Report(dict):
+    """A report dict that keeps the canonical JSON of its fingerprint sections.
+
+    The encoded pieces live in an attribute, so the report still dumps to exactly
+    the same JSON as a plain dict.  They are reused until invalidated: writes to
+    ``analysis_context`` or to a fingerprinted section after the report has been
+    fingerprinted must go through ``set_analysis_context`` / ``set_section_comment``
+    or be followed by ``invalidate_fingerprint``.  Plain dicts (e.g. reports read
+    back from disk) are always encoded in full.
+    """
+
+    __slots__ = ("fingerprint_parts",)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.fingerprint_parts: Dict[str, bytes] = {}
+
+
+def invalidate_fingerprint(report: Dict[str, Any], *names: str) -> None:
+    """Drop the cached JSON of the named basis entries (all of them if none given)."""
+    if not isinstance(report, Report):
+        return
+    if names:
+        for name in names:
+            report.fingerprint_parts.pop(name, None)
+    else:
+        report.fingerprint_parts.clear()
+
+
+def set_analysis_context(report: Dict[str, Any], context: Dict[str, Any]) -> None:
+    report["analysis_context"] = context
+    invalidate_fingerprint(report, "analysis_context")
+
+
+def set_section_comment(report: Dict[str, Any], key: str, comment: str) -> None:
+    report.setdefault("sections", {}).setdefault(key, {})["ai_comment"] = comment
+    invalidate_fingerprint(report, key)
+
+
+def _canonical_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+@instrumentation.timed("fingerprint")
 def analysis_fingerprint(report: Dict[str, Any]) -> str:
+    """Digest of everything the analysis is based on.
+
+    Equal to SHA-256 of the sorted-key JSON of the basis dict.  The pieces are
+    hashed in key order, and for a ``Report`` the large ones are kept in
+    ``fingerprint_parts``, so re-fingerprinting only encodes the entries
+    invalidated since.
+    """
     sections = report.get("sections", {})
     basis = {
         "type": report.get("type"),
         "period": report.get("period"),
-        "statistics": sections.get("statistics"),
-        "daily_data": sections.get("daily_data"),
-        "comparison": sections.get("comparison"),
-        "baseline": sections.get("baseline"),
-        "events": sections.get("events"),
         "analysis_context": report.get("analysis_context"),
     }
-    raw = json.dumps(basis, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+    for name in FINGERPRINT_SECTIONS:
+        basis[name] = sections.get(name)
+    parts = report.fingerprint_parts if isinstance(report, Report) else None
+    digest = hashlib.sha256()
+    separator = b"{"
+    for name in sorted(basis):
+        if parts is None or name in ("type", "period"):
+            encoded = _canonical_json(basis[name])
+        else:
+            encoded = parts.get(name)
+            if encoded is None:
+                encoded = parts[name] = _canonical_json(basis[name])
+        digest.update(separator + f'"{name}":'.encode("utf-8") + encoded)
+        separator = b","
+    digest.update(b"}")
+    return digest.hexdigest()[:20]
+
+
+REFERENCE_INDEX_NAME = ".reference_index.json"
+REFERENCE_INDEX_VERSION = 2
+REFERENCE_STAT_KEYS = ("avg_temp", "max_temp", "min_temp", "avg_daily_range")
+
+
+def compact_reference(report: Dict[str, Any], filename: str) -> Dict[str, Any]:
+    """Reduce a report to the fields ``build_analysis_context`` reads from references."""
+    stats = report.get("sections", {}).get("statistics", {})
+    return {
+        "type": report.get("type"),
+        "period": report.get("period", {}),
+        "sections": {"statistics": {key: stats.get(key) for key in REFERENCE_STAT_KEYS if key in stats}},
+        "_reference_file": filename,
+    }
+
+
+def _file_stamp(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _index_entry(path: Path, data: bytes, report: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "stamp": _file_stamp(path),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "report": compact_reference(report, path.name),
+    }
+
+
+def _read_reference_index(reports_root: Path) -> Dict[str, Any]:
+    try:
+        index = json.loads((reports_root / REFERENCE_INDEX_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != REFERENCE_INDEX_VERSION:
+        return {}
+    return index.get("files", {})
+
+
+def _write_reference_index(reports_root: Path, files: Dict[str, Any]) -> None:
+    path = reports_root / REFERENCE_INDEX_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        tmp_path.write_text(
+            json.dumps({"version": REFERENCE_INDEX_VERSION, "files": files}, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+    except OSError:
+        # The index is only a cache; the next load rebuilds whatever is missing.
+        pass
+
+
+class ReferenceIndex:
+    """``reports/.reference_index.json`` held in memory for one run.
+
+    ``load`` scans the report files once, reusing the compact entry of every
+    unchanged file; ``record`` replaces the entry of a file the run has just
+    written.  Both only change the in-memory copy, and ``flush`` writes the index
+    once (if anything changed), so a run that saves N reports rewrites it once
+    rather than N times.
+
+    Entries are matched by content: each carries the SHA-256 of the file, with
+    mtime and size as a fast path.  A fresh checkout gives every file a new
+    mtime, so on Actions (where the workflows restore the git-ignored index
+    with the ``.cache`` step) the files are hashed again but not re-parsed.
+    """
+
+    def __init__(self, reports_root: Path):
+        self.reports_root = Path(reports_root)
+        self.files: Dict[str, Any] = _read_reference_index(self.reports_root)
+        self.dirty = False
+
+    @instrumentation.timed("references")
+    def load(self) -> List[Dict[str, Any]]:
+        """Return compact reference reports, parsing only files whose content changed.
+
+        Files whose mtime and size still match their entry are not read at all;
+        the others are hashed and parsed only when the digest differs.  Vanished
+        files drop out of the index.
+        """
+        files: Dict[str, Any] = {}
+        reports: List[Dict[str, Any]] = []
+        for report_type in ("weekly", "monthly"):
+            for path in sorted((self.reports_root / report_type).glob("*.json")):
+                relative = f"{report_type}/{path.name}"
+                try:
+                    entry = self.files.get(relative)
+                    stamp = _file_stamp(path)
+                    if not entry or entry.get("stamp") != stamp:
+                        data = path.read_bytes()
+                        if entry and entry.get("sha256") == hashlib.sha256(data).hexdigest():
+                            entry = {**entry, "stamp": stamp}
+                        else:
+                            entry = _index_entry(path, data, json.loads(data))
+                except (OSError, ValueError):
+                    continue
+                files[relative] = entry
+                reports.append(entry["report"])
+        if files != self.files:
+            self.files = files
+            self.dirty = True
+        return reports
+
+    def record(self, path: Path, report: Dict[str, Any]) -> None:
+        """Index a just-written report file so the next load does not re-parse it."""
+        try:
+            entry = _index_entry(path, path.read_bytes(), report)
+        except OSError:
+            return
+        self.files[f"{path.parent.name}/{path.name}"] = entry
+        self.dirty = True
+
+    def flush(self) -> None:
+        if self.dirty:
+            _write_reference_index(self.reports_root, self.files)
+            self.dirty = False
 
 
 def load_reference_reports(reports_root: Path) -> List[Dict[str, Any]]:
-    reports: List[Dict[str, Any]] = []
-    for report_type in ("weekly", "monthly"):
-        for path in sorted((reports_root / report_type).glob("*.json")):
-            try:
-                report = json.loads(path.read_text(encoding="utf-8"))
-                report["_reference_file"] = path.name
-                reports.append(report)
-            except (OSError, json.JSONDecodeError):
-                continue
+    """Load the compact references under ``reports_root`` and persist the refreshed index."""
+    index = ReferenceIndex(reports_root)
+    reports = index.load()
+    index.flush()
     return reports
 
 
+def update_reference_index(reports_root: Path, path: Path, report: Dict[str, Any]) -> None:
+    """Record one just-written report file (runs saving many files use ``ReferenceIndex``)."""
+    index = ReferenceIndex(reports_root)
+    index.record(path, report)
+    index.flush()
+
+
 def _longest_streak(values: List[float], predicate) -> int:
     longest = current = 0
     for value in values:
@@ -222,37 +411,119 @@ def _period_row(report: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     }
 
 
+class ReferenceLookup:
+    """Reference reports indexed for ``build_analysis_context``.
+
+    Rows are deduplicated by report key (first valid occurrence wins), grouped by
+    ``(type, slot)`` for same-season peers and kept sorted by start date per type
+    for the preceding periods, so a context build is a dict lookup plus a bisect.
+    Whether a peer period has closed is still decided at query time.
+    """
+
+    def __init__(self, reference_reports: Iterable[Dict[str, Any]] = ()):
+        self.reports = list(reference_reports)
+        self._by_slot: Dict[tuple, List[tuple]] = {}
+        self._by_type: Dict[Any, List[Dict[str, Any]]] = {}
+        self._indexed: Dict[str, Dict[str, Any]] = {}
+        for candidate in self.reports:
+            self._index(candidate, None)
+        for peers in self._by_slot.values():
+            peers.sort(key=lambda peer: peer[0]["start_date"])
+        self._starts: Dict[Any, List[str]] = {}
+        for report_type, rows in self._by_type.items():
+            rows.sort(key=lambda row: row["start_date"])
+            self._starts[report_type] = [row["start_date"] for row in rows]
+
+    def _index(self, candidate: Dict[str, Any], starts: Optional[Dict[Any, List[str]]]) -> None:
+        """Index ``candidate``'s row; with ``starts`` the sorted lists are kept sorted."""
+        row = _period_row(candidate)
+        if not row or row["key"] in self._indexed:
+            return
+        self._indexed[row["key"]] = candidate
+        report_type = candidate.get("type")
+        end = _parse_date(candidate.get("period", {}).get("end_date"))
+        peers = self._by_slot.setdefault((report_type, _period_slot(candidate)), [])
+        rows = self._by_type.setdefault(report_type, [])
+        if starts is None:
+            peers.append((row, end))
+            rows.append(row)
+            return
+        type_starts = starts.setdefault(report_type, [])
+        position = bisect_right(type_starts, row["start_date"])
+        type_starts.insert(position, row["start_date"])
+        rows.insert(position, row)
+        peers.insert(bisect_right([peer[0]["start_date"] for peer in peers], row["start_date"]), (row, end))
+
+    def _unindex(self, candidate: Dict[str, Any]) -> None:
+        row = _period_row(candidate)
+        if not row or self._indexed.get(row["key"]) is not candidate:
+            return
+        del self._indexed[row["key"]]
+        report_type = candidate.get("type")
+        peers = self._by_slot[(report_type, _period_slot(candidate))]
+        peers[:] = [peer for peer in peers if peer[0]["key"] != row["key"]]
+        rows = self._by_type[report_type]
+        position = next(i for i, existing in enumerate(rows) if existing["key"] == row["key"])
+        del rows[position]
+        del self._starts[report_type][position]
+
+    def update(self, reference: Dict[str, Any]) -> None:
+        """Replace the entry read from the same report file (or add it), as reloading reports/ would.
+
+        A backfill calls this after writing each report so that later periods see
+        the report just written rather than the version on disk when it started.
+        """
+        source = (reference.get("type"), reference.get("_reference_file"))
+        for position, existing in enumerate(self.reports):
+            if (existing.get("type"), existing.get("_reference_file")) == source:
+                self.reports[position] = reference
+                self._unindex(existing)
+                break
+        else:
+            self.reports.append(reference)
+        self._index(reference, self._starts)
+
+    @classmethod
+    def ensure(cls, reference_reports: Any) -> "ReferenceLookup":
+        """Return ``reference_reports`` as a lookup, indexing plain lists on the fly."""
+        return reference_reports if isinstance(reference_reports, cls) else cls(reference_reports or ())
+
+    def __iter__(self):
+        return iter(self.reports)
+
+    def __len__(self) -> int:
+        return len(self.reports)
+
+    def same_slot(self, report_type: Any, slot: Optional[int], exclude_key: str,
+                  today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Closed periods sharing ``slot``, oldest first."""
+        today = today or datetime.now(JST).date()
+        return [
+            dict(row) for row, end in self._by_slot.get((report_type, slot), ())
+            if row["key"] != exclude_key and end and end < today
+        ]
+
+    def preceding(self, report_type: Any, start: date, count: int) -> List[Dict[str, Any]]:
+        """Up to ``count`` periods starting before ``start``, newest first."""
+        rows = self._by_type.get(report_type, [])
+        stop = bisect_left(self._starts.get(report_type, []), start.isoformat())
+        return [dict(row) for row in reversed(rows[max(0, stop - count):stop])]
+
+
+@instrumentation.timed("context")
 def build_analysis_context(
     report: Dict[str, Any],
-    reference_reports: Optional[List[Dict[str, Any]]] = None,
+    reference_reports: Optional[Iterable[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """Derive auditable facts used by both local and Gemini narratives."""
-    reference_reports = reference_reports or []
+    lookup = ReferenceLookup.ensure(reference_reports)
     report_type = report.get("type")
-    current_key = _report_key(report)
     current_row = _period_row(report)
     current_start = _parse_date(report.get("period", {}).get("start_date"))
     slot = _period_slot(report)
 
-    comparable = []
-    recent = []
-    seen = set()
-    for candidate in reference_reports:
-        if candidate.get("type") != report_type or _report_key(candidate) == current_key:
-            continue
-        row = _period_row(candidate)
-        if not row or row["key"] in seen:
-            continue
-        seen.add(row["key"])
-        candidate_start = _parse_date(row["start_date"])
-        if _period_slot(candidate) == slot and report_completeness(candidate).get("period_closed"):
-            comparable.append(row)
-        if current_start and candidate_start and candidate_start < current_start:
-            recent.append(row)
-
-    comparable.sort(key=lambda row: row["start_date"])
-    recent.sort(key=lambda row: row["start_date"], reverse=True)
-    recent = recent[:4]
+    comparable = lookup.same_slot(report_type, slot, _report_key(report))
+    recent = lookup.preceding(report_type, current_start, 4) if current_start else []
 
     seasonal: Dict[str, Any] = {
         "slot": slot,
@@ -262,14 +533,15 @@ def build_analysis_context(
     if current_row:
         sample = comparable + [current_row]
         averages = [row["avg_temp"] for row in sample]
+        ranks = RankIndex(averages)
         peer_average = _mean(row["avg_temp"] for row in comparable)
         seasonal.update({
             "sample_count_including_current": len(sample),
             "years": sorted({row["year"] for row in sample}),
             "peer_average": round(peer_average, 2) if peer_average is not None else None,
             "deviation_from_peer_average": round(current_row["avg_temp"] - peer_average, 2) if peer_average is not None else None,
-            "rank_warmest": 1 + sum(value > current_row["avg_temp"] for value in averages),
-            "rank_coldest": 1 + sum(value < current_row["avg_temp"] for value in averages),
+            "rank_warmest": ranks.rank_warmest(current_row["avg_temp"]),
+            "rank_coldest": ranks.rank_coldest(current_row["avg_temp"]),
             "sample_min": min(averages),
             "sample_max": max(averages),
             "sample_stdev": round(statistics.pstdev(averages), 2) if len(averages) > 1 else 0.0,
@@ -298,7 +570,7 @@ def enrich_analysis_context(
     report: Dict[str, Any],
     reference_reports: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
-    report["analysis_context"] = build_analysis_context(report, reference_reports)
+    set_analysis_context(report, build_analysis_context(report, reference_reports))
     return report
 
 
@@ -583,6 +855,7 @@ def _trend_comment(report: Dict[str, Any], context: Dict[str, Any]) -> str:
     return "".join(pieces)
 
 
+@instrumentation.timed("analysis.local")
 def generate_evidence_analysis(
     report: Dict[str, Any],
     source: str = "local",
@@ -624,7 +897,7 @@ def mark_report_as_draft(
     """Keep draft metrics and charts while explicitly suppressing narrative analysis."""
     enrich_analysis_context(report, reference_reports)
     for key in VALID_ANALYSIS_KEYS:
-        report.setdefault("sections", {}).setdefault(key, {})["ai_comment"] = ""
+        set_section_comment(report, key, "")
     report["analysis_meta"] = {
         "source": "draft",
         "analysis_available": False,
@@ -637,10 +910,9 @@ def mark_report_as_draft(
 
 
 def apply_analysis(report: Dict[str, Any], bundle: Dict[str, Any]) -> Dict[str, Any]:
-    sections = report.setdefault("sections", {})
     comments = bundle.get("comments", {})
     for key in VALID_ANALYSIS_KEYS:
-        sections.setdefault(key, {})["ai_comment"] = str(comments.get(key, "")).strip()
+        set_section_comment(report, key, str(comments.get(key, "")).strip())
     report["analysis_meta"] = bundle.get("analysis_meta", {})
     return report
 
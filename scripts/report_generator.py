@@ -8,39 +8,54 @@ Usage (日付省略時は直近の完了期間を生成):
     python scripts/report_generator.py --type monthly
     python scripts/report_generator.py --type weekly --date 2025-06-15
     python scripts/report_generator.py --type monthly --date 2025-06
-    python scripts/report_generator.py --backfill [--no-ai]
+    python scripts/report_generator.py --backfill [--no-ai] [--jobs N] [--incremental]
 """
 
 import os
 import sys
+import csv
+import io
 import json
+import hashlib
 import math
 import argparse
 import statistics
-import requests
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date
-from typing import Dict, Any, List, Optional, Tuple
+from functools import cached_property
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from pathlib import Path
 
 from report_analysis import (
+    ANALYSIS_PROTOCOL_VERSION,
     JST,
+    ReferenceIndex,
+    ReferenceLookup,
+    Report,
     analysis_fingerprint,
     apply_analysis,
     build_gemini_protocol_prompt,
+    compact_reference,
     enrich_analysis_context,
     generate_evidence_analysis,
     load_reference_reports,
     mark_report_as_draft,
     parse_gemini_analysis,
     report_completeness,
+    set_section_comment,
+    update_reference_index,
 )
-
-# .env ファイルから環境変数を読み込み
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
-
-from google import genai
+import instrumentation
+from profiling import run_profiled
+from rank_index import RankIndex
+from climatology import Climatology
+from daily_cache import DailySheetCache
+from daily_series import DailyRecord, DailySeries, parse_date
+from gviz_client import get_client
+import gemini_client
+
+# .env ファイルから環境変数を読み込み（ファイルがあるときだけ。Gemini SDK は初回呼び出しで読み込む）
+gemini_client.load_env()
 
 # =============================================================================
 # 設定
@@ -70,127 +85,189 @@ WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
 # データ取得
 # =============================================================================
 
-def fetch_raw_for_date(date_str: str) -> Optional[Dict]:
+# 1クエリに含める日付範囲の上限（URL長を抑えるため、超える場合は分割する）
+RAW_QUERY_MAX_RANGES = 20
+
+
+def _consecutive_date_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """昇順の日付列を連続する区間 (開始, 終了) にまとめる"""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _raw_temps_by_date(rows: Iterable[List[str]]) -> Dict[date, List[float]]:
+    """Raw クエリ結果の行（日付, 気温, 湿度。先頭はヘッダー）を日付ごとの有効気温リストにまとめる"""
+    temps: Dict[date, List[float]] = {}
+    reader = iter(rows)
+    next(reader, None)  # ヘッダースキップ
+    for row in reader:
+        if len(row) < 3:
+            continue
+        day = parse_date(row[0].strip())
+        if not day:
+            continue
+        try:
+            temp = float(row[1].strip())
+            humid = float(row[2].strip()) if row[2].strip() else None
+        except ValueError:
+            continue
+        # センサーエラー判定: 気温0.0 かつ 湿度0（または湿度なし）
+        if temp == 0.0 and (humid is not None and humid == 0.0):
+            continue  # エラーレコードを除外
+        temps.setdefault(day, []).append(temp)
+    return temps
+
+
+@instrumentation.timed('fetch.raw')
+def fetch_raw_for_dates(date_strs: List[str]) -> Dict[str, Dict]:
     """
-    特定の日のRawデータを取得し、センサーエラー（気温0.0℃ かつ 湿度0%）を
-    除外した上で正しい Max/Min/Avg を再計算する。
+    複数日のRawデータをまとめて取得し、センサーエラー（気温0.0℃ かつ 湿度0%）を
+    除外した上で日ごとに正しい Max/Min/Avg を再計算する。
+
+    連続する日付は1つの範囲条件にまとめ、RAW_QUERY_MAX_RANGES 区間ごとに
+    1クエリで取得するため、問い合わせ回数は修正対象の日数によらずほぼ一定になる。
 
     Args:
-        date_str: 'YYYY/MM/DD' 形式の日付文字列
+        date_strs: 'YYYY/MM/DD' 形式の日付文字列のリスト
 
     Returns:
-        {'high': float, 'low': float, 'avg': float} or None（有効データなし）
+        {date_str: {'high': float, 'low': float, 'avg': float}}（有効データのある日のみ）
     """
-    # 'YYYY/MM/DD' → 'YYYY-MM-DD' に変換（Raw シートの日付形式に合わせる）
-    raw_date = date_str.replace('/', '-')
+    requested: Dict[date, List[str]] = {}
+    for date_str in date_strs:
+        day = parse_date(date_str)
+        if day:
+            requested.setdefault(day, []).append(date_str)
+    if not requested:
+        return {}
 
-    base_url = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/gviz/tq"
-    # A列はDatetimeとして認識されているため toDate(A) で比較する
-    query = f"select B, C where toDate(A) = date '{raw_date}'"
-    params = {'tqx': 'out:csv', 'sheet': 'Raw', 'tq': query}
+    client = get_client(SPREADSHEET_ID)
+    ranges = _consecutive_date_ranges(sorted(requested))
+    temps: Dict[date, List[float]] = {}
+    for i in range(0, len(ranges), RAW_QUERY_MAX_RANGES):
+        chunk = ranges[i:i + RAW_QUERY_MAX_RANGES]
+        # A列はDatetimeとして認識されているため toDate(A) で比較し、日付列の書式を固定して返させる
+        predicate = ' or '.join(
+            f"toDate(A) = date '{start}'" if start == end
+            else f"(toDate(A) >= date '{start}' and toDate(A) <= date '{end}')"
+            for start, end in chunk
+        )
+        query = f"select toDate(A), B, C where {predicate} format toDate(A) 'yyyy-MM-dd'"
+        try:
+            chunk_temps = _raw_temps_by_date(client.iter_csv('Raw', query, timeout=60))
+        except Exception as e:
+            print(f"    ⚠ Raw データ取得失敗 ({chunk[0][0]}〜{chunk[-1][1]}): {e}")
+            continue
+        for day, values in chunk_temps.items():
+            if day in requested:
+                temps.setdefault(day, []).extend(values)
 
-    try:
-        resp = requests.get(base_url, params=params, timeout=60)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"    ⚠ Raw データ取得失敗 ({date_str}): {e}")
-        return None
+    corrected: Dict[str, Dict] = {}
+    for day, valid_temps in temps.items():
+        if not valid_temps:
+            continue
+        values = {
+            'high': round(max(valid_temps), 1),
+            'low': round(min(valid_temps), 1),
+            'avg': round(sum(valid_temps) / len(valid_temps), 1),
+        }
+        for date_str in requested[day]:
+            corrected[date_str] = values
+    return corrected
 
-    lines = resp.text.strip().split('\n')[1:]  # ヘッダースキップ
-    valid_temps = []
 
-    for line in lines:
-        parts = line.replace('"', '').split(',')
-        if len(parts) >= 2:
-            try:
-                temp = float(parts[0].strip())
-                humid = float(parts[1].strip()) if len(parts) > 1 and parts[1].strip() else None
-                # センサーエラー判定: 気温0.0 かつ 湿度0（または湿度なし）
-                if temp == 0.0 and (humid is not None and humid == 0.0):
-                    continue  # エラーレコードを除外
-                valid_temps.append(temp)
-            except ValueError:
-                continue
+def fetch_raw_for_date(date_str: str) -> Optional[Dict]:
+    """
+    特定の日のRawデータを取得し、センサーエラー（気温0.0℃ かつ 湿度0%）を
+    除外した上で正しい Max/Min/Avg を再計算する。
 
-    if not valid_temps:
-        return None
+    Args:
+        date_str: 'YYYY/MM/DD' 形式の日付文字列
 
-    return {
-        'high': round(max(valid_temps), 1),
-        'low': round(min(valid_temps), 1),
-        'avg': round(sum(valid_temps) / len(valid_temps), 1),
-    }
+    Returns:
+        {'high': float, 'low': float, 'avg': float} or None（有効データなし）
+    """
+    return fetch_raw_for_dates([date_str]).get(date_str)
 
 
-def fetch_daily_data() -> List[Dict]:
+def fetch_daily_data() -> List[DailyRecord]:
     """
-    Daily シートから全日別データを取得。
+    Daily シートから全日別データを取得（ローカルキャッシュから差分更新）。
     最高気温または最低気温が 0.0℃ の日は、Raw データから
-    センサーエラーを除外して正しい値を再計算する。
-    Returns: [{'date': '2024/03/15', 'high': 18.5, 'low': 5.2, 'avg': 11.3}, ...]
+    センサーエラーを除外して正しい値を再計算する（対象日はまとめて1回で取得）。
+    Returns: [DailyRecord('2024/03/15', high=18.5, low=5.2, avg=11.3, range=13.3), ...]
     """
-    base_url = f"https://docs.google.com/spreadsheets/d/{SPREADSHEET_ID}/gviz/tq?tqx=out:csv"
-    daily_url = f"{base_url}&sheet=Daily"
+    client = get_client(SPREADSHEET_ID)
 
     print("  → Daily シートからデータ取得中...")
-    resp = requests.get(daily_url, timeout=30)
-    resp.raise_for_status()
-
-    lines = resp.text.strip().split('\n')[1:]  # ヘッダースキップ
+    daily_cache = DailySheetCache(client)
+    with instrumentation.span('fetch.daily'):
+        text = daily_cache.fetch_text(timeout=30)
+    parse_timer = instrumentation.start('parse.daily')
+    rows = csv.reader(io.StringIO(text))
+    next(rows, None)  # ヘッダースキップ
+    mode, fetched = daily_cache.last_refresh
+    print(f"  → Daily キャッシュ: {mode}（{fetched} 行をダウンロード）")
     records = []
-    corrected_count = 0
+    suspects = []
 
-    for line in lines:
-        parts = line.replace('"', '').split(',')
+    for parts in rows:
         if len(parts) >= 3:
             try:
-                day = {
-                    'date': parts[0].strip(),
-                    'high': float(parts[1].strip()) if parts[1].strip() else None,
-                    'low': float(parts[2].strip()) if parts[2].strip() else None,
-                    'avg': round(float(parts[3].strip()), 1) if len(parts) > 3 and parts[3].strip() else None,
-                }
-
-                # センサーエラー疑い: 最高気温または最低気温が 0.0℃
-                if day['high'] == 0.0 or day['low'] == 0.0:
-                    print(f"    ⚠ {day['date']}: 0.0℃検出 (high={day['high']}, low={day['low']}) → Raw で再計算...")
-                    corrected = fetch_raw_for_date(day['date'])
-                    if corrected:
-                        old_high, old_low = day['high'], day['low']
-                        day['high'] = corrected['high']
-                        day['low'] = corrected['low']
-                        day['avg'] = corrected['avg']
-                        corrected_count += 1
-                        print(f"    ✓ 修正: high {old_high}→{day['high']}, low {old_low}→{day['low']}, avg→{day['avg']}")
-                    else:
-                        print(f"    ✗ Raw データなし、元の値を維持")
-
-                # 平均値がない場合は最高と最低から計算
-                if day['avg'] is None and day['high'] is not None and day['low'] is not None:
-                    day['avg'] = round((day['high'] + day['low']) / 2, 1)
-                # 日較差
-                if day['high'] is not None and day['low'] is not None:
-                    day['range'] = round(day['high'] - day['low'], 1)
-                else:
-                    day['range'] = None
-                records.append(day)
+                day = DailyRecord(
+                    parts[0].strip(),
+                    high=float(parts[1].strip()) if parts[1].strip() else None,
+                    low=float(parts[2].strip()) if parts[2].strip() else None,
+                    avg=round(float(parts[3].strip()), 1) if len(parts) > 3 and parts[3].strip() else None,
+                )
             except ValueError:
                 continue
+            # センサーエラー疑い: 最高気温または最低気温が 0.0℃
+            if day.high == 0.0 or day.low == 0.0:
+                print(f"    ⚠ {day.date}: 0.0℃検出 (high={day.high}, low={day.low})")
+                suspects.append(day)
+            records.append(day)
+    parse_timer.stop()
+    instrumentation.count('daily_rows', len(records))
+
+    corrected_count = 0
+    if suspects:
+        print(f"  → {len(suspects)} 日分を Raw でまとめて再計算...")
+        corrections = fetch_raw_for_dates([day.date for day in suspects])
+        for day in suspects:
+            corrected = corrections.get(day.date)
+            if corrected:
+                old_high, old_low = day.high, day.low
+                day.high = corrected['high']
+                day.low = corrected['low']
+                day.avg = corrected['avg']
+                corrected_count += 1
+                print(f"    ✓ {day.date} 修正: high {old_high}→{day.high}, low {old_low}→{day.low}, avg→{day.avg}")
+            else:
+                print(f"    ✗ {day.date}: Raw データなし、元の値を維持")
+        instrumentation.count('raw_corrected_days', corrected_count)
+
+    for day in records:
+        # 平均値がない場合は最高と最低から計算
+        if day.avg is None and day.high is not None and day.low is not None:
+            day.avg = round((day.high + day.low) / 2, 1)
+        # 日較差
+        if day.high is not None and day.low is not None:
+            day.range = round(day.high - day.low, 1)
+        else:
+            day.range = None
 
     print(f"  → {len(records)} 日分のデータを取得（うち {corrected_count} 日を Raw から修正）")
+    timing = client.timing_summary()
+    print(f"  → gviz: {timing['calls']} リクエスト / 通信 {timing['seconds']:.2f} 秒")
     return records
 
 
-def parse_date(date_str: str) -> Optional[date]:
-    """日付文字列をdateオブジェクトに変換（複数フォーマット対応）"""
-    for fmt in ('%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y'):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    return None
-
-
 # =============================================================================
 # 週・月のユーティリティ
 # =============================================================================
@@ -221,14 +298,20 @@ def get_month_range(year: int, month: int) -> Tuple[date, date]:
     return first, last
 
 
-def filter_by_date_range(records: List[Dict], start: date, end: date) -> List[Dict]:
-    """日付範囲でレコードをフィルタ"""
-    result = []
-    for r in records:
-        d = parse_date(r['date'])
-        if d and start <= d <= end:
-            result.append({**r, '_date': d})
-    return result
+def shift_years(d: date, years: int) -> date:
+    """d の years 年前（負なら後）の同日。うるう日は2月28日に寄せる"""
+    try:
+        return d.replace(year=d.year - years)
+    except ValueError:
+        return d.replace(year=d.year - years, day=28)
+
+
+def filter_by_date_range(records: List[Dict], start: date, end: date) -> List[DailyRecord]:
+    """日付範囲でレコードをフィルタ（DailySeries なら二分探索で切り出す）"""
+    if isinstance(records, DailySeries):
+        return records.between(start, end)
+    rows = map(DailyRecord.from_row, records)
+    return [r for r in rows if r.day and start <= r.day <= end]
 
 
 # =============================================================================
@@ -266,6 +349,46 @@ def compute_statistics(records: List[Dict]) -> Dict:
     return stats
 
 
+def compute_range_statistics(series: DailySeries, ranges: List[Tuple[int, int]]) -> Dict:
+    """compute_statistics と同じ統計を、行インデックス範囲（複数なら順に連結）から求める。
+
+    累積和とスパーステーブル（series.range_stats）を引くだけなので、範囲の長さによらず定数時間。
+    """
+    days = sum(hi - lo for lo, hi in ranges)
+    if not days:
+        return {}
+    engine = series.range_stats
+    stats = {
+        'days': days,
+    }
+
+    avg_count = engine.count('avg', ranges)
+    if avg_count:
+        stats['avg_temp'] = round(engine.mean('avg', ranges), 1)
+        stats['avg_temp_stdev'] = round(engine.stdev('avg', ranges), 1) if avg_count > 1 else 0
+    high_at = engine.argmax('high', ranges)
+    if high_at is not None:
+        stats['max_temp'] = round(series.high[high_at], 1)
+        stats['max_temp_date'] = series.records[high_at]['date']
+        stats['avg_high'] = round(engine.mean('high', ranges), 1)
+    low_at = engine.argmin('low', ranges)
+    if low_at is not None:
+        stats['min_temp'] = round(series.low[low_at], 1)
+        stats['min_temp_date'] = series.records[low_at]['date']
+        stats['avg_low'] = round(engine.mean('low', ranges), 1)
+    if engine.count('range', ranges):
+        stats['avg_daily_range'] = round(engine.mean('range', ranges), 1)
+
+    return stats
+
+
+def compute_period_statistics(all_records: List[Dict], start: date, end: date) -> Dict:
+    """start〜end の統計（DailySeries なら累積和から、それ以外は行を絞り込んで計算）"""
+    if isinstance(all_records, DailySeries):
+        return compute_range_statistics(all_records, [all_records.index_range(start, end)])
+    return compute_statistics(filter_by_date_range(all_records, start, end))
+
+
 def compute_trend(values: List[float]) -> Dict:
     """線形回帰でトレンドを計算"""
     n = len(values)
@@ -315,35 +438,21 @@ def compute_comparison(current: Dict, previous: Dict) -> Dict:
     return result
 
 
-def generate_heatmap_data(all_records: List[Dict]) -> Dict:
+def generate_heatmap_data(all_records: List[Dict], climatology: Optional[Climatology] = None) -> Dict:
     """月×年のヒートマップデータを生成（平均/最高/最低）"""
-    avgs:  Dict[str, Dict[str, list]] = {}
-    highs: Dict[str, Dict[str, list]] = {}
-    lows:  Dict[str, Dict[str, list]] = {}
-
-    for r in all_records:
-        d = parse_date(r['date'])
-        if not d:
-            continue
-        year = str(d.year)
-        month = str(d.month)
-        if r.get('avg') is not None:
-            avgs.setdefault(year, {}).setdefault(month, []).append(r['avg'])
-        if r.get('high') is not None:
-            highs.setdefault(year, {}).setdefault(month, []).append(r['high'])
-        if r.get('low') is not None:
-            lows.setdefault(year, {}).setdefault(month, []).append(r['low'])
-
-    all_years = sorted(set(list(avgs.keys()) + list(highs.keys()) + list(lows.keys())))
-    result = {}
-    for year in all_years:
-        result[year] = {}
-        for month in [str(m) for m in range(1, 13)]:
-            avg_val  = round(statistics.mean(avgs[year][month]), 1)  if avgs.get(year, {}).get(month)  else None
-            high_val = round(max(highs[year][month]), 1)              if highs.get(year, {}).get(month) else None  # 月の最高記録
-            low_val  = round(min(lows[year][month]), 1)               if lows.get(year, {}).get(month)  else None  # 月の最低記録
-            if avg_val is not None or high_val is not None or low_val is not None:
-                result[year][month] = {'avg': avg_val, 'high': high_val, 'low': low_val}
+    climatology = climatology or Climatology.from_series(DailySeries.ensure(all_records))
+
+    result: Dict[str, Dict[str, Dict]] = {}
+    for y, m in sorted(climatology.cells):
+        avg_val = climatology.mean('avg', [(y, m)])
+        high_val = climatology.max('high', y, m)  # 月の最高記録
+        low_val = climatology.min('low', y, m)    # 月の最低記録
+        if avg_val is not None or high_val is not None or low_val is not None:
+            result.setdefault(str(y), {})[str(m)] = {
+                'avg': round(avg_val, 1) if avg_val is not None else None,
+                'high': round(high_val, 1) if high_val is not None else None,
+                'low': round(low_val, 1) if low_val is not None else None,
+            }
 
     return result
 
@@ -360,26 +469,20 @@ def detect_season_milestones(all_records: List[Dict]) -> List[Dict]:
         {'label': '初めて氷点下', 'condition': lambda l: l < 0, 'field': 'low', 'season': 'winter'},
     ]
 
-    # 年ごとにマイルストーンを検出
-    by_year = {}
-    for r in all_records:
-        d = parse_date(r['date'])
-        if d:
-            year = d.year
-            if year not in by_year:
-                by_year[year] = []
-            by_year[year].append({**r, '_date': d})
+    # 年ごとにマイルストーンを検出（系列は日付順に並んでいる）
+    series = DailySeries.ensure(all_records)
+    year_ranges = list(series.year_ranges())
 
     results = []
     for milestone in milestones_config:
         entry = {'label': milestone['label']}
-        for year in sorted(by_year.keys()):
-            records = sorted(by_year[year], key=lambda x: x['_date'])
+        column = getattr(series, milestone['field'])
+        for year, lo, hi in year_ranges:
             found = None
-            for r in records:
-                val = r.get(milestone['field'])
-                if val is not None and milestone['condition'](val):
-                    found = r['date']
+            for i in range(lo, hi):
+                val = column[i]
+                if val == val and milestone['condition'](val):
+                    found = series.records[i]['date']
                     break
             entry[str(year)] = found
         results.append(entry)
@@ -387,7 +490,8 @@ def detect_season_milestones(all_records: List[Dict]) -> List[Dict]:
     return results
 
 
-def detect_notable_events(records: List[Dict], all_records: List[Dict]) -> List[Dict]:
+def detect_notable_events(records: List[DailyRecord], all_records: List[Dict],
+                          history: Optional['HistoryContext'] = None) -> List[Dict]:
     """特筆イベントを検出"""
     events = []
 
@@ -395,16 +499,11 @@ def detect_notable_events(records: List[Dict], all_records: List[Dict]) -> List[
         return events
 
     # 全期間の統計
-    all_highs = [r['high'] for r in all_records if r.get('high') is not None]
-    all_lows = [r['low'] for r in all_records if r.get('low') is not None]
-    all_time_high = max(all_highs) if all_highs else None
-    all_time_low = min(all_lows) if all_lows else None
+    history = history or HistoryContext(all_records)
+    all_time_high = history.record_high
+    all_time_low = history.record_low
 
     for i, r in enumerate(records):
-        d = parse_date(r['date'])
-        if not d:
-            continue
-
         high = r.get('high')
         low = r.get('low')
         avg = r.get('avg')
@@ -478,6 +577,72 @@ def detect_notable_events(records: List[Dict], all_records: List[Dict]) -> List[
     return _merge_consecutive_events(events)
 
 
+class HistoryContext:
+    """全履歴だけに依存する集計を、1回の実行につき1度だけ計算して共有する。
+
+    ヒートマップ・季節マイルストーン・観測史上の最高/最低・全期間の平均と標準偏差・
+    月別の平年値は対象期間によらず同じ値になる。バックフィルでは全レポートが
+    同じインスタンスを参照し、各値は最初に使われたときに計算される。
+    """
+
+    def __init__(self, all_records: List[Dict], climatology: Optional[Climatology] = None):
+        self.series = DailySeries.ensure(all_records)
+        if climatology is not None:
+            self.climatology = climatology
+
+    @cached_property
+    def climatology(self) -> Climatology:
+        """月×年の気候値セル（main ではキャッシュから読み込んだものを渡す）"""
+        return Climatology.from_series(self.series)
+
+    @cached_property
+    def heatmap(self) -> Dict:
+        return generate_heatmap_data(self.series, self.climatology)
+
+    @cached_property
+    def milestones(self) -> List[Dict]:
+        return detect_season_milestones(self.series)
+
+    @cached_property
+    def record_high(self) -> Optional[float]:
+        return self.series.max('high')
+
+    @cached_property
+    def record_low(self) -> Optional[float]:
+        return self.series.min('low')
+
+    @cached_property
+    def avgs(self) -> List[float]:
+        return self.series.values('avg')
+
+    @cached_property
+    def avg_rank(self) -> RankIndex:
+        """全期間の日平均気温の順位索引（パーセンタイルを二分探索で求める）"""
+        return RankIndex(self.avgs)
+
+    @cached_property
+    def overall_avg(self) -> Optional[float]:
+        return self.series.range_stats.mean('avg', [(0, len(self.series))])
+
+    @cached_property
+    def overall_stdev(self) -> float:
+        stdev = self.series.range_stats.stdev('avg', [(0, len(self.series))])
+        return stdev if stdev is not None else 0
+
+    def prime(self) -> 'HistoryContext':
+        """全集計を先に計算する（ワーカープロセスへ計算済みの状態で渡すため）"""
+        self.series.range_stats.prime(maxima=('high',), minima=('low',))
+        for name in ('climatology', 'heatmap', 'milestones', 'record_high', 'record_low',
+                     'avg_rank', 'overall_avg', 'overall_stdev', 'month_climatology'):
+            getattr(self, name)
+        return self
+
+    @cached_property
+    def month_climatology(self) -> Dict[int, float]:
+        """月 → 全年の同月日平均気温の平均"""
+        return self.climatology.month_normals('avg')
+
+
 def _merge_consecutive_events(events: List[Dict]) -> List[Dict]:
     """同じtypeのイベントが連続日に発生している場合、1件にまとめる。
     
@@ -541,18 +706,14 @@ def _merge_consecutive_events(events: List[Dict]) -> List[Dict]:
 # Chart.js 用データ生成
 # =============================================================================
 
-def generate_chart_data_weekly(records: List[Dict], prev_year_records: List[Dict]) -> Dict:
+def generate_chart_data_weekly(records: List[DailyRecord], prev_year_records: List[DailyRecord]) -> Dict:
     """週次レポート用のグラフデータ"""
     labels = []
     highs, lows, avgs = [], [], []
 
     for r in records:
-        d = parse_date(r['date'])
-        if d:
-            wd = WEEKDAY_NAMES[d.weekday()]
-            labels.append(f"{d.month}/{d.day}({wd})")
-        else:
-            labels.append(r['date'])
+        d = r.day
+        labels.append(f"{d.month}/{d.day}({WEEKDAY_NAMES[d.weekday()]})")
         highs.append(round(r['high'], 1) if r.get('high') is not None else None)
         lows.append(round(r['low'], 1) if r.get('low') is not None else None)
         avgs.append(round(r['avg'], 1) if r.get('avg') is not None else None)
@@ -584,17 +745,13 @@ def generate_chart_data_weekly(records: List[Dict], prev_year_records: List[Dict
     return chart
 
 
-def _generate_deviation_data(records: List[Dict], baseline_avg: float) -> Dict:
+def _generate_deviation_data(records: List[DailyRecord], baseline_avg: float) -> Dict:
     """偏差チャートデータを生成（各日の平均気温 - baseline平均）"""
     labels = []
     deviations = []
     for r in records:
-        d = parse_date(r['date'])
-        if d:
-            wd = WEEKDAY_NAMES[d.weekday()]
-            labels.append(f"{d.month}/{d.day}({wd})")
-        else:
-            labels.append(r['date'])
+        d = r.day
+        labels.append(f"{d.month}/{d.day}({WEEKDAY_NAMES[d.weekday()]})")
         avg = r.get('avg')
         if avg is not None:
             deviations.append(round(avg - baseline_avg, 1))
@@ -603,17 +760,13 @@ def _generate_deviation_data(records: List[Dict], baseline_avg: float) -> Dict:
     return {'labels': labels, 'deviations': deviations, 'baseline_avg': round(baseline_avg, 1)}
 
 
-def generate_chart_data_monthly(records: List[Dict], prev_year_records: List[Dict]) -> Dict:
+def generate_chart_data_monthly(records: List[DailyRecord], prev_year_records: List[DailyRecord]) -> Dict:
     """月次レポート用のグラフデータ"""
     labels = []
     highs, lows, avgs = [], [], []
 
     for r in records:
-        d = parse_date(r['date'])
-        if d:
-            labels.append(f"{d.day}日")
-        else:
-            labels.append(r['date'])
+        labels.append(f"{r.day.day}日")
         highs.append(round(r['high'], 1) if r.get('high') is not None else None)
         lows.append(round(r['low'], 1) if r.get('low') is not None else None)
         avgs.append(round(r['avg'], 1) if r.get('avg') is not None else None)
@@ -666,16 +819,19 @@ def analyze_report_with_gemini(report: Dict[str, Any]) -> Dict[str, Any]:
         return fallback
 
     try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = gemini_client.get_client(GEMINI_API_KEY)
         _gemini_calls += 1
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=build_gemini_protocol_prompt(report),
-            config={
-                'temperature': 0.2,
-                'response_mime_type': 'application/json',
-            },
-        )
+        instrumentation.count('gemini_calls')
+        prompt = build_gemini_protocol_prompt(report)
+        with instrumentation.span('gemini'):
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt,
+                config={
+                    'temperature': 0.2,
+                    'response_mime_type': 'application/json',
+                },
+            )
         comments = parse_gemini_analysis(response.text)
         fallback['comments'] = comments
         fallback['analysis_meta'].update({
@@ -693,32 +849,33 @@ def analyze_report_with_gemini(report: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def compute_advanced_analytics(all_records: List[Dict], current_stats: Dict,
-                                  target_start: date, target_end: date) -> Dict:
+                                  target_start: date, target_end: date,
+                                  history: Optional[HistoryContext] = None) -> Dict:
     """全期間のデータから高度な分析情報を計算"""
-    all_avgs = [r['avg'] for r in all_records if r.get('avg') is not None]
-    all_highs = [r['high'] for r in all_records if r.get('high') is not None]
-    all_lows = [r['low'] for r in all_records if r.get('low') is not None]
+    history = history or HistoryContext(all_records)
+    series = history.series
+    all_avgs = history.avgs
 
     analytics = {}
 
     # 全期間の履歴統計
     if all_avgs:
-        analytics['total_days'] = len(all_records)
-        analytics['record_high'] = round(max(all_highs), 1) if all_highs else None
-        analytics['record_low'] = round(min(all_lows), 1) if all_lows else None
-        analytics['overall_avg'] = round(statistics.mean(all_avgs), 1)
-        analytics['overall_stdev'] = round(statistics.stdev(all_avgs), 1) if len(all_avgs) > 1 else 0
+        analytics['total_days'] = len(series)
+        analytics['record_high'] = round(history.record_high, 1) if history.record_high is not None else None
+        analytics['record_low'] = round(history.record_low, 1) if history.record_low is not None else None
+        analytics['overall_avg'] = round(history.overall_avg, 1)
+        analytics['overall_stdev'] = round(history.overall_stdev, 1)
 
         # 現在期間の平均のパーセンタイル（全期間における位置づけ）
         if current_stats.get('avg_temp') is not None:
-            below = sum(1 for a in all_avgs if a < current_stats['avg_temp'])
+            below = history.avg_rank.below(current_stats['avg_temp'])
             analytics['percentile'] = round(below / len(all_avgs) * 100, 0)
             analytics['z_score'] = round(
                 (current_stats['avg_temp'] - analytics['overall_avg']) / analytics['overall_stdev'], 2
             ) if analytics['overall_stdev'] > 0 else 0
 
     # 日間変化パターン（期間内の前日比変化）
-    current_records = filter_by_date_range(all_records, target_start, target_end)
+    current_records = series.between(target_start, target_end)
     day_changes = []
     for i in range(1, len(current_records)):
         prev_avg = current_records[i - 1].get('avg')
@@ -751,14 +908,9 @@ def compute_advanced_analytics(all_records: List[Dict], current_stats: Dict,
             analytics[f'streak_{label}'] = streak
 
     # 同時期の例年平均（同月のデータ）
-    target_month = target_start.month
-    same_month_avgs = []
-    for r in all_records:
-        d = parse_date(r['date'])
-        if d and d.month == target_month and r.get('avg') is not None:
-            same_month_avgs.append(r['avg'])
-    if same_month_avgs:
-        analytics['same_month_historical_avg'] = round(statistics.mean(same_month_avgs), 1)
+    same_month_avg = history.month_climatology.get(target_start.month)
+    if same_month_avg is not None:
+        analytics['same_month_historical_avg'] = round(same_month_avg, 1)
 
     return analytics
 
@@ -769,9 +921,8 @@ def compute_recent_weeks(all_records: List[Dict], target_monday: date, count: in
     for i in range(count - 1, -1, -1):
         w_monday = target_monday - timedelta(weeks=i)
         w_sunday = w_monday + timedelta(days=6)
-        w_records = filter_by_date_range(all_records, w_monday, w_sunday)
-        if w_records:
-            w_stats = compute_statistics(w_records)
+        w_stats = compute_period_statistics(all_records, w_monday, w_sunday)
+        if w_stats:
             w_stats['label'] = f"{w_monday.month}/{w_monday.day}〜{w_sunday.month}/{w_sunday.day}"
             weeks.append(w_stats)
     return weeks
@@ -1147,9 +1298,20 @@ def build_trend_prompt(report_type: str, period_label: str, stats: Dict,
 # レポート生成
 # =============================================================================
 
+@instrumentation.timed('report.weekly')
 def generate_weekly_report(all_records: List[Dict], target_date: date,
-                           skip_ai: bool = False, draft: bool = False) -> Optional[Dict]:
-    """週次レポートを生成"""
+                           skip_ai: bool = False, draft: bool = False,
+                           history: Optional[HistoryContext] = None,
+                           references: Optional[List[Dict]] = None,
+                           analyze: bool = True) -> Optional[Dict]:
+    """週次レポートを生成
+
+    history / references を渡すと、全履歴の集計と参照レポートを実行全体で共有する。
+    references を省略した場合は reports/ から読み込む。
+    analyze=False の場合は参照レポートに依存する分析工程（finish_report）の手前で返す。
+    """
+    history = history or HistoryContext(all_records)
+    all_records = history.series
     year, week = get_iso_week(target_date)
     monday, sunday = get_week_range(year, week)
 
@@ -1163,24 +1325,24 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
 
     print(f"  → {len(current_records)} 日分のデータ")
 
-    # 統計計算
-    stats = compute_statistics(current_records)
+    # 統計計算（チャート・イベント・ベースラインまでを 'statistics' として計測）
+    stats_timer = instrumentation.start('statistics')
+    stats = compute_period_statistics(all_records, monday, sunday)
 
     # 前週のデータ
     prev_monday = monday - timedelta(weeks=1)
     prev_sunday = sunday - timedelta(weeks=1)
-    prev_records = filter_by_date_range(all_records, prev_monday, prev_sunday)
-    prev_stats = compute_statistics(prev_records)
+    prev_stats = compute_period_statistics(all_records, prev_monday, prev_sunday)
     prev_diff = compute_comparison(stats, prev_stats)
 
     # 前週比を stats に追加
     stats['prev_week_diff'] = prev_diff.get('avg_temp_diff', None)
 
     # 前年同週のデータ
-    prev_year_monday = monday.replace(year=monday.year - 1)
-    prev_year_sunday = sunday.replace(year=sunday.year - 1)
+    prev_year_monday = shift_years(monday, 1)
+    prev_year_sunday = shift_years(sunday, 1)
     prev_year_records = filter_by_date_range(all_records, prev_year_monday, prev_year_sunday)
-    prev_year_stats = compute_statistics(prev_year_records)
+    prev_year_stats = compute_period_statistics(all_records, prev_year_monday, prev_year_sunday)
     prev_year_diff = compute_comparison(stats, prev_year_stats)
     stats['prev_year_diff'] = prev_year_diff.get('avg_temp_diff', None)
 
@@ -1188,31 +1350,30 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
     recent_weeks = compute_recent_weeks(all_records, monday, count=4)
 
     # ベースライン（過去の同週データを動的に収集 — 年数が増えても自動対応）
-    baseline_records = []
-    baseline_years_count = 0
+    baseline_ranges = []
     for y_offset in range(1, 10):  # 最大9年前まで探索
         try:
             prev_mon = monday.replace(year=monday.year - y_offset)
             prev_sun = sunday.replace(year=sunday.year - y_offset)
         except ValueError:
             continue  # うるう年のずれなど
-        found = filter_by_date_range(all_records, prev_mon, prev_sun)
-        if found:
-            baseline_records.extend(found)
-            baseline_years_count += 1
-    baseline_stats = compute_statistics(baseline_records)
+        lo, hi = all_records.index_range(prev_mon, prev_sun)
+        if hi > lo:
+            baseline_ranges.append((lo, hi))
+    baseline_years_count = len(baseline_ranges)
+    baseline_stats = compute_range_statistics(all_records, baseline_ranges)
     baseline_deviation = None
     if baseline_stats.get('avg_temp') and stats.get('avg_temp'):
         baseline_deviation = round(stats['avg_temp'] - baseline_stats['avg_temp'], 1)
 
     # 特筆イベント
-    events = detect_notable_events(current_records, all_records)
+    events = detect_notable_events(current_records, all_records, history=history)
 
     # 季節マイルストーン
-    milestones = detect_season_milestones(all_records)
+    milestones = history.milestones
 
     # ヒートマップ
-    heatmap = generate_heatmap_data(all_records)
+    heatmap = history.heatmap
 
     # グラフデータ
     chart_data = generate_chart_data_weekly(current_records, prev_year_records)
@@ -1223,7 +1384,7 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
     daily_data_formatted = [
         {
             'date': r['date'],
-            'weekday': WEEKDAY_NAMES[parse_date(r['date']).weekday()] if parse_date(r['date']) else '',
+            'weekday': WEEKDAY_NAMES[r.day.weekday()],
             'high': r.get('high'),
             'low': r.get('low'),
             'avg': r.get('avg'),
@@ -1239,7 +1400,7 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
     ]
 
     # 高度分析データ
-    analytics = compute_advanced_analytics(all_records, stats, monday, sunday)
+    analytics = compute_advanced_analytics(all_records, stats, monday, sunday, history=history)
 
     baseline_info = {
         'baseline_avg': baseline_stats.get('avg_temp'),
@@ -1309,7 +1470,7 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
     trend = compute_trend(avg_values)
 
     # レポート組み立て
-    report = {
+    report = Report({
         'type': 'weekly',
         'period': {
             'year': year,
@@ -1321,27 +1482,27 @@ def generate_weekly_report(all_records: List[Dict], target_date: date,
         'generated_at': datetime.now(JST).isoformat(),
         'sections': sections,
         'chart_data': chart_data,
-    }
-    references = load_reference_reports(REPORTS_DIR)
-    enrich_analysis_context(report, references)
-
-    # 進行中の週は統計・グラフだけを公開し、文章分析は期間確定後に行う。
-    if draft:
-        mark_report_as_draft(report, references)
-        print("  → 進行中週のため、文章分析なしの暫定レポートを生成")
-    elif not skip_ai:
-        print("  → AI分析を実行中...")
-        apply_analysis(report, analyze_report_with_gemini(report))
-    else:
-        apply_analysis(report, generate_evidence_analysis(report, source='local', reference_reports=references))
-        print("  → Geminiを使わず、ローカル根拠分析を生成")
-
+    })
+    stats_timer.stop()
+    if analyze:
+        finish_report(report, history, references, skip_ai=skip_ai, draft=draft)
     return report
 
 
+@instrumentation.timed('report.monthly')
 def generate_monthly_report(all_records: List[Dict], target_date: date,
-                             skip_ai: bool = False) -> Optional[Dict]:
-    """月次レポートを生成"""
+                             skip_ai: bool = False,
+                             history: Optional[HistoryContext] = None,
+                             references: Optional[List[Dict]] = None,
+                             analyze: bool = True) -> Optional[Dict]:
+    """月次レポートを生成
+
+    history / references を渡すと、全履歴の集計と参照レポートを実行全体で共有する。
+    references を省略した場合は reports/ から読み込む。
+    analyze=False の場合は参照レポートに依存する分析工程（finish_report）の手前で返す。
+    """
+    history = history or HistoryContext(all_records)
+    all_records = history.series
     year, month = target_date.year, target_date.month
     first, last = get_month_range(year, month)
 
@@ -1355,23 +1516,23 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
 
     print(f"  → {len(current_records)} 日分のデータ")
 
-    # 統計計算
-    stats = compute_statistics(current_records)
+    # 統計計算（チャート・イベント・ベースラインまでを 'statistics' として計測）
+    stats_timer = instrumentation.start('statistics')
+    stats = compute_period_statistics(all_records, first, last)
 
     # 前月のデータ
     if month == 1:
         prev_first, prev_last = get_month_range(year - 1, 12)
     else:
         prev_first, prev_last = get_month_range(year, month - 1)
-    prev_records = filter_by_date_range(all_records, prev_first, prev_last)
-    prev_stats = compute_statistics(prev_records)
+    prev_stats = compute_period_statistics(all_records, prev_first, prev_last)
     prev_diff = compute_comparison(stats, prev_stats)
     stats['prev_month_diff'] = prev_diff.get('avg_temp_diff', None)
 
     # 前年同月のデータ
     prev_year_first, prev_year_last = get_month_range(year - 1, month)
     prev_year_records = filter_by_date_range(all_records, prev_year_first, prev_year_last)
-    prev_year_stats = compute_statistics(prev_year_records)
+    prev_year_stats = compute_period_statistics(all_records, prev_year_first, prev_year_last)
     prev_year_diff = compute_comparison(stats, prev_year_stats)
     stats['prev_year_diff'] = prev_year_diff.get('avg_temp_diff', None)
 
@@ -1383,9 +1544,8 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
     week_start = first
     while week_start <= last:
         week_end = min(week_start + timedelta(days=6), last)
-        week_records = filter_by_date_range(all_records, week_start, week_end)
-        if week_records:
-            week_stats = compute_statistics(week_records)
+        week_stats = compute_period_statistics(all_records, week_start, week_end)
+        if week_stats:
             weekly_breakdown.append({
                 'start_date': week_start.isoformat(),
                 'end_date': week_end.isoformat(),
@@ -1394,40 +1554,32 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
             })
         week_start = week_end + timedelta(days=1)
 
-    # ベースライン（過去の同月データを動的に収集 — 年数が増えても自動対応）
-    baseline_records = []
-    baseline_years_count = 0
-    for y_offset in range(1, 10):  # 最大9年前まで探索
-        try:
-            prev_first, prev_last = get_month_range(year - y_offset, month)
-        except ValueError:
-            continue
-        found = filter_by_date_range(all_records, prev_first, prev_last)
-        if found:
-            baseline_records.extend(found)
-            baseline_years_count += 1
-    baseline_stats = compute_statistics(baseline_records)
+    # ベースライン（過去の同月を動的に収集 — 月×年の気候値セルを足すだけで日別データは走査しない）
+    climatology = history.climatology
+    baseline_keys = [(year - y_offset, month) for y_offset in range(1, 10)  # 最大9年前まで探索
+                     if climatology.days(year - y_offset, month)]
+    baseline_years_count = len(baseline_keys)
+    baseline_mean = climatology.mean('avg', baseline_keys)
+    baseline_avg = round(baseline_mean, 1) if baseline_mean is not None else None
     baseline_deviation = None
-    if baseline_stats.get('avg_temp') and stats.get('avg_temp'):
-        baseline_deviation = round(stats['avg_temp'] - baseline_stats['avg_temp'], 1)
+    if baseline_avg and stats.get('avg_temp'):
+        baseline_deviation = round(stats['avg_temp'] - baseline_avg, 1)
 
     # 特筆イベント
-    events = detect_notable_events(current_records, all_records)
+    events = detect_notable_events(current_records, all_records, history=history)
 
     # 季節マイルストーン
-    milestones = detect_season_milestones(all_records)
+    milestones = history.milestones
 
     # ヒートマップ
-    heatmap = generate_heatmap_data(all_records)
+    heatmap = history.heatmap
 
     # グラフデータ
     chart_data = generate_chart_data_monthly(current_records, prev_year_records)
 
     # 偏差チャートデータ
-    if baseline_stats.get('avg_temp') is not None:
-        chart_data['deviation'] = _generate_deviation_data(
-            current_records, baseline_stats['avg_temp']
-        )
+    if baseline_avg is not None:
+        chart_data['deviation'] = _generate_deviation_data(current_records, baseline_avg)
 
     # 週ごとの推移グラフデータ
     if weekly_breakdown:
@@ -1444,7 +1596,7 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
     daily_data_formatted = [
         {
             'date': r['date'],
-            'weekday': WEEKDAY_NAMES[parse_date(r['date']).weekday()] if parse_date(r['date']) else '',
+            'weekday': WEEKDAY_NAMES[r.day.weekday()],
             'high': r.get('high'),
             'low': r.get('low'),
             'avg': r.get('avg'),
@@ -1459,10 +1611,10 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
     ]
 
     # 高度分析データ
-    analytics = compute_advanced_analytics(all_records, stats, first, last)
+    analytics = compute_advanced_analytics(all_records, stats, first, last, history=history)
 
     baseline_info = {
-        'baseline_avg': baseline_stats.get('avg_temp'),
+        'baseline_avg': baseline_avg,
         'current_deviation': baseline_deviation,
         'years_count': baseline_years_count,
     }
@@ -1528,7 +1680,7 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
     avg_values = [r.get('avg') for r in current_records if r.get('avg') is not None]
     trend = compute_trend(avg_values)
 
-    report = {
+    report = Report({
         'type': 'monthly',
         'period': {
             'year': year,
@@ -1540,26 +1692,155 @@ def generate_monthly_report(all_records: List[Dict], target_date: date,
         'generated_at': datetime.now(JST).isoformat(),
         'sections': sections,
         'chart_data': chart_data,
-    }
-    references = load_reference_reports(REPORTS_DIR)
+    })
+    stats_timer.stop()
+    if analyze:
+        finish_report(report, history, references, skip_ai=skip_ai)
+    return report
+
+
+def finish_report(report: Dict, history: HistoryContext,
+                  references: Optional[List[Dict]] = None,
+                  skip_ai: bool = False, draft: bool = False) -> Dict:
+    """組み立て済みレポートに分析文脈・文章分析・入力指紋を付ける。
+
+    参照レポート（他期間の統計）に依存するのはこの工程だけで、バックフィルは
+    直前に保存したレポートまでを反映した参照でこれを期間順に実行する。
+    references を省略した場合は reports/ から読み込む。
+    """
+    if references is None:
+        references = ReferenceLookup(load_reference_reports(REPORTS_DIR))
     enrich_analysis_context(report, references)
 
-    if not skip_ai:
+    # 進行中の週は統計・グラフだけを公開し、文章分析は期間確定後に行う。
+    if draft:
+        mark_report_as_draft(report, references)
+        print("  → 進行中週のため、文章分析なしの暫定レポートを生成")
+    elif not skip_ai:
         print("  → AI分析を実行中...")
         apply_analysis(report, analyze_report_with_gemini(report))
     else:
         apply_analysis(report, generate_evidence_analysis(report, source='local', reference_reports=references))
         print("  → Geminiを使わず、ローカル根拠分析を生成")
-
+    start = date.fromisoformat(report['period']['start_date'])
+    report['analysis_meta']['input_fingerprint'] = report_input_fingerprint(history, report['type'], start)
     return report
 
 
+# =============================================================================
+# 入力指紋（増分バックフィル用）
+# =============================================================================
+
+# 依存範囲の定義を変えたら上げる。記録済みの指紋がすべて不一致になり再生成される。
+INPUT_FINGERPRINT_VERSION = '1'
+
+
+def _report_input_ranges(report_type: str, target: date,
+                         history: HistoryContext) -> List[Tuple[date, date]]:
+    """レポートが参照する日別データの日付範囲を列挙する。
+
+    対象期間・前期間・直近4期間（直近4週推移と分析文脈の recent_history）、
+    過去年の同時期（前年比較・ベースライン）、他年の同じ週番号/月
+    （分析文脈の same_season_history）を含む。
+    """
+    series = history.series
+    years = range(series.first_date.year - 1, series.last_date.year + 2) if series else range(0)
+
+    if report_type == 'weekly':
+        year, week = get_iso_week(target)
+        monday, sunday = get_week_range(year, week)
+        ranges = [(monday - timedelta(weeks=4), sunday)]
+        for y_offset in range(1, 10):
+            try:
+                ranges.append((monday.replace(year=monday.year - y_offset),
+                               sunday.replace(year=sunday.year - y_offset)))
+            except ValueError:
+                if y_offset == 1:  # 前年比較はうるう日を2月28日に寄せて参照する
+                    ranges.append((shift_years(monday, 1), shift_years(sunday, 1)))
+                continue
+        for y in years:
+            peer_monday, peer_sunday = get_week_range(y, week)
+            if get_iso_week(peer_monday) == (y, week):
+                ranges.append((peer_monday, peer_sunday))
+        return ranges
+
+    first, last = get_month_range(target.year, target.month)
+    four_back = date(target.year - (target.month <= 4), (target.month - 5) % 12 + 1, 1)
+    ranges = [(min(four_back, first - timedelta(weeks=3)), last)]
+    for y in years:
+        ranges.append(get_month_range(y, target.month))
+    return ranges
+
+
+@instrumentation.timed('fingerprint.input')
+def report_input_fingerprint(history: HistoryContext, report_type: str, target: date) -> str:
+    """レポートが消費する日別データだけから計算した入力指紋。
+
+    analysis_fingerprint が出力側の根拠を表すのに対し、こちらは生成前に計算でき、
+    増分バックフィルで「入力が変わったレポートだけ」を選ぶために使う。
+    観測史上の最高/最低は特筆イベントの判定に使うため含める。
+    全履歴に依存する表示セクション（ヒートマップ・季節マイルストーン）は含めず、
+    再生成しないレポートでは refresh_history_sections で更新する。
+    """
+    series = history.series
+    digest = hashlib.sha256()
+    digest.update(f"{INPUT_FINGERPRINT_VERSION}|{ANALYSIS_PROTOCOL_VERSION}|{report_type}|".encode('utf-8'))
+    digest.update(f"{history.record_high!r}|{history.record_low!r}\n".encode('utf-8'))
+    for start, end in _report_input_ranges(report_type, target, history):
+        lo, hi = series.index_range(start, end)
+        digest.update(f"[{start}:{end}]".encode('utf-8'))
+        for r in series.records[lo:hi]:
+            digest.update(
+                f"{r['date']}|{r.get('high')!r}|{r.get('low')!r}|{r.get('avg')!r}|{r.get('range')!r}\n".encode('utf-8')
+            )
+    return digest.hexdigest()[:20]
+
+
 # =============================================================================
 # ファイル出力
 # =============================================================================
 
-def save_report(report: Dict) -> str:
-    """レポートを保存し、同じデータ根拠の分析だけを安全に引き継ぐ。"""
+def report_filepath(report_type: str, target: date) -> Path:
+    """対象日を含む週・月のレポートファイルパス"""
+    if report_type == 'weekly':
+        year, week = get_iso_week(target)
+        return WEEKLY_DIR / f"{year}-W{week:02d}.json"
+    return MONTHLY_DIR / f"{target.year}-{target.month:02d}.json"
+
+
+def _load_saved_report(filepath: Path) -> Optional[Dict]:
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_history_sections(report: Dict, history: HistoryContext) -> bool:
+    """全履歴に依存する表示セクション（季節マイルストーン・ヒートマップ）を現在の履歴で置き換える。
+
+    入力指紋は対象期間まわりの日別データだけを表すため、増分バックフィルでは
+    再生成しないレポートのこれらのセクションをここで更新する。分析文脈・
+    文章分析・データ指紋はこれらに依存しないので、置き換えても整合する。
+    変更があれば True を返す。
+    """
+    sections = report.setdefault('sections', {})
+    changed = False
+    for name, key, value in (('season', 'milestones', history.milestones),
+                             ('heatmap', 'data', history.heatmap)):
+        section = sections.get(name)
+        if section is not None and section.get(key) != value:
+            section[key] = value
+            changed = True
+    return changed
+
+
+@instrumentation.timed('write.report')
+def save_report(report: Dict, reference_index: Optional[ReferenceIndex] = None) -> str:
+    """レポートを保存し、同じデータ根拠の分析だけを安全に引き継ぐ。
+
+    reference_index を渡すと参照索引はメモリ上で更新し、書き出しは呼び出し側の flush に任せる。
+    """
     report_type = report['type']
     period = report['period']
 
@@ -1608,7 +1889,7 @@ def save_report(report: Dict) -> str:
                 for sec_name in ('summary', 'comparison', 'trend_analysis'):
                     comment = existing.get('sections', {}).get(sec_name, {}).get('ai_comment', '')
                     if comment:
-                        report.setdefault('sections', {}).setdefault(sec_name, {})['ai_comment'] = comment
+                        set_section_comment(report, sec_name, comment)
                 report['analysis_meta'] = existing_meta
                 print("  → 同一データ指紋の既存分析を引き継ぎました")
             elif new_meta.get('source') == 'pending' and existing_meta:
@@ -1618,6 +1899,10 @@ def save_report(report: Dict) -> str:
 
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(report, f, ensure_ascii=False, indent=2)
+    if reference_index is not None:
+        reference_index.record(filepath, report)
+    else:
+        update_reference_index(REPORTS_DIR, filepath, report)
 
     print(f"  → 保存: {filepath}")
     return index_entry
@@ -1638,6 +1923,7 @@ def is_period_closed(report_type: str, period_key: str, today: Optional[date] =
         return False
 
 
+@instrumentation.timed('write.index')
 def update_index(entries: List[Dict]):
     """reports/index.json を更新"""
     index_path = REPORTS_DIR / 'index.json'
@@ -1685,54 +1971,141 @@ def update_index(entries: List[Dict]):
 # バックフィル（過去レポート一括生成）
 # =============================================================================
 
-def backfill(all_records: List[Dict], skip_ai: bool = True):
+def backfill_periods(earliest: date, today: date) -> List[Tuple[str, date]]:
+    """バックフィル対象の (種別, 対象日) を生成順に返す。終了済みの月・週のみ。"""
+    periods = []
+
+    # 月次レポート（終了済みの月のみ）
+    current = date(earliest.year, earliest.month, 1)
+    current_month = date(today.year, today.month, 1)
+    while current < current_month:
+        periods.append(('monthly', current))
+        # 次の月へ
+        if current.month == 12:
+            current = date(current.year + 1, 1, 1)
+        else:
+            current = date(current.year, current.month + 1, 1)
+
+    # 週次レポート（終了済みの週のみ）
+    current = earliest - timedelta(days=earliest.weekday())  # 最初の月曜日
+    current_week_monday = today - timedelta(days=today.weekday())
+    while current < current_week_monday:
+        periods.append(('weekly', current))
+        current += timedelta(weeks=1)
+
+    return periods
+
+
+def _generate_backfill_report(period: Tuple[str, date], history: HistoryContext) -> Optional[Dict]:
+    """参照レポートに依存しない部分（統計・グラフ・イベント等）だけを組み立てる"""
+    report_type, target = period
+    if report_type == 'monthly':
+        return generate_monthly_report(history.series, target, skip_ai=True,
+                                       history=history, analyze=False)
+    return generate_weekly_report(history.series, target, skip_ai=True,
+                                  history=history, analyze=False)
+
+
+# ワーカープロセスごとに1回だけ受け取る共有データ（タスクごとにはpickleしない）
+_worker_shared: Dict[str, Any] = {}
+
+
+def _init_backfill_worker(history: HistoryContext):
+    _worker_shared['history'] = history
+
+
+def _backfill_worker(period: Tuple[str, date]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    report = _generate_backfill_report(period, _worker_shared['history'])
+    # 計測が有効ならワーカー側の集計も親へ返す（無効時は None）
+    return report, instrumentation.metrics.drain()
+
+
+def backfill(all_records: List[Dict], skip_ai: bool = True, jobs: int = 1,
+             incremental: bool = False, climatology: Optional[Climatology] = None):
     """観測開始〜直近の完了期間を一括生成する。
 
     バックフィルは件数が多いため、Gemini無料枠を保護して常にAPIを使わず、
     ローカル根拠分析を同時生成する。既存JSONだけを再検証する場合は
     backfill_codex_analysis.py を使用する。
+
+    分析文脈は他期間のレポート（参照レポート）に依存するため、月次→週次の
+    期間順に分析・保存し、保存したレポートをその都度参照へ反映する（後の期間は
+    直前までに書いたレポートを、未生成の期間は開始時点の reports/ を参照する）。
+    jobs > 1 の場合は参照に依存しない組み立てだけをプロセスプールへ分散し、
+    分析・保存・index.json 更新は親プロセスが期間順に行うため、出力は逐次実行と同一になる。
+
+    incremental=True の場合は、各レポートの入力指紋を analysis_meta に記録済みの
+    値と比較し、参照する日別データが変わった期間だけを再生成する。それ以外の
+    レポートは全履歴に依存するセクションだけを refresh_history_sections で更新する。
+    climatology を渡すと（main ではキャッシュ済みのもの）、月×年の気候値を再集計しない。
     """
+    history = HistoryContext(all_records, climatology=climatology)
+    all_records = history.series
     if not all_records:
         print("[ERROR] データがありません")
         return
 
     # 最古と最新の日付を取得
-    dates = [parse_date(r['date']) for r in all_records if parse_date(r['date'])]
-    earliest = min(dates)
-    latest = max(dates)
+    earliest = all_records.first_date
+    latest = all_records.last_date
     print(f"\n=== バックフィル: {earliest} 〜 {latest} ===")
 
-    entries = []
-
     if not skip_ai:
         print("  [INFO] バックフィルではGeminiを使用せず、API無料枠を保護します")
-    skip_ai = True
 
-    # 月次レポート（終了済みの月のみ）
-    current = date(earliest.year, earliest.month, 1)
     today = datetime.now(JST).date()
-    current_month = date(today.year, today.month, 1)
-    while current < current_month:
-        report = generate_monthly_report(all_records, current, skip_ai=skip_ai)
-        if report:
-            entry = save_report(report)
-            entries.append(entry)
-        # 次の月へ
-        if current.month == 12:
-            current = date(current.year + 1, 1, 1)
-        else:
-            current = date(current.year, current.month + 1, 1)
+    periods = backfill_periods(earliest, today)
+    # 参照索引は1回だけ読み、保存ごとの更新はメモリ上で行って最後に1回書き出す
+    reference_index = ReferenceIndex(REPORTS_DIR)
+    if incremental:
+        total = len(periods)
+        stale = []
+        refreshed = 0
+        for report_type, target in periods:
+            filepath = report_filepath(report_type, target)
+            saved = _load_saved_report(filepath)
+            recorded = (saved or {}).get('analysis_meta', {}).get('input_fingerprint')
+            if recorded != report_input_fingerprint(history, report_type, target):
+                stale.append((report_type, target))
+            elif refresh_history_sections(saved, history):
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(saved, f, ensure_ascii=False, indent=2)
+                reference_index.record(filepath, saved)
+                refreshed += 1
+        periods = stale
+        print(f"  → 増分モード: 入力が変わった {len(periods)}/{total} 期間を再生成"
+              f"（他 {refreshed} 件はヒートマップ・季節セクションのみ更新）")
+        if not periods:
+            reference_index.flush()
+            print("\n=== バックフィル完了: 更新対象なし ===")
+            return
+    references = ReferenceLookup(reference_index.load())
+    history.prime()
+
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    entries = []
 
-    # 週次レポート（終了済みの週のみ）
-    current = earliest - timedelta(days=earliest.weekday())  # 最初の月曜日
-    current_week_monday = today - timedelta(days=today.weekday())
-    while current < current_week_monday:
-        report = generate_weekly_report(all_records, current, skip_ai=skip_ai)
-        if report:
-            entry = save_report(report)
-            entries.append(entry)
-        current += timedelta(weeks=1)
+    def finish_and_save(report: Optional[Dict]):
+        if not report:
+            return
+        finish_report(report, history, references, skip_ai=True)
+        entry = save_report(report, reference_index)
+        references.update(compact_reference(report, Path(entry['file']).name))
+        entries.append(entry)
 
+    if jobs == 1:
+        for period in periods:
+            finish_and_save(_generate_backfill_report(period, history))
+    else:
+        print(f"  → {jobs} プロセスで並列生成")
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_backfill_worker,
+                                 initargs=(history,)) as executor:
+            # map は投入順に結果を返すので、分析・保存・index の順は逐次実行と一致する
+            for report, worker_metrics in executor.map(_backfill_worker, periods):
+                instrumentation.metrics.merge(worker_metrics)
+                finish_and_save(report)
+
+    reference_index.flush()
     update_index(entries)
     print(f"\n=== バックフィル完了: {len(entries)} 件のレポートを生成 ===")
 
@@ -1748,20 +2121,31 @@ def main():
     parser.add_argument('--backfill', action='store_true', help='過去レポートを一括生成')
     parser.add_argument('--no-ai', action='store_true', help='Geminiを使わずローカル根拠分析を生成')
     parser.add_argument('--draft', action='store_true', help='進行中の今週を文章分析なしで暫定生成')
+    parser.add_argument('--incremental', action='store_true',
+                        help='バックフィルで入力データが変わった期間だけを再生成')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='バックフィルの並列プロセス数（0 でCPU数、既定: 1）')
     args = parser.parse_args()
 
     print(f"[{datetime.now(JST).isoformat()}] レポート生成 開始")
 
-    # データ取得
-    all_records = fetch_daily_data()
+    # データ取得（日付解析と列化は1回だけ行い、全レポートで共有する）
+    rows = fetch_daily_data()
+    with instrumentation.span('parse.series'):
+        all_records = DailySeries(rows)
     if not all_records:
         print("[ERROR] データの取得に失敗しました")
         sys.exit(1)
 
+    # 月×年の気候値はキャッシュから読み、行が変わった年だけ再集計する
+    with instrumentation.span('climatology'):
+        climatology = Climatology.cached(all_records)
+
     entries = []
 
     if args.backfill:
-        backfill(all_records, skip_ai=args.no_ai)
+        backfill(all_records, skip_ai=args.no_ai, jobs=args.jobs, incremental=args.incremental,
+                 climatology=climatology)
         return
 
     report_type = args.type
@@ -1811,18 +2195,29 @@ def main():
             print(f"[ERROR] 暫定公開できるのは現在の週 {current_week_key} だけです。")
             sys.exit(2)
 
+    history = HistoryContext(all_records, climatology=climatology)
+    reference_index = ReferenceIndex(REPORTS_DIR)
+    references = ReferenceLookup(reference_index.load())
     if report_type == 'weekly':
-        report = generate_weekly_report(all_records, target, skip_ai=args.no_ai, draft=args.draft)
+        report = generate_weekly_report(all_records, target, skip_ai=args.no_ai, draft=args.draft,
+                                        history=history, references=references)
     else:
-        report = generate_monthly_report(all_records, target, skip_ai=args.no_ai)
+        report = generate_monthly_report(all_records, target, skip_ai=args.no_ai, history=history,
+                                         references=references)
 
     if report:
-        entry = save_report(report)
+        entry = save_report(report, reference_index)
         entries.append(entry)
         update_index(entries)
+    reference_index.flush()
 
     print(f"\n[{datetime.now(JST).isoformat()}] レポート生成 完了")
 
 
 if __name__ == '__main__':
-    main()
+    try:
+        run_profiled(main, 'report_generator')
+    finally:
+        instrumentation.write_run_metrics('report_generator', extra={
+            'gviz': get_client(SPREADSHEET_ID).timing_summary(),
+        })
@@ -71,6 +71,19 @@ assert.strictEqual(context.optionalFiniteNumber('34.6'), 34.6);
         'blank lines between the three paragraphs must survive rendering'
     );
 
+    responseData = {
+        generated_at: new Date().toISOString(),
+        advice: '穏やかな天気です。',
+        data_summary: { outdoor_temp: null },
+        source_status: { weather_error: null, latency_ms: { weather: 120, alerts: 80 } }
+    };
+    await context.loadAIComment();
+    assert.doesNotMatch(elements.aiAdvisorTime.textContent, /一部データ取得失敗/,
+        'latency entries in source_status are not errors');
+    responseData.source_status.weather_error = 'timeout';
+    await context.loadAIComment();
+    assert.match(elements.aiAdvisorTime.textContent, /一部データ取得失敗/);
+
     responseData = {
         generated_at: '2026-01-01T00:00:00+09:00',
         advice: '古い助言',
@@ -2,6 +2,8 @@ import importlib.util
 import json
 import sys
 import tempfile
+import threading
+import time
 import types
 from pathlib import Path
 
@@ -17,6 +19,7 @@ genai_stub = types.ModuleType("google.genai")
 google_stub.genai = genai_stub
 data_analysis_stub = types.ModuleType("data_analysis")
 data_analysis_stub.analyze_data_comprehensive = lambda *_args, **_kwargs: {}
+data_analysis_stub.AnalysisState = lambda *_args, **_kwargs: None
 sys.modules.update(
     {
         "requests": requests_stub,
@@ -55,7 +58,8 @@ class FakeModels:
 
 
 def run_with(fake_models, alerts=None):
-    module.genai.Client = lambda **_kwargs: types.SimpleNamespace(models=fake_models)
+    genai_stub.Client = lambda **_kwargs: types.SimpleNamespace(models=fake_models)
+    module.gemini_client.clear_clients()
     module.GEMINI_API_KEY = "test-key"
     module.GEMINI_MODEL = "gemini-3.7-flash"
     module.load_moon_data = lambda: {"age": 1, "phase": "新月"}
@@ -155,7 +159,8 @@ assert [call[0] for call in failed.calls] == ["gemini-3.7-flash"]
 assert failed_result.startswith("⚠️ 分析エラー (gemini-3.7-flash):")
 
 no_data_models = FakeModels()
-module.genai.Client = lambda **_kwargs: types.SimpleNamespace(models=no_data_models)
+genai_stub.Client = lambda **_kwargs: types.SimpleNamespace(models=no_data_models)
+module.gemini_client.clear_clients()
 no_data_result = module.analyze_with_gemini(
     {"current": {}},
     {"current": {}, "yahoo_precip": {}},
@@ -297,4 +302,50 @@ with tempfile.TemporaryDirectory() as temp_dir:
     }
     assert not output_path.with_suffix(".json.tmp").exists()
 
+release_slow_source = threading.Event()
+
+
+def slow_precipitation():
+    release_slow_source.wait(5)
+    return {"data": [], "error": None}
+
+
+module.fetch_spreadsheet_data = lambda cancelled=None: {"current": {"temperature": 21.0}, "error": None}
+module.fetch_weather_forecast = lambda: {"current": {}, "error": None}
+module.fetch_jma_forecast = lambda: {"weather": "晴れ", "error": None}
+module.fetch_jma_alerts = lambda: {"alerts": [], "error": "HTTP 503"}
+module.fetch_yahoo_precipitation = slow_precipitation
+collect_started = time.monotonic()
+sources, latency_ms = module.collect_sources({"precipitation": 0.2})
+release_slow_source.set()
+assert time.monotonic() - collect_started < 2
+assert sources["spreadsheet"]["current"]["temperature"] == 21.0
+assert sources["alerts"]["error"] == "HTTP 503"
+assert sources["precipitation"]["error"].startswith("timeout")
+assert sources["precipitation"]["is_raining"] is False
+assert set(latency_ms) == {"spreadsheet", "weather", "jma_forecast", "alerts", "precipitation"}
+assert latency_ms["precipitation"] == 200
+
+# 締め切りを過ぎたスプレッドシート取得には cancelled が届き、遅れて終わっても状態を保存しない
+late_spreadsheet_seen = {}
+late_spreadsheet_done = threading.Event()
+
+
+def slow_spreadsheet(cancelled=None):
+    release_slow_source.wait(5)
+    late_spreadsheet_seen["cancelled"] = cancelled.is_set()
+    late_spreadsheet_done.set()
+    return {"current": {"temperature": 22.0}, "error": None}
+
+
+release_slow_source.clear()
+module.fetch_spreadsheet_data = slow_spreadsheet
+module.fetch_yahoo_precipitation = lambda: {"data": [], "error": None}
+sources, latency_ms = module.collect_sources({"spreadsheet": 0.2})
+assert sources["spreadsheet"]["error"].startswith("timeout")
+assert sources["spreadsheet"]["current"] == {}
+release_slow_source.set()
+assert late_spreadsheet_done.wait(5)
+assert late_spreadsheet_seen == {"cancelled": True}
+
 print("AI advisor prompt tests passed")
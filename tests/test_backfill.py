@@ -0,0 +1,181 @@
+import contextlib
+import io
+import json
+import math
+import pickle
+import shutil
+import sys
+import tempfile
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+import report_analysis  # noqa: E402
+import report_generator  # noqa: E402
+
+index_writes = []
+_write_reference_index = report_analysis._write_reference_index
+
+
+def counting_write_reference_index(reports_root, files):
+    index_writes.append(reports_root)
+    _write_reference_index(reports_root, files)
+
+
+report_analysis._write_reference_index = counting_write_reference_index
+
+
+def synthetic_rows(days, shift=0.0):
+    """昨日までの days 日分の日別データ（季節変動つき、数日おきに欠測日）"""
+    end = datetime.now(report_generator.JST).date() - timedelta(days=1)
+    rows = []
+    for i in range(days):
+        day = end - timedelta(days=days - 1 - i)
+        if i % 37 == 5:
+            continue
+        high = round(16 + 11 * math.sin((i - 100) / 58.1) + (i * 7 % 11) / 2 + shift, 1)
+        low = round(high - 6 - (i * 5 % 7), 1)
+        rows.append({
+            "date": day.strftime("%Y/%m/%d"),
+            "high": high,
+            "low": low,
+            "avg": round((high + low) / 2, 1) if i % 23 else None,
+        })
+    for row in rows:
+        if row["avg"] is None:
+            row["avg"] = round((row["high"] + row["low"]) / 2, 1)
+        row["range"] = round(row["high"] - row["low"], 1)
+    return rows
+
+
+def use_reports_dir(path):
+    report_generator.REPORTS_DIR = path
+    report_generator.WEEKLY_DIR = path / "weekly"
+    report_generator.MONTHLY_DIR = path / "monthly"
+
+
+def legacy_backfill(rows):
+    """並列化前の逐次バックフィル: 各レポートが生成時点の reports/ を読み直す"""
+    history = report_generator.HistoryContext(rows)
+    series = history.series
+    today = datetime.now(report_generator.JST).date()
+    entries = []
+    for report_type, target in report_generator.backfill_periods(series.first_date, today):
+        generate = (report_generator.generate_monthly_report if report_type == "monthly"
+                    else report_generator.generate_weekly_report)
+        report = generate(series, target, skip_ai=True, history=history)
+        if report:
+            entries.append(report_generator.save_report(report))
+    report_generator.update_index(entries)
+
+
+def strip_timestamps(value):
+    if isinstance(value, dict):
+        return {k: strip_timestamps(v) for k, v in value.items() if k not in ("generated_at", "updated_at")}
+    if isinstance(value, list):
+        return [strip_timestamps(v) for v in value]
+    return value
+
+
+def run(target_dir, seed_dir, produce):
+    if seed_dir:
+        shutil.copytree(seed_dir, target_dir)
+    use_reports_dir(target_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        produce()
+    return {
+        path.relative_to(target_dir).as_posix(): strip_timestamps(json.loads(path.read_text(encoding="utf-8")))
+        for path in sorted(target_dir.rglob("*.json")) if not path.name.startswith(".")
+    }
+
+
+rows = synthetic_rows(430)
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    # 既存 reports/ がある場合（古いデータで生成済み）と空の場合の両方を比べる
+    run(tmp / "stale", None, lambda: legacy_backfill(synthetic_rows(400, shift=1.5)))
+    for seed in (None, tmp / "stale"):
+        label = "stale" if seed else "empty"
+        legacy = run(tmp / f"legacy-{label}", seed, lambda: legacy_backfill(rows))
+        serial = run(tmp / f"serial-{label}", seed, lambda: report_generator.backfill(rows, jobs=1))
+        index_writes.clear()
+        parallel = run(tmp / f"parallel-{label}", seed, lambda: report_generator.backfill(rows, jobs=2))
+        # 参照索引は保存ごとではなく実行の最後に1回だけ書き出し、その内容は保存したファイルと一致する
+        assert len(index_writes) == 1
+        reloaded = report_analysis.ReferenceIndex(tmp / f"parallel-{label}")
+        reloaded.load()
+        assert not reloaded.dirty
+
+        assert "index.json" in serial and len(serial) > 60
+        assert serial.keys() == parallel.keys() == legacy.keys()
+        for name in serial:
+            assert serial[name] == parallel[name], f"{label}: jobs=2 differs in {name}"
+            assert serial[name] == legacy[name], f"{label}: differs from the legacy serial path in {name}"
+
+        # 後の期間は同じ実行で先に書いたレポートを参照する
+        weekly = sorted(name for name in serial if name.startswith("weekly/"))
+        recent = serial[weekly[-1]]["analysis_context"]["recent_history"]["previous_periods"]
+        assert len(recent) == 4
+
+# 1行を修正した後の増分バックフィルは、全件の再生成と同じ reports/ になる
+changed_rows = [dict(row) for row in rows]
+edited = changed_rows[300]  # 観測史上の最高/最低は変えない修正
+edited["high"] = round(edited["high"] + 6.0, 1)
+edited["avg"] = round((edited["high"] + edited["low"]) / 2, 1)
+edited["range"] = round(edited["high"] - edited["low"], 1)
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    # 空の reports/ への1回目は後年の同時期レポートがまだ無いため、2回目（全件再生成）で収束させる
+    run(tmp / "first", None, lambda: report_generator.backfill(rows))
+    before = run(tmp / "before", tmp / "first", lambda: report_generator.backfill(rows))
+    full = run(tmp / "full", tmp / "before", lambda: report_generator.backfill(changed_rows))
+    index_writes.clear()
+    incremental = run(tmp / "incremental", tmp / "before",
+                      lambda: report_generator.backfill(changed_rows, incremental=True))
+    assert len(index_writes) == 1
+    assert full.keys() == incremental.keys()
+    for name in full:
+        assert full[name] == incremental[name], f"incremental differs from a full rebuild in {name}"
+    regenerated = [name for name in full if name != "index.json" and
+                   full[name]["sections"]["statistics"] != before[name]["sections"]["statistics"]]
+    assert 0 < len(regenerated) < len(full) // 2
+    assert any(full[name]["sections"]["heatmap"] != before[name]["sections"]["heatmap"] for name in full
+               if name not in regenerated and name != "index.json")
+
+# 共有した HistoryContext（事前計算済み・ワーカーへ渡すための pickle 往復を含む）で作ったレポートは、
+# レポートごとに履歴を集計した場合と同じ JSON になる
+with tempfile.TemporaryDirectory() as tmp:
+    use_reports_dir(Path(tmp))
+    series = report_generator.DailySeries(rows)
+    last = series.last_date
+    shared = report_generator.HistoryContext(series)
+    primed = report_generator.HistoryContext(series).prime()
+    primed_names = ('climatology', 'heatmap', 'milestones', 'record_high', 'record_low',
+                    'avg_rank', 'overall_avg', 'overall_stdev', 'month_climatology')
+    assert set(primed_names) <= set(vars(primed))
+    assert not set(primed_names) & set(vars(shared))
+    shipped = pickle.loads(pickle.dumps(primed))
+    assert set(primed_names) <= set(vars(shipped))
+    targets = [("weekly", last - timedelta(days=7 * weeks)) for weeks in (1, 5, 30, 52)]
+    targets += [("monthly", (last.replace(day=1) - timedelta(days=31 * months)).replace(day=1))
+                for months in (1, 6, 12)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for report_type, target in targets:
+            generate = (report_generator.generate_monthly_report if report_type == "monthly"
+                        else report_generator.generate_weekly_report)
+            expected = json.dumps(strip_timestamps(generate(rows, target, skip_ai=True)),
+                                  ensure_ascii=False, sort_keys=True)
+            for history in (shared, primed, shipped):
+                report = generate(series, target, skip_ai=True, history=history)
+                assert report and report["sections"]["daily_data"], f"{report_type} {target}"
+                assert json.dumps(strip_timestamps(report), ensure_ascii=False, sort_keys=True) == expected, \
+                    f"{report_type} {target}: shared history changes the report"
+    assert set(primed_names) <= set(vars(shared))
+
+print("backfill tests passed")
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import json
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+import backfill_codex_analysis  # noqa: E402
+import report_analysis  # noqa: E402
+from report_analysis import Report, ReferenceLookup, analysis_fingerprint, enrich_analysis_context  # noqa: E402
+
+
+fingerprinted = []
+
+
+def recording_fingerprint(report):
+    fingerprinted.append(type(report))
+    return analysis_fingerprint(report)
+
+
+backfill_codex_analysis.analysis_fingerprint = recording_fingerprint
+report_analysis.analysis_fingerprint = recording_fingerprint
+
+index_writes = []
+_write_reference_index = report_analysis._write_reference_index
+
+
+def counting_write_reference_index(reports_root, files):
+    index_writes.append(reports_root)
+    _write_reference_index(reports_root, files)
+
+
+report_analysis._write_reference_index = counting_write_reference_index
+
+
+def run(replace_all=False):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return backfill_codex_analysis.backfill(replace_all=replace_all)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    reports_root = Path(tmp) / "reports"
+    shutil.copytree(PROJECT_ROOT / "reports", reports_root)
+    backfill_codex_analysis.REPORTS_ROOT = reports_root
+    paths = sorted(reports_root.glob("weekly/*.json")) + sorted(reports_root.glob("monthly/*.json"))
+
+    # 旧形式の空 ai_comment は再検証で削除される
+    legacy_path = paths[0]
+    legacy = json.loads(legacy_path.read_text(encoding="utf-8"))
+    legacy["sections"]["statistics"]["ai_comment"] = ""
+    legacy_path.write_text(json.dumps(legacy, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # 進行中の週は暫定化され、分析文を消した後の内容で指紋を取る
+    monday = datetime.now(report_analysis.JST).date()
+    monday -= timedelta(days=monday.weekday())
+    current = json.loads(sorted(reports_root.glob("weekly/*.json"))[-1].read_text(encoding="utf-8"))
+    current["period"].update(start_date=monday.isoformat(), end_date=(monday + timedelta(days=6)).isoformat())
+    current["sections"]["comparison"]["ai_comment"] = "確定前に書かれた比較コメント"
+    current["analysis_meta"]["source"] = "codex"
+    draft_path = reports_root / "weekly" / "9999-W01.json"
+    draft_path.write_text(json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert run(replace_all=True) == len(paths)
+    # 全件を書き換えても参照索引の書き出しは1回で、書いたファイルの内容を反映している
+    assert len(index_writes) == 1
+    reloaded = report_analysis.ReferenceIndex(reports_root)
+    reloaded.load()
+    assert not reloaded.dirty
+    draft = json.loads(draft_path.read_text(encoding="utf-8"))
+    assert draft["analysis_meta"]["source"] == "draft"
+    assert draft["sections"]["comparison"]["ai_comment"] == ""
+    references = ReferenceLookup(report_analysis.load_reference_reports(reports_root))
+    assert analysis_fingerprint(enrich_analysis_context(draft, references)) == \
+        draft["analysis_meta"]["data_fingerprint"]
+    assert "ai_comment" not in json.loads(legacy_path.read_text(encoding="utf-8"))["sections"]["statistics"]
+    # 分析文の変化が次の再検証の指紋に表れるため、2回目で収束する
+    run()
+    assert run() == 0
+    # 読み込んだレポートは Report として指紋を取る
+    assert fingerprinted and set(fingerprinted) == {Report}
+
+    # 保持したセクションの JSON を使った判定は、素の dict から計算した指紋と一致する
+    references = ReferenceLookup(report_analysis.load_reference_reports(reports_root))
+    for path in paths + [draft_path]:
+        stored = json.loads(path.read_text(encoding="utf-8"))
+        recorded = stored["analysis_meta"]["data_fingerprint"]
+        assert analysis_fingerprint(enrich_analysis_context(stored, references)) == recorded, path.name
+
+print("backfill codex analysis tests passed")
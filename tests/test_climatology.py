@@ -0,0 +1,91 @@
+import io
+import json
+import math
+import random
+import statistics
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from climatology import Climatology  # noqa: E402
+from daily_series import DailySeries  # noqa: E402
+
+
+def make_rows(seed, start=date(2020, 11, 1), days=900):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        high = round(16 + 11 * math.sin(i / 58) + rnd.uniform(-3, 3), 1)
+        low = round(high - rnd.uniform(4, 11), 1)
+        row = {"date": day.strftime("%Y/%m/%d"), "high": high if rnd.random() > 0.03 else None, "low": low,
+               "avg": round((high + low) / 2, 1) if rnd.random() > 0.02 else None}
+        row["range"] = round(row["high"] - low, 1) if row["high"] is not None else None
+        rows.append(row)
+    return rows
+
+
+rows = make_rows(1)
+series = DailySeries(rows)
+cube = Climatology.from_series(series)
+assert cube.years() == [2020, 2021, 2022, 2023]
+
+
+def month_rows(year, month):
+    return [r for r in rows if r["date"].startswith(f"{year}/{month:02d}/")]
+
+
+# セルは行数・平均・最高・最低を日別データと同じ値で返す（平均は statistics.mean と一致）
+for year, month in ((2020, 11), (2021, 2), (2022, 7), (2023, 4)):
+    selected = month_rows(year, month)
+    assert cube.days(year, month) == len(selected)
+    assert cube.mean("avg", [(year, month)]) == statistics.mean(r["avg"] for r in selected if r["avg"] is not None)
+    assert cube.max("high", year, month) == max(r["high"] for r in selected if r["high"] is not None)
+    assert cube.min("low", year, month) == min(r["low"] for r in selected)
+assert cube.days(2019, 5) == 0 and cube.mean("avg", [(2019, 5)]) is None
+
+keys = [(2022, 3), (2021, 3), (2019, 3)]
+march = [r["avg"] for year in (2022, 2021) for r in month_rows(year, 3) if r["avg"] is not None]
+assert cube.mean("avg", keys) == statistics.mean(march)
+normals = cube.month_normals()
+all_march = [r["avg"] for year in (2021, 2022, 2023) for r in month_rows(year, 3) if r["avg"] is not None]
+assert normals[3] == statistics.mean(all_march) and list(normals)[:3] == [11, 12, 1]
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = Path(tmp) / "cache" / "climatology.json"
+    # 初回は全年を集計して保存し、2回目は何も再集計しない
+    with redirect_stdout(io.StringIO()) as log:
+        first = Climatology.cached(series, path)
+    assert "4/4 年を再集計" in log.getvalue() and path.exists()
+    assert first.cells == cube.cells
+    with redirect_stdout(io.StringIO()) as log:
+        second = Climatology.cached(series, path)
+    assert "0/4 年を再集計" in log.getvalue()
+    assert second.cells == cube.cells and second.scale_bits == cube.scale_bits
+
+    # 1行修正されたら、その年だけ再集計する（結果は一から作り直したものと同じ）
+    changed = [dict(r) for r in rows]
+    changed[500]["avg"] = 0.3  # 2022年
+    changed.append({"date": "2023/04/20", "high": 21.25, "low": 9.0, "avg": 15.125, "range": 12.25})
+    changed_series = DailySeries(changed)
+    updated = Climatology.load(path)
+    assert updated.sync(changed_series) == [2022, 2023]
+    rebuilt = Climatology.from_series(changed_series)
+    for key in rebuilt.cells:
+        assert updated.mean("avg", [key]) == rebuilt.mean("avg", [key])
+        assert updated.days(*key) == rebuilt.days(*key)
+    assert updated.month_normals() == rebuilt.month_normals()
+
+    # 壊れたファイル・別バージョンは空から作り直す
+    path.write_text("{", encoding="utf-8")
+    assert Climatology.load(path).cells == {}
+    path.write_text(json.dumps({"version": 0}), encoding="utf-8")
+    assert Climatology.load(path).cells == {}
+
+print("climatology tests passed")
@@ -0,0 +1,73 @@
+import sys
+import tempfile
+import types
+from datetime import timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+from daily_cache import DailySheetCache  # noqa: E402
+
+
+class FakeClient:
+    url = "https://docs.google.com/spreadsheets/d/sheet-id/gviz/tq"
+
+    def __init__(self, rows):
+        self.header = '"Date","High","Low","Avg"'
+        self.rows = rows
+        self.queries = []
+        self.fail = False
+
+    def fetch_csv(self, sheet, query=None, timeout=30):
+        assert sheet == "Daily"
+        self.queries.append(query)
+        if self.fail:
+            raise TimeoutError("gviz timed out")
+        offset = int(query.rsplit(" ", 1)[1]) if query else 0
+        return "\n".join([self.header] + self.rows[offset:]) + "\n"
+
+
+def row(day, high=20.0):
+    return f'"2026/01/{day:02d}","{high}","10.0","15.0"'
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = Path(tmp) / "daily.sqlite3"
+    client = FakeClient([row(day) for day in range(1, 21)])
+    cache = DailySheetCache(client, path, overlap_rows=3)
+
+    full_text = "\n".join([client.header] + client.rows)
+    assert cache.fetch_text() == full_text
+    assert client.queries == [None] and cache.last_refresh == ("full", 20)
+
+    # 追記分だけを重なり3行つきで取得する
+    client.rows += [row(21), row(22)]
+    assert cache.fetch_text() == "\n".join([client.header] + client.rows)
+    assert client.queries[-1] == "select * offset 17"
+    assert cache.last_refresh == ("delta", 5)
+
+    # 重なり部分の修正を検知したら全件を取り直す
+    client.rows[19] = row(20, high=21.5)
+    assert cache.fetch_text() == "\n".join([client.header] + client.rows)
+    assert client.queries[-2:] == ["select * offset 19", None]
+
+    # 定期検証: verify_every を過ぎていれば差分ではなく全件取得
+    assert DailySheetCache(client, path, verify_every=timedelta(0)).fetch_text()
+    assert client.queries[-1] is None
+
+    # 取得失敗時はキャッシュ済みスナップショットを返す
+    client.fail = True
+    assert DailySheetCache(client, path).fetch_text() == "\n".join([client.header] + client.rows)
+
+    empty = DailySheetCache(client, Path(tmp) / "empty.sqlite3")
+    try:
+        empty.fetch_text()
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("empty cache must surface the fetch error")
+
+print("daily cache tests passed")
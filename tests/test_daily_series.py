@@ -0,0 +1,65 @@
+import sys
+import types
+from datetime import date
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+from daily_series import DailyRecord, DailySeries, parse_date  # noqa: E402
+from report_generator import filter_by_date_range  # noqa: E402
+
+
+rows = [
+    {"date": "2025/01/02", "high": 9.0, "low": -1.5, "avg": 3.2, "range": 10.5},
+    {"date": "2024/12/31", "high": 8.0, "low": 0.5, "avg": 4.0, "range": 7.5},
+    {"date": "not a date", "high": 1.0, "low": 0.0, "avg": 0.5, "range": 1.0},
+    {"date": "2025-01-01", "high": None, "low": 1.0, "avg": None, "range": None},
+    {"date": "2025/02/01", "high": 12.0, "low": 2.0, "avg": 7.0, "range": 10.0},
+]
+series = DailySeries(rows)
+
+assert len(series) == 4
+assert series.first_date == date(2024, 12, 31)
+assert series.last_date == date(2025, 2, 1)
+assert [r["date"] for r in series.between(date(2025, 1, 1), date(2025, 1, 31))] == ["2025-01-01", "2025/01/02"]
+assert series.between(date(2025, 1, 3), date(2025, 1, 31)) == []
+assert series.index_range(date(2020, 1, 1), date(2030, 1, 1)) == (0, 4)
+assert series.values("avg") == [4.0, 3.2, 7.0]
+assert series.max("high") == 12.0 and series.min("low") == -1.5
+assert list(series.year_ranges()) == [(2024, 0, 1), (2025, 1, 4)]
+assert list(series.month_ranges()) == [(2024, 12, 0, 1), (2025, 1, 1, 3), (2025, 2, 3, 4)]
+assert DailySeries.ensure(series) is series
+assert parse_date("03/15/2024") == date(2024, 3, 15)
+
+# DailyRecord は元の行と同じキーで読め、dict に戻すと元の行になる
+record = DailyRecord.from_row(rows[0])
+assert record.day == date(2025, 1, 2)
+assert record.to_dict() == rows[0]
+assert DailyRecord.from_row(record) is record
+assert DailyRecord.from_row(record.to_dict()).to_dict() == rows[0]
+assert DailyRecord.from_row({"date": "2025/01/03", "high": 5.0}).to_dict() == \
+    {"date": "2025/01/03", "high": 5.0, "low": None, "avg": None, "range": None}
+assert [record[name] for name in DailyRecord.FIELDS] == [rows[0][name] for name in DailyRecord.FIELDS]
+for key in ("day", "humidity", "__class__"):
+    try:
+        record[key]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError(f"record[{key!r}] should raise KeyError")
+assert record.get("high") == 9.0
+assert record.get("day") is None and record.get("humidity", "n/a") == "n/a"
+assert DailyRecord.from_row(rows[3]).get("high", 0.0) is None  # 欠測値はそのまま None
+
+# 期間の切り出しは行をコピーせず、系列が持つ DailyRecord をそのまま返す
+january = series.between(date(2025, 1, 1), date(2025, 1, 31))
+assert all(row is series.records[i] for i, row in zip(range(1, 3), january))
+for source in (series, list(series)):
+    picked = filter_by_date_range(source, date(2025, 1, 1), date(2025, 1, 31))
+    assert len(picked) == 2 and all(a is b for a, b in zip(picked, january))
+
+print("daily series tests passed")
@@ -0,0 +1,129 @@
+import random
+import sys
+import tempfile
+import threading
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+import data_analysis  # noqa: E402
+from data_analysis import (  # noqa: E402
+    AnalysisState,
+    RecentTimeParser,
+    analyze_data_comprehensive,
+    detect_window_changes,
+)
+
+
+# 1分間隔: 30分前（30点前）と比較する
+minutes = list(range(0, 60))
+values = [10.0] * 40 + [12.5] * 20
+hits = detect_window_changes(minutes, values, window=30, threshold=2.0, keep=3)
+assert hits == [(57, 27, 2.5), (58, 28, 2.5), (59, 29, 2.5)]
+
+# 欠測があっても点数ではなく時刻で30分前を探す
+times = [0, 1, 2, 10, 20, 31, 32, 40]
+temps = [10.0, 10.0, 10.0, 11.0, 11.5, 12.1, 12.0, 13.0]
+hits = detect_window_changes(times, temps, window=30, threshold=2.0, keep=5)
+assert [(i, j) for i, j, _ in hits] == [(5, 1), (6, 2), (7, 3)]
+
+# 30分前の点が tolerance より古ければ比較しない
+sparse = detect_window_changes([0, 45], [10.0, 15.0], window=30, threshold=2.0, tolerance=5)
+assert sparse == []
+assert detect_window_changes([0, 45], [10.0, 15.0], window=30, threshold=2.0, tolerance=20) == [(1, 0, 5.0)]
+
+# "MM/DD HH:MM"（JST）→ UNIX 分。年は基準時刻に最も近い年
+new_year = RecentTimeParser(datetime(2026, 1, 1, 0, 5, tzinfo=data_analysis.JST))
+assert new_year("12/31 23:59") == int(datetime(2025, 12, 31, 23, 59, tzinfo=data_analysis.JST).timestamp()) // 60
+assert new_year("01/01 00:04") - new_year("12/31 23:59") == 5
+assert new_year(" 1/1 0:04") == new_year("01/01 00:04")
+year_end = RecentTimeParser(datetime(2025, 12, 31, 23, 59, tzinfo=data_analysis.JST))
+assert year_end("01/01 00:01") == new_year("01/01 00:01")  # シート側の時計が進んでいても翌年
+for bad in ("", "12/23", "13/01 10:00", "02/29 10:00", "12/23 24:00", None):
+    assert new_year(bad) is None, bad
+
+# 年をまたいでも日別サマリーは時刻順の直近7日（文字列順だと 01/xx が先頭に来てしまう）
+crossing = [
+    {"epoch_minute": new_year("12/28 00:00") + 360 * i, "temperature": 5.0 + i, "humidity": 50.0}
+    for i in range(40)
+]
+summary = data_analysis._python_daily_summary(crossing)
+assert [row["date"] for row in summary] == ["12/31", "01/01", "01/02", "01/03", "01/04", "01/05", "01/06"]
+assert summary[-1] == {"date": "01/06", "high": 44.0, "low": 41.0, "avg": 42.5, "range": 3.0}
+if data_analysis.np is not None:
+    assert data_analysis._vectorized_daily_summary(data_analysis._RecordArrays(crossing)) == summary
+
+# NumPy 実装は純Python実装と同じ出力を返す（NumPy が無い環境では省略）
+if data_analysis.np is not None:
+    rng = random.Random(12)
+    stamp = datetime.now(data_analysis.JST)
+    temp = 18.0
+    records = []
+    for _ in range(2500):
+        stamp -= timedelta(minutes=rng.choice([1, 1, 1, 2, 5]))
+        temp += rng.gauss(0, 0.15)
+        records.append({
+            "datetime": stamp.strftime("%m/%d %H:%M"),
+            "temperature": round(temp, rng.choice([1, 2])),
+            "humidity": round(rng.uniform(30, 90), 1),
+        })
+    records.reverse()
+    for size in (1, 2, 12, 90, len(records)):
+        subset = records[-size:]
+        assert analyze_data_comprehensive(subset, backend="numpy") == \
+            analyze_data_comprehensive(subset, backend="python"), size
+
+# 状態ファイルを使った増分集計は全件集計と同じ結果を返す
+rng = random.Random(7)
+stamp = datetime.now(data_analysis.JST) - timedelta(minutes=3100)
+temp = 12.0
+sheet = []
+for _ in range(3000):
+    stamp += timedelta(minutes=1)
+    temp += rng.gauss(0, 0.2) + (2.5 if rng.random() < 0.005 else 0)
+    sheet.append({"datetime": stamp.strftime("%m/%d %H:%M"), "temperature": round(temp, 1), "humidity": 55.0})
+
+
+def window(end, size=2000):
+    return [dict(row) for row in sheet[max(0, end - size):end]]
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    state = AnalysisState(Path(tmp) / "analysis_state.json")
+    modes = []
+    for end in (2800, 2860, 2861, 2861, 2920):
+        assert analyze_data_comprehensive(window(end), state=state) == \
+            analyze_data_comprehensive(window(end), backend="python"), end
+        modes.append(state.last_update)
+    assert modes == [("full", 2000), ("incremental", 60), ("incremental", 1), ("incremental", 0), ("incremental", 59)]
+
+    # 直近6時間の行が修正されていたら全件から作り直す
+    edited = window(2980)
+    edited[-100]["temperature"] += 0.5
+    assert analyze_data_comprehensive(edited, state=state) == \
+        analyze_data_comprehensive([dict(row) for row in edited], backend="python")
+    assert state.last_update == ("full", 2000)
+
+    # 壊れた状態ファイルも全件集計に戻る
+    state.path.write_text("{", encoding="utf-8")
+    assert analyze_data_comprehensive(window(3000), state=state) == \
+        analyze_data_comprehensive(window(3000), backend="python")
+    assert state.last_update == ("full", 2000)
+
+    # 取り消し済みの状態は集計結果を返すが、状態ファイルは書き換えない
+    analyze_data_comprehensive(window(2980), state=state)
+    saved = state.path.read_text(encoding="utf-8")
+    cancelled = threading.Event()
+    cancelled.set()
+    late = AnalysisState(state.path, cancelled=cancelled)
+    assert analyze_data_comprehensive(window(3000), state=late) == \
+        analyze_data_comprehensive(window(3000), backend="python")
+    assert late.last_update == ("incremental", 20)
+    assert state.path.read_text(encoding="utf-8") == saved
+
+print("data analysis tests passed")
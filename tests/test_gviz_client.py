@@ -0,0 +1,91 @@
+import sys
+import threading
+import types
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+from gviz_client import GvizClient, get_client, optional_float, typed_rows  # noqa: E402
+
+
+class FakeResponse:
+    encoding = "utf-8"
+
+    def __init__(self, text, status=200):
+        self.text = text
+        self.status = status
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+    def iter_lines(self):
+        yield from self.text.encode("utf-8").splitlines()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.calls = []
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        self.calls.append((url, dict(params), timeout))
+        if params["sheet"] in ("Summary", "Recent"):
+            # 2シートが同時に取得中でなければ待ち合わせがタイムアウトする
+            self.barrier.wait()
+        body = self.bodies[params["sheet"]]
+        return FakeResponse(body) if body is not None else FakeResponse("", status=500)
+
+
+session = FakeSession({"Summary": "a,1\n", "Recent": "h\n1,2,3\n", "Daily": None, "Raw": "B,C\n1,2\n"})
+client = GvizClient("sheet-id", max_workers=3, session=session)
+
+assert client.fetch_csv("Raw", "select B, C", timeout=60) == "B,C\n1,2\n"
+url, params, timeout = session.calls[0]
+assert url == "https://docs.google.com/spreadsheets/d/sheet-id/gviz/tq"
+assert params == {"tqx": "out:csv", "sheet": "Raw", "tq": "select B, C"}
+assert timeout == 60
+
+results = client.fetch_many({
+    "summary": ("Summary", None, 10),
+    "recent": ("Recent", None, 30),
+    "daily": ("Daily", None, 15),
+})
+assert list(results) == ["summary", "recent", "daily"]
+assert results["summary"] == "a,1\n"
+assert results["recent"] == "h\n1,2,3\n"
+assert isinstance(results["daily"], RuntimeError)
+
+summary = client.timing_summary()
+assert summary["calls"] == 4
+assert summary["by_sheet"]["Daily"] == {"calls": 1, "seconds": summary["by_sheet"]["Daily"]["seconds"], "bytes": 0, "errors": 1}
+assert summary["by_sheet"]["Raw"]["bytes"] == len("B,C\n1,2\n")
+
+# ストリーミング: 引用符内のカンマも1フィールドとして読む
+session.bodies["Stream"] = '"datetime","temp","humid"\n"10/16 09:00","12.5","60"\n"10/16 09:01","bad","61"\n"a,b","1",""\n'
+rows = list(client.iter_csv("Stream"))
+assert rows[0] == ["datetime", "temp", "humid"]
+assert rows[3] == ["a,b", "1", ""]
+assert client.timings[-1]["sheet"] == "Stream" and client.timings[-1]["ok"]
+assert client.timings[-1]["bytes"] == len(session.bodies["Stream"].encode("utf-8"))
+assert list(typed_rows(rows[1:], str, float, float)) == [("10/16 09:00", 12.5, 60.0)]
+assert list(typed_rows(rows[1:], str, float, optional_float)) == [("10/16 09:00", 12.5, 60.0), ("a,b", 1.0, None)]
+try:
+    list(client.iter_csv("Daily"))
+except RuntimeError:
+    assert client.timings[-1]["ok"] is False
+else:
+    raise AssertionError("HTTP error should propagate")
+
+assert get_client("sheet-id") is get_client("sheet-id")
+assert get_client("sheet-id") is not get_client("other-id")
+
+print("gviz client tests passed")
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+os.environ.pop("WX_METRICS", None)
+
+import instrumentation  # noqa: E402
+from instrumentation import Metrics  # noqa: E402
+
+
+# 既定では無効: 何も記録せず、同じ no-op を返す
+assert not instrumentation.enabled()
+assert instrumentation.span("a") is instrumentation.span("b")
+with instrumentation.span("fetch"):
+    instrumentation.count("rows", 10)
+instrumentation.start("parse").stop()
+assert instrumentation.metrics.snapshot() == {"spans": {}, "counters": {}}
+assert instrumentation.metrics.drain() is None
+assert instrumentation.write_run_metrics("test") is None
+
+
+@instrumentation.timed("decorated")
+def double(value):
+    return value * 2
+
+
+assert double(4) == 8 and instrumentation.metrics.snapshot()["spans"] == {}
+
+# 有効時: 名前ごとに回数・合計・最大を集計し、カウンタを加算する
+metrics = Metrics(enabled=True)
+for seconds in (0.5, 1.5, 1.0):
+    metrics.add("gemini", seconds)
+with metrics.span("write"):
+    pass
+timer = metrics.start("statistics")
+timer.stop()
+metrics.count("rows", 100)
+metrics.count("rows", 20)
+snapshot = metrics.snapshot()
+assert snapshot["spans"]["gemini"] == {"calls": 3, "seconds": 3.0, "max_seconds": 1.5}
+assert snapshot["spans"]["write"]["calls"] == 1 and snapshot["spans"]["statistics"]["calls"] == 1
+assert snapshot["counters"] == {"rows": 120}
+assert metrics.timings()["gemini"] == 3.0
+
+# スレッドから同時に記録しても取りこぼさない
+threads = [threading.Thread(target=lambda: [metrics.count("parallel") for _ in range(1000)]) for _ in range(4)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+assert metrics.snapshot()["counters"]["parallel"] == 4000
+
+# ワーカープロセスの集計を drain して親へ merge する
+worker = Metrics(enabled=True)
+worker.add("report.weekly", 0.25)
+worker.add("report.weekly", 0.75)
+worker.count("rows", 5)
+shipped = worker.drain()
+assert worker.snapshot() == {"spans": {}, "counters": {}}
+metrics.merge(shipped)
+merged = metrics.snapshot()
+assert merged["spans"]["report.weekly"] == {"calls": 2, "seconds": 1.0, "max_seconds": 0.75}
+assert merged["counters"]["rows"] == 125
+
+# リスナーは無効時でも span の終了を受け取る（記録はしない）
+listened = []
+quiet = Metrics()
+quiet.set_listener(listened.append)
+with quiet.span("parse"):
+    pass
+quiet.start("write").stop()
+assert listened == ["parse", "write"] and quiet.snapshot()["spans"] == {}
+quiet.set_listener(None)
+assert quiet.span("parse") is instrumentation.span("parse")
+
+# 有効時のみ run_metrics.json を書き出す
+instrumentation.metrics = metrics
+try:
+    assert double(3) == 6 and metrics.snapshot()["spans"]["decorated"]["calls"] == 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = instrumentation.write_run_metrics("test", Path(tmp) / "out" / "run_metrics.json",
+                                                 extra={"gviz": {"calls": 3}})
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        assert payload["script"] == "test" and payload["gviz"] == {"calls": 3}
+        assert payload["spans"]["gemini"]["calls"] == 3 and payload["wall_seconds"] >= 0
+finally:
+    instrumentation.metrics = Metrics()
+
+print("instrumentation tests passed")
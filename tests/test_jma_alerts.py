@@ -19,6 +19,7 @@ genai_stub = types.ModuleType("google.genai")
 google_stub.genai = genai_stub
 data_analysis_stub = types.ModuleType("data_analysis")
 data_analysis_stub.analyze_data_comprehensive = lambda *_args, **_kwargs: {}
+data_analysis_stub.AnalysisState = lambda *_args, **_kwargs: None
 sys.modules.update(
     {
         "requests": requests_stub,
@@ -0,0 +1,81 @@
+import os
+import pstats
+import sys
+import tempfile
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+os.environ.pop("WX_PROFILE", None)
+os.environ.pop("WX_METRICS", None)
+
+import instrumentation  # noqa: E402
+import profiling  # noqa: E402
+from profiling import take_profile_mode  # noqa: E402
+
+
+# --profile は取り除いてから main に渡す（モード省略時は cpu）
+argv = ["script.py", "--profile", "--type", "weekly"]
+assert take_profile_mode(argv) == "cpu" and argv == ["script.py", "--type", "weekly"]
+argv = ["script.py", "--backfill", "--profile", "mem"]
+assert take_profile_mode(argv) == "mem" and argv == ["script.py", "--backfill"]
+argv = ["script.py", "--profile=cpu", "--no-ai"]
+assert take_profile_mode(argv) == "cpu" and argv == ["script.py", "--no-ai"]
+argv = ["script.py", "--type", "monthly"]
+assert take_profile_mode(argv) is None and argv == ["script.py", "--type", "monthly"]
+
+# 環境変数でも指定でき、none / 不明なモードはプロファイルなし
+os.environ["WX_PROFILE"] = "MEM"
+assert take_profile_mode(["script.py"]) == "mem"
+os.environ["WX_PROFILE"] = "none"
+assert take_profile_mode(["script.py"]) is None
+os.environ["WX_PROFILE"] = "heap"
+assert take_profile_mode(["script.py"]) is None
+os.environ.pop("WX_PROFILE")
+assert take_profile_mode(["script.py", "--profile=heap"]) is None
+
+
+def main():
+    with instrumentation.span("fetch"):
+        rows = [list(range(50)) for _ in range(200)]
+    with instrumentation.span("statistics"):
+        total = sum(map(sum, rows))
+    with instrumentation.span("fetch"):
+        pass
+    return total
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    os.environ["WX_PROFILE_DIR"] = tmp
+    try:
+        # プロファイルなしなら main をそのまま実行する
+        sys.argv = ["script.py"]
+        assert profiling.run_profiled(main, "demo") == 200 * 1225
+        assert not list(Path(tmp).iterdir())
+
+        # cpu: .prof と累積時間順の .txt
+        sys.argv = ["script.py", "--profile"]
+        assert profiling.run_profiled(main, "demo") == 200 * 1225
+        assert sys.argv == ["script.py"]
+        prof = next(Path(tmp).glob("demo-*.prof"))
+        assert "main" in {func for _, _, func in pstats.Stats(str(prof)).stats}
+        assert "cumulative" in prof.with_suffix(".txt").read_text(encoding="utf-8")
+
+        # mem: span の初回終了ごと（と終了時）に tracemalloc のスナップショット
+        sys.argv = ["script.py", "--profile", "mem"]
+        assert profiling.run_profiled(main, "demo") == 200 * 1225
+        report = next(Path(tmp).glob("demo-*-mem.txt")).read_text(encoding="utf-8")
+        stages = [line.split()[-1] for line in report.split("## traced memory at stage boundaries")[1]
+                  .split("\n\n")[0].splitlines()[2:]]
+        assert stages == ["fetch", "statistics", "exit"], stages
+        assert "## growth until statistics" in report and "## top allocation sites at exit" in report
+
+        # 計測は無効のまま、リスナーも外れている
+        assert not instrumentation.enabled()
+        assert instrumentation.metrics.listener is None and not instrumentation.metrics.live
+        assert instrumentation.metrics.snapshot() == {"spans": {}, "counters": {}}
+    finally:
+        os.environ.pop("WX_PROFILE_DIR")
+
+print("profiling tests passed")
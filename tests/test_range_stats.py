@@ -0,0 +1,90 @@
+import math
+import random
+import statistics
+import sys
+import types
+from array import array
+from datetime import date, timedelta
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from range_stats import RangeStats  # noqa: E402
+
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+
+import report_generator  # noqa: E402
+from daily_series import DailySeries  # noqa: E402
+
+
+# 任意の範囲の和集合で statistics.mean / stdev とビット単位で一致し、最大・最小は最初の行を返す
+rnd = random.Random(7)
+for _ in range(200):
+    n = rnd.randint(1, 120)
+    column = array('d', (
+        round(rnd.uniform(-12, 38), rnd.choice((1, 1, 2))) if rnd.random() > 0.1 else math.nan
+        for _ in range(n)
+    ))
+    engine = RangeStats({"avg": column})
+    for _ in range(20):
+        ranges = []
+        for _ in range(rnd.randint(1, 4)):
+            lo = rnd.randint(0, n)
+            ranges.append((lo, rnd.randint(lo, n)))
+        rows = [i for lo, hi in ranges for i in range(lo, hi) if column[i] == column[i]]
+        values = [column[i] for i in rows]
+        assert engine.count("avg", ranges) == len(values)
+        if not values:
+            assert engine.mean("avg", ranges) is None and engine.argmax("avg", ranges) is None
+            continue
+        assert engine.mean("avg", ranges) == statistics.mean(values)
+        assert engine.argmax("avg", ranges) == next(i for i in rows if column[i] == max(values))
+        assert engine.argmin("avg", ranges) == next(i for i in rows if column[i] == min(values))
+        if len(values) > 1:
+            assert engine.stdev("avg", ranges) == statistics.stdev(values)
+        else:
+            assert engine.stdev("avg", ranges) is None
+
+# 同値は前の行、符号付きゼロも元の値のまま
+ties = RangeStats({"low": array('d', [1.5, -0.0, 0.0, math.nan, -0.0])}).prime(minima=("low",))
+assert ties.argmin("low", [(2, 5), (0, 2)]) == 2
+assert ties.argmin("low", [(0, 5)]) == 1
+assert ties.argmax("low", [(3, 4)]) is None
+
+# 期間統計は行を絞り込んで計算した compute_statistics と同じ結果になる
+rows = []
+day = date(2019, 1, 1)
+for i in range(2200):
+    high = round(15 + 12 * math.sin(i / 58) + rnd.uniform(-4, 4), 1)
+    low = round(high - rnd.uniform(3, 12), 1)
+    row = {
+        "date": day.strftime("%Y/%m/%d"),
+        "high": high if rnd.random() > 0.03 else None,
+        "low": low if rnd.random() > 0.03 else None,
+        "avg": round((high + low) / 2, 1) if rnd.random() > 0.02 else None,
+    }
+    row["range"] = round(row["high"] - row["low"], 1) if row["high"] is not None and row["low"] is not None else None
+    if rnd.random() > 0.01:  # 欠測日
+        rows.append(row)
+    day += timedelta(days=1)
+series = DailySeries(rows)
+for start, length in ((date(2019, 1, 1), 7), (date(2020, 2, 24), 7), (date(2021, 6, 1), 30), (date(2018, 12, 25), 14)):
+    end = start + timedelta(days=length - 1)
+    expected = report_generator.compute_statistics(report_generator.filter_by_date_range(rows, start, end))
+    assert report_generator.compute_period_statistics(series, start, end) == expected
+    assert list(report_generator.compute_period_statistics(series, start, end)) == list(expected)
+
+years = [series.index_range(date(y, 3, 1), date(y, 3, 31)) for y in (2024, 2023, 2022, 2021, 2020, 2019)]
+baseline = [r for lo, hi in years for r in series.records[lo:hi]]
+assert report_generator.compute_range_statistics(series, years) == report_generator.compute_statistics(baseline)
+assert report_generator.compute_range_statistics(series, [(5, 5)]) == {}
+
+history = report_generator.HistoryContext(series).prime()
+avgs = series.values("avg")
+assert history.overall_avg == statistics.mean(avgs) and history.overall_stdev == statistics.stdev(avgs)
+march = [v for _, month, lo, hi in series.month_ranges() if month == 3 for v in series.values("avg", lo, hi)]
+assert history.month_climatology[3] == statistics.mean(march)
+
+print("range stats tests passed")
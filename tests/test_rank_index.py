@@ -0,0 +1,38 @@
+import random
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from rank_index import RankIndex  # noqa: E402
+
+
+# 二分探索の件数は線形に数えた件数と一致する（同値・符号付きゼロを含む）
+rnd = random.Random(23)
+for _ in range(200):
+    values = [round(rnd.uniform(-5, 30), rnd.choice((0, 1))) for _ in range(rnd.randint(1, 80))]
+    values += [0.0, -0.0] if rnd.random() < 0.3 else []
+    index = RankIndex(values)
+    assert len(index) == len(values)
+    for x in values + [-99.0, 99.0, 0.0, rnd.uniform(-5, 30)]:
+        assert index.below(x) == sum(1 for v in values if v < x)
+        assert index.above(x) == sum(1 for v in values if v > x)
+        assert index.fraction_below(x) == sum(1 for v in values if v < x) / len(values)
+        assert index.rank_warmest(x) == 1 + sum(v > x for v in values)
+        assert index.rank_coldest(x) == 1 + sum(v < x for v in values)
+
+# 追加した観測値も順序を保ったまま数えられる
+index = RankIndex([3.0, 1.0])
+for value in (2.0, 2.0, 5.0, -1.0):
+    index.insert(value)
+assert index.values == [-1.0, 1.0, 2.0, 2.0, 3.0, 5.0]
+assert index.below(2.0) == 2 and index.above(2.0) == 2 and index.rank_warmest(2.0) == 3
+
+# from_sorted は渡したリストをそのまま使う
+presorted = [1.0, 2.0, 4.0]
+assert RankIndex.from_sorted(presorted).values is presorted
+assert RankIndex.from_sorted(presorted).below(3.0) == 2
+
+print("rank index tests passed")
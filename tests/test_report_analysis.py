@@ -1,5 +1,10 @@
+import csv
+import hashlib
 import json
+import os
+import shutil
 import sys
+import tempfile
 import types
 from datetime import date
 from pathlib import Path
@@ -10,11 +15,19 @@ sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
 from report_analysis import (  # noqa: E402
     ANALYSIS_PROTOCOL_VERSION,
+    REFERENCE_INDEX_NAME,
+    ReferenceLookup,
+    Report,
+    analysis_fingerprint,
     build_analysis_context,
     build_gemini_protocol_prompt,
     generate_evidence_analysis,
+    invalidate_fingerprint,
+    load_reference_reports,
     mark_report_as_draft,
     report_completeness,
+    set_analysis_context,
+    set_section_comment,
 )
 
 requests_stub = types.ModuleType("requests")
@@ -28,6 +41,7 @@ sys.modules.setdefault("dotenv", dotenv_stub)
 sys.modules.setdefault("google", google_stub)
 sys.modules.setdefault("google.genai", genai_stub)
 
+import report_analysis  # noqa: E402
 import report_generator  # noqa: E402
 
 
@@ -97,6 +111,27 @@ iso_week_reference = {
 iso_context = build_analysis_context(iso_week_report, [iso_week_reference])
 assert iso_context["same_season_history"]["years"] == [2025, 2026]
 
+weekly_references = [
+    {
+        "type": "weekly",
+        "period": {"year": 2025, "week": week, "start_date": start, "end_date": end, "label": start},
+        "sections": {"statistics": {"avg_temp": float(week)}},
+    }
+    for week, start, end in (
+        (48, "2025-11-24", "2025-11-30"),
+        (49, "2025-12-01", "2025-12-07"),
+        (50, "2025-12-08", "2025-12-14"),
+        (51, "2025-12-15", "2025-12-21"),
+        (52, "2025-12-22", "2025-12-28"),
+    )
+] + [iso_week_reference, iso_week_report]
+lookup = ReferenceLookup(weekly_references + weekly_references[:2])
+assert len(lookup) == len(weekly_references) + 2
+lookup_context = build_analysis_context(iso_week_report, lookup)
+assert lookup_context == build_analysis_context(iso_week_report, weekly_references)
+assert [row["year"] for row in lookup_context["recent_history"]["previous_periods"]] == [2025] * 4
+assert lookup_context["recent_history"]["previous_periods"][0]["start_date"] == "2025-12-01"
+
 draft = sample_report()
 mark_report_as_draft(draft)
 assert draft["analysis_meta"]["analysis_available"] is False
@@ -133,10 +168,123 @@ for report_path in report_paths:
             assert len(comment) >= 75, f"shallow {key}: {report_path.name}"
             assert "対象期間は終了しており" not in comment, f"legacy template: {report_path.name}"
 
+
+
+def full_fingerprint(report):
+    """分割せずに基底全体を JSON 化した指紋（analysis_fingerprint と一致すべき値）"""
+    sections = report.get("sections", {})
+    basis = {"type": report.get("type"), "period": report.get("period"),
+             "analysis_context": report.get("analysis_context")}
+    basis.update({name: sections.get(name) for name in ("statistics", "daily_data", "comparison", "baseline", "events")})
+    raw = json.dumps(basis, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+# Report がセクションの JSON を保持しても指紋は全体を JSON 化した値と同じで、
+# setter または invalidate_fingerprint を通した変更は次の指紋に反映される
+for report_path in report_paths[:20]:
+    text = report_path.read_text(encoding="utf-8")
+    plain = json.loads(text)
+    stored = Report(plain)
+    assert analysis_fingerprint(stored) == analysis_fingerprint(stored) == full_fingerprint(plain), report_path.name
+    assert set(stored.fingerprint_parts) == {"analysis_context", "statistics", "daily_data", "comparison",
+                                             "baseline", "events"}
+    assert json.dumps(stored, ensure_ascii=False, indent=2) == json.dumps(plain, ensure_ascii=False, indent=2)
+    set_section_comment(stored, "comparison", "差し替えたコメント")
+    assert analysis_fingerprint(stored) == full_fingerprint(stored)
+    del stored["sections"]["comparison"]["ai_comment"]
+    invalidate_fingerprint(stored, "comparison")
+    assert analysis_fingerprint(stored) == full_fingerprint(stored)
+    stored["sections"]["statistics"]["avg_temp"] = -12.3
+    invalidate_fingerprint(stored)
+    set_analysis_context(stored, {})
+    assert analysis_fingerprint(stored) == full_fingerprint(stored)
+    # 読み込んだままの dict は毎回全体を JSON 化するので、直接の書き換えもそのまま反映される
+    plain["sections"]["daily_data"][0]["high"] = 99.9
+    assert analysis_fingerprint(plain) == full_fingerprint(plain)
+
 assert not (PROJECT_ROOT / "reports" / "monthly" / "2026-08.json").exists()
 assert report_generator.is_period_closed("monthly", "2026-07", date(2026, 8, 1))
 assert not report_generator.is_period_closed("monthly", "2026-08", date(2026, 8, 1))
 assert report_generator.is_period_closed("weekly", "2026-W30", date(2026, 8, 3))
 assert not report_generator.is_period_closed("weekly", "2026-W32", date(2026, 8, 3))
 
+assert report_generator._consecutive_date_ranges(
+    [date(2026, 2, 27), date(2026, 2, 28), date(2026, 3, 1), date(2026, 3, 5)]
+) == [(date(2026, 2, 27), date(2026, 3, 1)), (date(2026, 3, 5), date(2026, 3, 5))]
+raw_temps = report_generator._raw_temps_by_date(csv.reader(
+    '"toDate(A)","B","C"\n"2026-03-01","0","0"\n"2026-03-01","4.5","61"\n"2026-03-01","0","48"\n"2026-03-05","7.25",""\n'
+    .splitlines()
+))
+assert raw_temps == {date(2026, 3, 1): [4.5, 0.0], date(2026, 3, 5): [7.25]}
+
+fingerprint_rows = [
+    {"date": f"2026/{month:02d}/{day:02d}", "high": 20.0 + day % 7, "low": 10.0, "avg": 15.0, "range": 10.0 + day % 7}
+    for month in (5, 6, 7) for day in range(1, 29)
+]
+fingerprint_history = report_generator.HistoryContext(fingerprint_rows)
+june_weekly = report_generator.report_input_fingerprint(fingerprint_history, "weekly", date(2026, 6, 10))
+june_monthly = report_generator.report_input_fingerprint(fingerprint_history, "monthly", date(2026, 6, 1))
+assert june_weekly == report_generator.report_input_fingerprint(
+    report_generator.HistoryContext([dict(row) for row in reversed(fingerprint_rows)]), "weekly", date(2026, 6, 10)
+)
+changed_rows = [dict(row) for row in fingerprint_rows]
+changed_rows[-1]["avg"] = 15.5  # 7月末の変更は6月の週報・月報の入力に含まれない
+changed_history = report_generator.HistoryContext(changed_rows)
+assert report_generator.report_input_fingerprint(changed_history, "weekly", date(2026, 6, 10)) == june_weekly
+assert report_generator.report_input_fingerprint(changed_history, "monthly", date(2026, 6, 1)) == june_monthly
+assert report_generator.report_input_fingerprint(changed_history, "monthly", date(2026, 7, 1)) != \
+    report_generator.report_input_fingerprint(fingerprint_history, "monthly", date(2026, 7, 1))
+
+with tempfile.TemporaryDirectory() as tmp:
+    reports_copy = Path(tmp) / "reports"
+    shutil.copytree(PROJECT_ROOT / "reports", reports_copy)
+    full_references = []
+    for report_path in report_paths:
+        full_references.append(json.loads(report_path.read_text(encoding="utf-8")))
+    compact_references = load_reference_reports(reports_copy)
+    assert (reports_copy / REFERENCE_INDEX_NAME).exists()
+    assert len(compact_references) == len(full_references)
+    assert all("daily_data" not in ref["sections"] for ref in compact_references)
+    for stored in (full_references[0], full_references[-1]):
+        assert build_analysis_context(stored, compact_references) == build_analysis_context(stored, full_references)
+
+    # mtime/サイズが変わったファイルだけ読み直し、消えたファイルは索引から外す。
+    changed_path = sorted((reports_copy / "monthly").glob("*.json"))[0]
+    changed = json.loads(changed_path.read_text(encoding="utf-8"))
+    changed["sections"]["statistics"]["avg_temp"] = -12.3
+    changed_path.write_text(json.dumps(changed, ensure_ascii=False, indent=2), encoding="utf-8")
+    stamp = changed_path.stat()
+    os.utime(changed_path, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1_000_000_000))
+    removed_path = sorted((reports_copy / "weekly").glob("*.json"))[0]
+    removed_path.unlink()
+    reloaded = {ref["_reference_file"]: ref for ref in load_reference_reports(reports_copy)}
+    assert reloaded[changed_path.name]["sections"]["statistics"]["avg_temp"] == -12.3
+    assert removed_path.name not in reloaded
+    assert len(reloaded) == len(compact_references) - 1
+
+    # チェックアウトし直して mtime がすべて変わっても（Actions でキャッシュから索引を戻した場合）、
+    # 内容のハッシュが一致するファイルは読み直さない
+    for path in reports_copy.glob("*/*.json"):
+        stamp = path.stat()
+        os.utime(path, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 5_000_000_000))
+    parsed = []
+    compact_reference = report_analysis.compact_reference
+    report_analysis.compact_reference = lambda report, filename: parsed.append(filename) or \
+        compact_reference(report, filename)
+    try:
+        index = report_analysis.ReferenceIndex(reports_copy)
+        assert {ref["_reference_file"]: ref for ref in index.load()} == reloaded
+        assert parsed == [] and index.dirty
+        index.flush()
+        changed["sections"]["statistics"]["avg_temp"] = -3.5
+        changed_path.write_text(json.dumps(changed, ensure_ascii=False, indent=2), encoding="utf-8")
+        written = changed_path.stat()
+        os.utime(changed_path, ns=(written.st_atime_ns, written.st_mtime_ns + 1_000_000_000))
+        rehashed = {ref["_reference_file"]: ref for ref in load_reference_reports(reports_copy)}
+        assert parsed == [changed_path.name]
+        assert rehashed[changed_path.name]["sections"]["statistics"]["avg_temp"] == -3.5
+    finally:
+        report_analysis.compact_reference = compact_reference
+
 print(f"report analysis tests passed ({len(report_paths)} reports validated)")
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# スクリプトの import にかけてよい時間（-X importtime の累積、秒）。Gemini SDK の読み込みだけでこれを超える
+IMPORT_BUDGET_SECONDS = 0.8
+LAZY_MODULES = ("google", "google.genai", "dotenv")
+
+
+def import_times(module_name):
+    """``python -X importtime`` で module_name を import し、{モジュール: 累積秒} を返す。
+
+    開発環境の .env（README の手順で作成される）に左右されないよう、.env は存在しないパスを指す。
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "WX_ENV_FILE": str(Path(tmp) / "missing.env")}
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True, env=env,
+        )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line.split(":", 1)[1].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+# スクリプトの import では Gemini SDK・python-dotenv を読み込まず、予算内に収まる
+for script in ("report_generator", "ai_advisor"):
+    best = None
+    for _ in range(3):  # 初回は .pyc 生成を含むため、最良値で判定する
+        times = import_times(script)
+        loaded = sorted(set(LAZY_MODULES) & set(times))
+        assert not loaded, f"{script} imports {loaded} at startup"
+        best = times[script] if best is None else min(best, times[script])
+    assert best < IMPORT_BUDGET_SECONDS, f"{script} import took {best:.3f}s"
+
+import gemini_client  # noqa: E402
+
+
+# SDK は初回の get_client で読み込み、クライアントは API キーごとに1つだけ作る
+constructed = []
+genai_stub = types.ModuleType("google.genai")
+genai_stub.Client = lambda api_key: constructed.append(api_key) or types.SimpleNamespace(api_key=api_key)
+google_stub = types.ModuleType("google")
+google_stub.genai = genai_stub
+assert "google.genai" not in sys.modules
+sys.modules.update({"google": google_stub, "google.genai": genai_stub})
+
+first = gemini_client.get_client("key-a")
+assert gemini_client.get_client("key-a") is first
+assert gemini_client.get_client("key-b") is not first
+assert constructed == ["key-a", "key-b"]
+gemini_client.clear_clients()
+assert gemini_client.get_client("key-a") is not first and constructed == ["key-a", "key-b", "key-a"]
+
+# .env が無ければ python-dotenv を読み込まない。読み込みは1プロセス1回
+loaded_paths = []
+dotenv_stub = types.ModuleType("dotenv")
+dotenv_stub.load_dotenv = loaded_paths.append
+with tempfile.TemporaryDirectory() as tmp:
+    assert gemini_client.load_env(Path(tmp) / ".env") is False
+    assert "dotenv" not in sys.modules
+    gemini_client._env_loaded = False
+    env_file = Path(tmp) / ".env"
+    env_file.write_text("GEMINI_API_KEY=from-dotenv\n", encoding="utf-8")
+    sys.modules["dotenv"] = dotenv_stub
+    assert gemini_client.load_env(env_file) is True
+    assert gemini_client.load_env(env_file) is False
+    assert loaded_paths == [env_file]
+
+print("startup tests passed")